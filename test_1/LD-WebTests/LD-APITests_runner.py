@@ -17,6 +17,9 @@ def get_parser():
     parser.add_argument('--reruns', action='store', help='how often to rerun tests on failure')
     parser.add_argument('--extra_pytest_args', action='store', help='any extra args to pass to pytest')
     parser.add_argument('--error_on_fail', action='store_true', help='Specify to propagate exit codes on test failures')
+    parser.add_argument('--sequential_phases',
+                        action='store_true',
+                        help='Run the serial tests after the parallel tests instead of at the same time')
     return parser.parse_args()
 
 
@@ -65,7 +68,7 @@ def get_subprocess_call(args):
 def main():
     args = get_parser()
     pytest_cmds = get_subprocess_call(args)
-    run_pytest_commands(pytest_cmds, args.error_on_fail)
+    run_pytest_commands(pytest_cmds, args.error_on_fail, concurrent=not args.sequential_phases)
 
 
 if __name__ == '__main__':
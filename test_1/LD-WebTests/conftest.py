@@ -1,8 +1,15 @@
-from os.path import dirname, basename
+from os.path import dirname, basename, join
 
 import pytest
+from library import polling, wait_instrumentation
+from library.api.cassette import CassetteRecorder
+from library.resource_lock import server_config_lock
+from library.test_durations import DEFAULT_MAX_WORKERS, HISTORY_FILE_NAME, DurationHistory, get_profile
 from library.utils import is_k8s
 
+# nodeid -> measured duration (s) of the tests of this session, see pytest_runtest_logreport
+_measured_durations = {}
+
 
 def pytest_addoption(parser):
     parser.addoption("--headless",
@@ -32,6 +39,49 @@ def pytest_addoption(parser):
                      action="store_true",
                      default=None,
                      help="Print test names such that Tiltfile can use them as arguments in test commands")
+    parser.addoption('--max_workers',
+                     type=int,
+                     default=DEFAULT_MAX_WORKERS,
+                     help='Upper bound of the number of xdist workers chosen by `-n auto` from the duration history')
+    parser.addoption(
+        '--durations_history',
+        action='store',
+        default=None,
+        help='Path of the test duration history file, {} in the root dir by default'.format(HISTORY_FILE_NAME))
+    parser.addoption('--ui_login',
+                     action='store_true',
+                     help='Log in through the login page in the login_to_livedesign fixture, instead of setting the '
+                     'session cookies obtained over the REST API')
+    parser.addoption('--record_cassette',
+                     action='store',
+                     default=None,
+                     help='Record the HTTP traffic of the LiveDesign clients to this cassette file, see '
+                     'library.api.cassette. xdist workers append their id to the file name')
+    parser.addoption('--instrument_waits',
+                     action='store_true',
+                     help='Record every wait of library.dom / library.wait and report the slowest selectors, helpers '
+                     'and tests at the end of the run, along with the library.polling call sites')
+    parser.addoption('--wait_report',
+                     action='store',
+                     default=None,
+                     help='Path of a JSON file to write the wait report to, implies --instrument_waits')
+
+
+def pytest_configure(config):
+    if config.getoption('--instrument_waits') or config.getoption('--wait_report'):
+        wait_instrumentation.enable()
+
+    cassette_path = config.getoption('--record_cassette')
+    if cassette_path:
+        if hasattr(config, 'workerinput'):
+            cassette_path = '{}.{}'.format(cassette_path, config.workerinput['workerid'])
+        config._cassette_recorder = CassetteRecorder(cassette_path).start()
+
+
+def pytest_unconfigure(config):
+    recorder = getattr(config, '_cassette_recorder', None)
+    if recorder is not None:
+        recorder.stop()
 
 
 def pytest_collection_finish(session):
@@ -165,6 +215,90 @@ def pytest_collection_modifyitems(config, items):
             index += 1
 
 
+def _duration_history(config):
+    path = config.getoption('--durations_history') or join(str(config.rootdir), HISTORY_FILE_NAME)
+    return DurationHistory(path, get_profile(config))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    """
+    With `-n auto`, use as many workers as the historical critical path allows (see library.test_durations)
+    """
+    return _duration_history(config).suggested_workers(config.getoption('--max_workers'))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption('dist') == 'load':
+        from library.duration_scheduling import DurationScheduling
+        return DurationScheduling(config, _duration_history(config), log)
+
+
+def pytest_runtest_logreport(report):
+    if not report.skipped:
+        _measured_durations[report.nodeid] = _measured_durations.get(report.nodeid, 0) + report.duration
+
+
+def pytest_sessionfinish(session):
+    # Hand this worker's wait stats over to the xdist controller, see pytest_testnodedown below
+    if wait_instrumentation.ENABLED and hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['wait_stats'] = wait_instrumentation.get_stats()
+        session.config.workeroutput['polling_stats'] = polling.get_stats()
+    # Only the xdist controller (or a run without xdist) records the history, the workers' reports reach it anyway
+    if hasattr(session.config, 'workerinput') or not _measured_durations:
+        return
+    _duration_history(session.config).update(_measured_durations)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    worker_stats = getattr(node, 'workeroutput', {}).get('wait_stats')
+    if worker_stats:
+        node.config._wait_worker_stats = getattr(node.config, '_wait_worker_stats', [])
+        node.config._wait_worker_stats.append(worker_stats)
+    worker_polling_stats = getattr(node, 'workeroutput', {}).get('polling_stats')
+    if worker_polling_stats:
+        node.config._polling_worker_stats = getattr(node.config, '_polling_worker_stats', [])
+        node.config._polling_worker_stats.append(worker_polling_stats)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if wait_instrumentation.ENABLED:
+        wait_stats = wait_instrumentation.merge(
+            getattr(config, '_wait_worker_stats', None) or [wait_instrumentation.get_stats()])
+        terminalreporter.section('waits')
+        for line in wait_instrumentation.format_report(wait_stats):
+            terminalreporter.write_line(line)
+        polling_stats = polling.merge(getattr(config, '_polling_worker_stats', None) or [polling.get_stats()])
+        for line in polling.format_report(polling_stats):
+            terminalreporter.write_line(line)
+        if config.getoption('--wait_report'):
+            wait_instrumentation.write_report(wait_stats, config.getoption('--wait_report'))
+            terminalreporter.write_line('Wait report written to {}'.format(config.getoption('--wait_report')))
+
+    dsession = config.pluginmanager.getplugin('dsession')
+    scheduler = getattr(dsession, 'sched', None)
+    if getattr(scheduler, 'predicted_makespan', None) is not None:
+        terminalreporter.write_line('Duration-based scheduling: {} workers, predicted longest worker {:.0f} s'.format(
+            len(scheduler.plans), scheduler.predicted_makespan))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """
+    Hold the server configuration lock (see library.resource_lock) from setup to teardown of every test, exclusively
+    for the tests that change server properties and those marked exclusive, since they can't run next to the tests of
+    the parallel phase (e.g. they count or change the LiveReports or folders of a shared project). The other serial
+    tests hold it shared, their phase already runs them one at a time. The lock is only active when the test runner
+    runs its phases concurrently.
+    """
+    wait_instrumentation.set_current_test(item.nodeid)
+    exclusive = item.get_closest_marker('exclusive') is not None or 'customized_server_config' in item.fixturenames
+    with server_config_lock(exclusive=exclusive):
+        yield
+
+
 @pytest.fixture
 def chrome_options(chrome_options, is_headless):
     if is_headless:
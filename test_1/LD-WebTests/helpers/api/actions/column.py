@@ -1,9 +1,15 @@
 from ldclient.client import LDClient
 from ldclient.models import LiveReport, FreeformColumn, ModelReturn, Model, ModelRecursive, ModelCommand, \
     ModelTemplateVar
-from library.api.wait import wait_until_condition_met
+from library.api.utils import submit_in_chunks
+from library.api.wait import DEFAULT_TIMEOUT
+from library.polling import poll_until
 from library.api.exceptions import LiveDesignAPIException
 
+# Column ids per add_columns/remove_columns request, and requests in flight, of the bulk variants
+DEFAULT_COLUMN_CHUNK_SIZE = 50
+DEFAULT_MAX_CONCURRENT_CHUNKS = 4
+
 
 def create_freeform_column(ld_client: LDClient, live_report: LiveReport, name='An FFC'):
     """
@@ -29,7 +35,7 @@ def create_freeform_column(ld_client: LDClient, live_report: LiveReport, name='A
         actual_column_ids = set(live_report_data["columns"].keys())
         assert str(freeform_column.id) in actual_column_ids
 
-    wait_until_condition_met(freeform_column_added)
+    poll_until(freeform_column_added, timeout=DEFAULT_TIMEOUT)
     return freeform_column
 
 
@@ -142,16 +148,7 @@ def add_columns_to_live_report(ld_client: LDClient, live_report_id, column_ids):
     :return: list of columns in the live report
     """
     response = ld_client.add_columns(live_report_id, column_ids)
-
-    def columns_added_to_live_report():
-        live_report_data = ld_client.live_report_results_metadata(live_report_id)
-        # added asserting for live_report_data, as live_report_results_metadata is returning empty string when LR is
-        # not properly loaded, This check is to wait until LR loads properly.
-        assert live_report_data
-        actual_column_ids = set(live_report_data["columns"].keys())
-        assert all(str(column_id) in actual_column_ids for column_id in column_ids)
-
-    wait_until_condition_met(columns_added_to_live_report)
+    wait_until_columns_added(ld_client, live_report_id, column_ids)
     return response
 
 
@@ -165,14 +162,101 @@ def remove_columns_from_live_report(ld_client: LDClient, live_report_id, column_
     :return: list of columns in the live report
     """
     response = ld_client.remove_columns(live_report_id, column_ids)
+    wait_until_columns_removed(ld_client, live_report_id, column_ids)
+    return response
+
+
+def add_columns_to_live_report_in_chunks(ld_client: LDClient,
+                                         live_report_id,
+                                         column_ids,
+                                         chunk_size=DEFAULT_COLUMN_CHUNK_SIZE,
+                                         max_concurrent_chunks=DEFAULT_MAX_CONCURRENT_CHUNKS,
+                                         client_factory=None):
+    """
+    Bulk variant of add_columns_to_live_report: the column ids are added in chunks (several chunks at a time, given a
+    client_factory), and the live report is polled once all chunks have been sent.
+
+    Meant for setting up large live reports (e.g. in fixtures). The load test actions keep the single-request helpers,
+    since they time what the UI sends.
+
+    :param ld_client: live design client where the columns should be added
+    :param live_report_id: live report where the columns should be added
+    :param column_ids: list of column ids whose columns should be added
+    :param chunk_size: int, number of column ids per request
+    :param max_concurrent_chunks: int, number of requests sent at the same time with a client_factory
+    :param client_factory: function () -> logged-in LDClient of the same user as ld_client, e.g. a partial of
+                           library.api.ldclient.get_api_client. Without one, the chunks are sent one at a time.
+    :return: list of the responses of the chunks, in order
+    """
+    responses = submit_in_chunks(ld_client, lambda client, chunk: client.add_columns(live_report_id, chunk), column_ids,
+                                 chunk_size, max_concurrent_chunks, client_factory)
+    wait_until_columns_added(ld_client, live_report_id, column_ids)
+    return responses
+
+
+def remove_columns_from_live_report_in_chunks(ld_client: LDClient,
+                                              live_report_id,
+                                              column_ids,
+                                              chunk_size=DEFAULT_COLUMN_CHUNK_SIZE,
+                                              max_concurrent_chunks=DEFAULT_MAX_CONCURRENT_CHUNKS,
+                                              client_factory=None):
+    """
+    Bulk variant of remove_columns_from_live_report, see add_columns_to_live_report_in_chunks.
+
+    :param ld_client: live design client where the columns should be removed
+    :param live_report_id: live report where the columns should be removed
+    :param column_ids: list of column ids whose columns should be removed
+    :param chunk_size: int, number of column ids per request
+    :param max_concurrent_chunks: int, number of requests sent at the same time with a client_factory
+    :param client_factory: function () -> logged-in LDClient of the same user as ld_client, e.g. a partial of
+                           library.api.ldclient.get_api_client. Without one, the chunks are sent one at a time.
+    :return: list of the responses of the chunks, in order
+    """
+    responses = submit_in_chunks(ld_client, lambda client, chunk: client.remove_columns(live_report_id, chunk),
+                                 column_ids, chunk_size, max_concurrent_chunks, client_factory)
+    wait_until_columns_removed(ld_client, live_report_id, column_ids)
+    return responses
+
+
+def wait_until_columns_added(ld_client: LDClient, live_report_id, column_ids, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits until the live report has all the columns. Only the columns still missing are checked on every poll.
+
+    :param ld_client: live design client being affected
+    :param live_report_id: live report id whose columns are checked
+    :param column_ids: list of column ids that should be in the live report
+    :param timeout: float, seconds to wait
+    """
+    missing_ids = {str(column_id) for column_id in column_ids}
+
+    def columns_added_to_live_report():
+        live_report_data = ld_client.live_report_results_metadata(live_report_id)
+        # added asserting for live_report_data, as live_report_results_metadata is returning empty string when LR is
+        # not properly loaded, This check is to wait until LR loads properly.
+        assert live_report_data
+        missing_ids.difference_update(live_report_data["columns"].keys())
+        assert not missing_ids, "Columns not added yet: {}".format(sorted(missing_ids))
+
+    poll_until(columns_added_to_live_report, timeout=timeout)
+
+
+def wait_until_columns_removed(ld_client: LDClient, live_report_id, column_ids, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits until none of the columns are in the live report. Only the columns still present are checked on every poll.
+
+    :param ld_client: live design client being affected
+    :param live_report_id: live report id whose columns are checked
+    :param column_ids: list of column ids that shouldn't be in the live report
+    :param timeout: float, seconds to wait
+    """
+    remaining_ids = {str(column_id) for column_id in column_ids}
 
     def columns_removed_from_live_report():
         live_report_data = ld_client.live_report_results_metadata(live_report_id)
-        actual_column_ids = set(live_report_data["columns"].keys())
-        assert all(str(column_id) not in actual_column_ids for column_id in column_ids)
+        remaining_ids.intersection_update(live_report_data["columns"].keys())
+        assert not remaining_ids, "Columns not removed yet: {}".format(sorted(remaining_ids))
 
-    wait_until_condition_met(columns_removed_from_live_report)
-    return response
+    poll_until(columns_removed_from_live_report, timeout=timeout)
 
 
 def add_freeform_values(ld_client: LDClient, observations):
@@ -1,6 +1,12 @@
 from ldclient.client import LDClient
 from ldclient.models import Observation
-from library.api.wait import wait_until_condition_met
+from library.api.utils import submit_in_chunks
+from library.api.wait import DEFAULT_TIMEOUT
+from library.polling import poll_until
+
+# Corporate ids per add_rows/remove_rows request, and requests in flight, of the bulk variants
+DEFAULT_ROW_CHUNK_SIZE = 500
+DEFAULT_MAX_CONCURRENT_CHUNKS = 4
 
 
 def add_rows_to_live_report(ld_client: LDClient, live_report_id, corporate_ids):
@@ -13,14 +19,7 @@ def add_rows_to_live_report(ld_client: LDClient, live_report_id, corporate_ids):
     :return: list of compounds (additional rows) in the live report
     """
     response = ld_client.add_rows(live_report_id, corporate_ids)
-
-    def rows_added_to_live_report():
-        live_report_data = ld_client.live_report_results_metadata(live_report_id)
-        row_keys = [row_info["entity_id"] for row_info in live_report_data["row_infos"]]
-        row_keys.extend([row_info.get("virtual_entity_id", None) for row_info in live_report_data["row_infos"]])
-        assert all(corporate_id in row_keys for corporate_id in corporate_ids)
-
-    wait_until_condition_met(rows_added_to_live_report)
+    wait_until_rows_added(ld_client, live_report_id, corporate_ids)
     return response
 
 
@@ -34,14 +33,102 @@ def remove_rows_from_live_report(ld_client: LDClient, live_report_id, corporate_
     :return: list of compounds (additional rows) in the live report
     """
     response = ld_client.remove_rows(live_report_id, corporate_ids)
+    wait_until_rows_removed(ld_client, live_report_id, corporate_ids)
+    return response
+
+
+def add_rows_to_live_report_in_chunks(ld_client: LDClient,
+                                      live_report_id,
+                                      corporate_ids,
+                                      chunk_size=DEFAULT_ROW_CHUNK_SIZE,
+                                      max_concurrent_chunks=DEFAULT_MAX_CONCURRENT_CHUNKS,
+                                      client_factory=None):
+    """
+    Bulk variant of add_rows_to_live_report for thousands of rows: the corporate ids are added in chunks (several chunks
+    at a time, given a client_factory), and the live report is polled once all chunks have been sent.
+
+    Meant for setting up large live reports (e.g. in fixtures). The load test actions keep the single-request helpers,
+    since they time what the UI sends.
+
+    :param ld_client: live design client where the rows should be added
+    :param live_report_id: live report where the rows should be added
+    :param corporate_ids: list of corporate ids whose rows should be added
+    :param chunk_size: int, number of corporate ids per request
+    :param max_concurrent_chunks: int, number of requests sent at the same time with a client_factory
+    :param client_factory: function () -> logged-in LDClient of the same user as ld_client, e.g. a partial of
+                           library.api.ldclient.get_api_client. Without one, the chunks are sent one at a time.
+    :return: list of the responses of the chunks, in order
+    """
+    responses = submit_in_chunks(ld_client, lambda client, chunk: client.add_rows(live_report_id, chunk), corporate_ids,
+                                 chunk_size, max_concurrent_chunks, client_factory)
+    wait_until_rows_added(ld_client, live_report_id, corporate_ids)
+    return responses
+
+
+def remove_rows_from_live_report_in_chunks(ld_client: LDClient,
+                                           live_report_id,
+                                           corporate_ids,
+                                           chunk_size=DEFAULT_ROW_CHUNK_SIZE,
+                                           max_concurrent_chunks=DEFAULT_MAX_CONCURRENT_CHUNKS,
+                                           client_factory=None):
+    """
+    Bulk variant of remove_rows_from_live_report, see add_rows_to_live_report_in_chunks.
+
+    :param ld_client: live design client where the rows should be removed
+    :param live_report_id: live report where the rows should be removed
+    :param corporate_ids: list of corporate ids whose rows should be removed
+    :param chunk_size: int, number of corporate ids per request
+    :param max_concurrent_chunks: int, number of requests sent at the same time with a client_factory
+    :param client_factory: function () -> logged-in LDClient of the same user as ld_client, e.g. a partial of
+                           library.api.ldclient.get_api_client. Without one, the chunks are sent one at a time.
+    :return: list of the responses of the chunks, in order
+    """
+    responses = submit_in_chunks(ld_client, lambda client, chunk: client.remove_rows(live_report_id, chunk),
+                                 corporate_ids, chunk_size, max_concurrent_chunks, client_factory)
+    wait_until_rows_removed(ld_client, live_report_id, corporate_ids)
+    return responses
+
+
+def wait_until_rows_added(ld_client: LDClient, live_report_id, corporate_ids, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits until the live report has rows for all the corporate ids (as entity id or virtual entity id). Only the ids
+    still missing are checked on every poll.
+
+    :param ld_client: live design client being affected
+    :param live_report_id: live report id whose rows are checked
+    :param corporate_ids: list of corporate ids that should have rows
+    :param timeout: float, seconds to wait
+    """
+    missing_ids = set(corporate_ids)
+
+    def rows_added_to_live_report():
+        row_infos = ld_client.live_report_results_metadata(live_report_id)["row_infos"]
+        missing_ids.difference_update(row_info["entity_id"] for row_info in row_infos)
+        missing_ids.difference_update(row_info.get("virtual_entity_id", None) for row_info in row_infos)
+        assert not missing_ids, "{} rows not added yet, e.g. {}".format(len(missing_ids), sorted(missing_ids)[:5])
+
+    poll_until(rows_added_to_live_report, timeout=timeout)
+
+
+def wait_until_rows_removed(ld_client: LDClient, live_report_id, corporate_ids, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits until the live report has no rows left for the corporate ids. Only the ids still present are checked on
+    every poll.
+
+    :param ld_client: live design client being affected
+    :param live_report_id: live report id whose rows are checked
+    :param corporate_ids: list of corporate ids that shouldn't have rows
+    :param timeout: float, seconds to wait
+    """
+    remaining_ids = set(corporate_ids)
 
     def rows_removed_from_live_report():
-        live_report_data = ld_client.live_report_results_metadata(live_report_id)
-        row_keys = [row_info["entity_id"] for row_info in live_report_data["row_infos"]]
-        assert all(corporate_id not in row_keys for corporate_id in corporate_ids)
+        row_infos = ld_client.live_report_results_metadata(live_report_id)["row_infos"]
+        remaining_ids.intersection_update(row_info["entity_id"] for row_info in row_infos)
+        assert not remaining_ids, "{} rows not removed yet, e.g. {}".format(len(remaining_ids),
+                                                                            sorted(remaining_ids)[:5])
 
-    wait_until_condition_met(rows_removed_from_live_report)
-    return response
+    poll_until(rows_removed_from_live_report, timeout=timeout)
 
 
 def get_live_report_rows(ld_client: LDClient, live_report_id):
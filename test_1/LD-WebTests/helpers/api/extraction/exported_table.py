@@ -0,0 +1,146 @@
+"""
+Exported LiveReports (CSV, SDF or XLS bytes) parsed once into columns, for the checks in
+helpers.api.verification.file_contents.
+
+Example usage:
+
+    table = ExportedTable.from_csv(export_live_report(ld_client, live_report_id))
+    table.column_names  # ['ID', 'Compound Structure', ...]
+    table.column('ID')  # ['V055682', 'V055683', ...]
+    table.record('V055683')  # {'ID': 'V055683', 'Compound Structure': ..., ...}
+"""
+import csv
+import io
+import re
+
+# Header line of an SDF data item, e.g. ">  <ID>  "
+_SDF_DATA_HEADER = re.compile(r'^>.*?<(.*?)>')
+_SDF_RECORD_END = '$$$$'
+
+
+class ExportedTable:
+    """
+    Columns of an exported LiveReport, one value per record (row or SDF molecule).
+
+    Missing cells are None: CSV rows that are shorter than the header, and SDF data items that are omitted for empty
+    cells.
+    """
+
+    def __init__(self, column_names, columns, record_count):
+        """
+        :param column_names: list, column names in the order of the export
+        :param columns: dict, column name -> list of values, one per record
+        :param record_count: int, number of records
+        """
+        self.column_names = column_names
+        self._columns = columns
+        self._record_count = record_count
+        self._index = {}
+
+    @classmethod
+    def from_csv(cls, csv_bytes):
+        # Same decoding as csv.DictReader(csv_bytes.decode("utf-8").splitlines()), which the helpers used before
+        reader = csv.reader(csv_bytes.decode('utf-8').splitlines())
+        column_names = next(reader, [])
+        # For duplicate column names, the last column wins, like in csv.DictReader
+        positions = {name: position for position, name in enumerate(column_names)}
+        columns = {name: [] for name in positions}
+        appenders = [(columns[name].append, position) for name, position in positions.items()]
+        record_count = 0
+        for row in reader:
+            if not row:
+                continue
+            record_count += 1
+            row_length = len(row)
+            for append, position in appenders:
+                append(row[position] if position < row_length else None)
+        return cls(list(positions), columns, record_count)
+
+    @classmethod
+    def from_sdf(cls, sdf_bytes):
+        column_names = []
+        columns = {}
+        record_count = 0
+        record = {}
+        data_name = None
+        data_lines = []
+
+        def end_data_item():
+            if data_name is not None:
+                record[data_name] = '\n'.join(data_lines).rstrip()
+
+        for line in sdf_bytes.decode('utf-8').splitlines():
+            if line.startswith(_SDF_RECORD_END):
+                end_data_item()
+                for name, value in record.items():
+                    if name not in columns:
+                        column_names.append(name)
+                        columns[name] = [None] * record_count
+                    columns[name].append(value)
+                record_count += 1
+                for name in columns:
+                    if len(columns[name]) < record_count:
+                        columns[name].append(None)
+                record, data_name, data_lines = {}, None, []
+                continue
+            header = _SDF_DATA_HEADER.match(line)
+            if header:
+                end_data_item()
+                data_name, data_lines = header.group(1), []
+            elif data_name is not None:
+                data_lines.append(line)
+        return cls(column_names, columns, record_count)
+
+    @classmethod
+    def from_xls(cls, xls_bytes):
+        # Only needed for XLS exports
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(io.BytesIO(xls_bytes), read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            column_names = [str(name) if name is not None else '' for name in next(rows, ())]
+            columns = {name: [] for name in column_names}
+            record_count = 0
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                record_count += 1
+                for position, name in enumerate(column_names):
+                    columns[name].append(row[position] if position < len(row) else None)
+        finally:
+            workbook.close()
+        return cls(column_names, columns, record_count)
+
+    def __len__(self):
+        return self._record_count
+
+    def __contains__(self, column_name):
+        return column_name in self._columns
+
+    def column(self, column_name):
+        """
+        :return: list, the values of the column, one per record
+        :raises KeyError: if the column wasn't exported
+        """
+        return self._columns[column_name]
+
+    def present_values(self, column_name):
+        """
+        :return: list, the values of the column without the missing cells
+        """
+        return [value for value in self._columns[column_name] if value is not None]
+
+    def record(self, key, key_column='ID'):
+        """
+        :return: dict, column name -> value of the first record with the given key, or None
+        """
+        if key_column not in self._index:
+            index = {}
+            for position, value in enumerate(self._columns.get(key_column, ())):
+                index.setdefault(value, position)
+            self._index[key_column] = index
+        position = self._index[key_column].get(key)
+        if position is None:
+            return None
+        return {name: self._columns[name][position] for name in self.column_names}
@@ -1,32 +1,66 @@
-import time
+from library.polling import poll_until
+
+# Seconds to wait for the lazy computations (e.g. of freshly added values) that are still incomplete in the results
+LAZY_EVENTS_TIMEOUT = 30
+
+
+def get_cells(ldclient, livereport_id, column_ids, row_ids):
+    """
+    Function to retrieve the cells of specific rows and specific columns of an LR, without fetching the whole LR
+
+    :param ldclient: ExtendedLDClient, ldclient object
+    :param livereport_id: str, Livereport ID
+    :param column_ids: List(str), list of addable column ids
+    :param row_ids: List(str), list of row ids
+    :return: dict, dictionary with row_id:{column_id: cell} pairs, for the rows of the LR
+    """
+    view_details = [{
+        'type': 'row_key',
+        'row_return_type': 'ALL',
+        'projections': [str(column_id) for column_id in column_ids],
+        'row_keys': list(row_ids),
+    }]
+    return ldclient.live_report_results(live_report_id=livereport_id, view_details=view_details)
 
 
 def get_cell_values_for_rows_and_columns(ldclient, livereport_id, column_ids, row_ids):
     """
-    Function to retrieve cell values for specific rows and specific columns from an LR
+    Function to retrieve cell values for specific rows and specific columns from an LR. Only the requested cells are
+    fetched, again until none of them is still being computed.
 
-    :param ldclient: LDClient, ldclient object
+    :param ldclient: ExtendedLDClient, ldclient object
     :param livereport_id: str, Livereport ID
     :param column_ids: List(str), list of addable column ids
     :param row_ids: List(str), list of row ids
     :return: dict, dictionary with row_id:list of column_values pairs
     """
-    actual_cell_values = {}
-
-    # extra execute to process lazy events
-    ldclient.execute_live_report(live_report_id=livereport_id)
-    time.sleep(3)
-    livereport_data = ldclient.execute_live_report(live_report_id=livereport_id)['rows']
-    for row_id in row_ids:
-        row_data = livereport_data[row_id]
-        cell_values = []
-        for column_id in column_ids:
-            cell_data = row_data['cells'][column_id]['values']
-            if len(cell_data) > 1:
-                cell_values.append([item['value'] for item in cell_data])
-            elif len(cell_data) == 1:
-                cell_values.append(cell_data[0]['value'])
-            else:
-                cell_values.append('')
-        actual_cell_values[row_id] = cell_values
-    return actual_cell_values
+    row_ids = list(row_ids)
+
+    def cells_computed():
+        rows = get_cells(ldclient, livereport_id, column_ids, row_ids)
+        missing_row_ids = [row_id for row_id in row_ids if row_id not in rows]
+        assert not missing_row_ids, 'Rows {} are not in LR {}'.format(missing_row_ids, livereport_id)
+        incomplete_cells = [(row_id, column_id)
+                            for row_id in row_ids
+                            for column_id in column_ids
+                            if _is_incomplete(rows[row_id].get(str(column_id), {}))]
+        assert not incomplete_cells, 'Cells (row, column) {} are still being computed'.format(incomplete_cells)
+        return rows
+
+    rows = poll_until(cells_computed, timeout=LAZY_EVENTS_TIMEOUT)
+    return {
+        row_id: [_cell_value(rows[row_id].get(str(column_id), {})) for column_id in column_ids] for row_id in row_ids
+    }
+
+
+def _is_incomplete(cell):
+    return any(status.get('code') == 'incomplete' for status in cell.get('statuses', ()))
+
+
+def _cell_value(cell):
+    values = [item['value'] if isinstance(item, dict) else item for item in cell.get('values', ())]
+    if len(values) > 1:
+        return values
+    elif len(values) == 1:
+        return values[0]
+    return ''
@@ -1,6 +1,4 @@
-import csv
-import re
-
+from helpers.api.extraction.exported_table import ExportedTable
 from library.api.exceptions import LiveDesignAPIException
 
 COMPOUND_STRUCTURE_COLUMN_NAME = 'Compound Structure'
@@ -15,14 +13,13 @@ def verify_csv_column_names_and_compound_ids(csv_bytes,
     1. If expected corporate ids are provided, the CSV contains these ids
     2. CSV contains expected column names
     3. CSV does not contain unexpected column names
-    :param csv_bytes: bytes, the exported Live Report.
+    :param csv_bytes: bytes or ExportedTable, the exported Live Report.
     :param expected_column_names: list, expected column names in the exported csv
     :param unexpected_column_names:list, column names not expected in the exported csv
     :param expected_corporate_ids: list: expected corporate IDs in the exported csv.
     """
-    csv_file = csv.DictReader(csv_bytes.decode("utf-8").splitlines())
-    exported_corporate_ids = set()
-    exported_column_names = set(csv_file.fieldnames)
+    table = _as_table(csv_bytes, ExportedTable.from_csv)
+    exported_column_names = set(table.column_names)
 
     # Verify expected column names in the csv
     assert (set(expected_column_names).issubset(exported_column_names)), \
@@ -37,16 +34,14 @@ def verify_csv_column_names_and_compound_ids(csv_bytes,
 
     # Verify expected corporate IDs in the csv
     if expected_corporate_ids:
-        for row in csv_file:
-            exported_corporate_ids.add(row["ID"])
-        assert set(expected_corporate_ids) == exported_corporate_ids
+        assert set(expected_corporate_ids) == set(table.column("ID"))
 
 
 def verify_csv_contents(csv_bytes, expected_csv_data, inexact_match_columns=[COMPOUND_STRUCTURE_COLUMN_NAME]):
     """
     Verifies csv contents which includes column and compound data
 
-    :param csv_bytes: bytes, the exported Live Report
+    :param csv_bytes: bytes or ExportedTable, the exported Live Report
     :param expected_csv_data: dict, expected data for different columns in dict form
                             ex: {'Column1':['val1', 'val2'],
                                 'Column2':['val1', 'val2']}
@@ -58,8 +53,8 @@ def verify_csv_contents(csv_bytes, expected_csv_data, inexact_match_columns=[COM
          to the underlying libraries, and just verify that LD is passing
          *something* along
     """
-    csv_file = csv.DictReader(csv_bytes.decode("utf-8").splitlines())
-    exported_column_names = csv_file.fieldnames
+    table = _as_table(csv_bytes, ExportedTable.from_csv)
+    exported_column_names = table.column_names
     expected_columns = list(expected_csv_data.keys())
     assert expected_columns == exported_column_names, \
         "Exported column names:{}, Expected column names:{}".format(exported_column_names, expected_columns)
@@ -68,14 +63,14 @@ def verify_csv_contents(csv_bytes, expected_csv_data, inexact_match_columns=[COM
     for column_name in expected_csv_data:
         expected_content = expected_csv_data[column_name]
         exact_match = column_name not in inexact_match_columns
-        verify_csv_column_contents(csv_bytes, column_name, expected_content, exact_match=exact_match)
+        verify_csv_column_contents(table, column_name, expected_content, exact_match=exact_match)
 
 
 def verify_csv_column_contents(csv_bytes, column_name, expected_column_values, exact_match=True):
     """
     verify column values in exported livereport.
 
-    :param csv_bytes: bytes, the exported livereport
+    :param csv_bytes: bytes or ExportedTable, the exported livereport
     :param column_name: str, column name which you want to verify the values for
     :param expected_column_values: list, list of expected column values
     :param exact_match: True if cell contents should match exactly.
@@ -85,15 +80,12 @@ def verify_csv_column_contents(csv_bytes, column_name, expected_column_values, e
          to the underlying libraries, and just verify that LD is passing
          *something* along
     """
-    csv_file_contents = csv.DictReader(csv_bytes.decode("utf-8").splitlines())
-    actual_column_values = []
+    table = _as_table(csv_bytes, ExportedTable.from_csv)
 
-    if column_name in csv_file_contents.fieldnames:
-        for row in csv_file_contents:
-            actual_column_values.append(row[column_name])
-    else:
+    if column_name not in table:
         # If the specified column not there in exported livereport
         raise LiveDesignAPIException("There is no column: {} exists in Exported Livereport".format(column_name))
+    actual_column_values = table.column(column_name)
     if exact_match:
         assert expected_column_values == actual_column_values, \
             "Expected column values:{}, Actual column values:{} for column: {}".format(expected_column_values,
@@ -108,24 +100,30 @@ def verify_sdf_contents(columns, expected_data, sdf_data):
 
     :param columns: list, list of column values to verify
     :param expected_data: dict, expected Livereport data
-    :param sdf_data: bytes, sdf data
+    :param sdf_data: bytes or ExportedTable, sdf data
     """
-    # converting bytes to string
-    sdf_data = sdf_data.decode("utf-8")
+    table = _as_table(sdf_data, ExportedTable.from_sdf)
 
     # each row may have different number of columns, as empty cells are omitted after SS-40762
-    exported_columns = set(re.findall("<(.*?)>", sdf_data))
+    exported_columns = set(table.column_names)
     # validating whether expected columns match with actual columns
     assert exported_columns == set(columns), f'expected {columns}, got {exported_columns}'
 
     # verifying each column contents
     for column in columns:
         expected_column_value = expected_data.get(column)
-        # Regular expression for getting values of specified column
-        regexp = r"(?<=<{}>  \n)(.*?)(?=>|\$\$\$\$)".format(re.escape(column))
-        actual_column_value = [value.rstrip() for value in re.findall(regexp, sdf_data, re.S)]
+        actual_column_value = table.present_values(column)
 
         # verifying column values
         assert actual_column_value == expected_column_value, "{} column value didn't match, Expected value: {}, " \
                                                              "But got:{}".format(column, expected_column_value,
                                                                                  actual_column_value)
+
+
+def _as_table(exported_data, parse):
+    """
+    :param exported_data: bytes or ExportedTable, the exported Live Report
+    :param parse: ExportedTable factory for the format of the bytes
+    :return: ExportedTable
+    """
+    return exported_data if isinstance(exported_data, ExportedTable) else parse(exported_data)
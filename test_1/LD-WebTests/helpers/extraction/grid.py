@@ -3,6 +3,7 @@ Extract data as strings from the grid.
 """
 import re
 
+from selenium.common.exceptions import JavascriptException
 from selenium.webdriver.common.by import By
 
 from helpers.change.grid_column_menu import toggle_show_smiles
@@ -17,8 +18,78 @@ from library import dom, style, wait
 from library.scroll import wheel_to_top, wheel_element, element_is_scrolled_to_bottom
 from library.utils import get_first_int, element_is_vertically_within_parent
 
+COMPOUND_STRUCTURE_COLUMN_NAME = 'Compound Structure'
+
+# Reads every fully visible row of the grid viewport in one round trip. Returns the row index (as displayed in the
+# selection cell) mapped to the text (or the list of subcell texts) of each requested column, plus what the python side
+# needs to decide how far to wheel next. Columns that are not rendered in a row are reported as null.
+_EXTRACT_VISIBLE_ROWS_SCRIPT = """
+var container = arguments[0];
+var columnIds = arguments[1];
+var subcellSelector = arguments[2];
+var rowSelector = arguments[3];
+var selectionCellSelector = arguments[4];
+var cellSelectorTemplate = arguments[5];
+
+function isVisible(element) {
+    return !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length);
+}
+function textOf(element) {
+    return (element.innerText || '').trim();
+}
+
+var bounds = container.getBoundingClientRect();
+var result = {rows: {}, rowTops: [], rowHeight: 0};
+var rows = container.querySelectorAll(rowSelector);
+for (var i = 0; i < rows.length; i++) {
+    var row = rows[i];
+    var rowBounds = row.getBoundingClientRect();
+    if (!isVisible(row) || rowBounds.top < bounds.top || rowBounds.bottom > bounds.bottom) {
+        continue;
+    }
+    var selectionCell = row.querySelector(selectionCellSelector);
+    var rowIndex = selectionCell ? textOf(selectionCell) : '';
+    if (!rowIndex) {
+        continue;
+    }
+    result.rowTops.push(rowBounds.top);
+    result.rowHeight = rowBounds.height;
+
+    var cells = {};
+    for (var j = 0; j < columnIds.length; j++) {
+        var cell = row.querySelector(cellSelectorTemplate.replace('{}', columnIds[j]));
+        if (!cell) {
+            cells[columnIds[j]] = null;
+        } else if (subcellSelector) {
+            cells[columnIds[j]] = Array.prototype.filter.call(cell.querySelectorAll(subcellSelector), isVisible)
+                .map(textOf);
+        } else {
+            cells[columnIds[j]] = textOf(cell);
+        }
+    }
+    result.rows[rowIndex] = cells;
+}
+result.scrolledToBottom = container.scrollHeight - container.scrollTop <= container.clientHeight;
+return result;
+"""
+
+# Resolves the database column ids of the given column names, for those headers that are currently rendered
+_RENDERED_COLUMN_IDS_SCRIPT = """
+var headerSelectorTemplate = arguments[0];
+var columnNames = arguments[1];
+var columnIds = {};
+for (var i = 0; i < columnNames.length; i++) {
+    var selector = headerSelectorTemplate.replace('{}', columnNames[i].replace(/(["\\\\])/g, '\\\\$1'));
+    var header = document.querySelector(selector);
+    if (header && header.id) {
+        columnIds[columnNames[i]] = header.id.substring(1);
+    }
+}
+return columnIds;
+"""
 
-def find_column_subcell_contents(driver, column_name, get_info_from_subcell=None):
+
+def find_column_subcell_contents(driver, column_name, get_info_from_subcell=None, use_script=True):
     """
     Get the contents of a given, named column, as a list of lists of strings.
     Each subcell is separated
@@ -30,8 +101,12 @@ def find_column_subcell_contents(driver, column_name, get_info_from_subcell=None
     :param column_name: str, Column name for which the contents needs to be extracted.
     :param get_info_from_subcell: optional function that is used to extract data from a cell. If not supplied, we will
                                   get the text representation. NOTE: This is ignored for Compound Structure Column.
+    :param use_script: bool, read each viewport with a single script call (see find_columns_contents). Ignored when
+                       get_info_from_subcell is supplied, since that needs the subcell elements.
     :return: list, List of strings.
     """
+    if use_script and not get_info_from_subcell:
+        return find_columns_contents(driver, [column_name], subcells=True)[column_name]
 
     if not get_info_from_subcell:
 
@@ -47,7 +122,7 @@ def find_column_subcell_contents(driver, column_name, get_info_from_subcell=None
     return find_column_contents(driver, column_name, get_all_subcell_info_in_cell)
 
 
-def find_column_contents(driver, column_name, get_info_from_cell=None):
+def find_column_contents(driver, column_name, get_info_from_cell=None, use_script=True):
     """
     Get the contents of a given, named column, as a list of strings.
 
@@ -59,9 +134,15 @@ def find_column_contents(driver, column_name, get_info_from_cell=None):
     :param column_name: str, Column name for which the contents needs to be extracted.
     :param get_info_from_cell: optional function that is used to extract data from a cell. If not supplied, we will get
                                the text representation. NOTE: This is ignored for Compound Structure Column.
+    :param use_script: bool, read each viewport with a single script call (see find_columns_contents). Ignored when
+                       get_info_from_cell is supplied for a column other than Compound Structure, since that needs the
+                       cell elements.
     :return: list, List of strings.
     """
-    if column_name == 'Compound Structure':
+    if use_script and (not get_info_from_cell or column_name == COMPOUND_STRUCTURE_COLUMN_NAME):
+        return find_columns_contents(driver, [column_name])[column_name]
+
+    if column_name == COMPOUND_STRUCTURE_COLUMN_NAME:
         column_contents = _find_smiles_contents(driver)
     else:
         column_contents = _find_cell_contents(driver, column_name, get_info_from_cell)
@@ -69,6 +150,45 @@ def find_column_contents(driver, column_name, get_info_from_cell=None):
     return column_contents
 
 
+def find_columns_contents(driver, column_names, subcells=False):
+    """
+    Get the text contents of several named columns at once, as a dict of column name to list of strings.
+
+    Each viewport of the grid is read with a single script call that returns the cells of every requested column that
+    is rendered, instead of one WebDriver call per row, cell and text. Columns that are rendered side by side are
+    therefore extracted in the same vertical sweep. If the script fails, we fall back on walking the grid elements one
+    column at a time; timeouts of the waits for the columns and cells are raised as usual.
+
+    NOTE: Calling this function will cause the grid to be scrolled both horizontally and vertically.
+
+    :param driver: selenium webdriver
+    :param column_names: list of str, names of the columns to extract
+    :param subcells: bool, extract a list of subcell texts for each cell instead of the cell text. Default is False.
+    :return: dict, column name -> list of str (or list of lists of str when subcells is True)
+    """
+    column_names = list(column_names)
+    show_smiles = COMPOUND_STRUCTURE_COLUMN_NAME in column_names
+    if show_smiles:
+        toggle_show_smiles(driver)
+
+    try:
+        contents = _find_cells_contents_via_script(driver, column_names, subcells)
+    except JavascriptException:
+        contents = {}
+        for column_name in column_names:
+            if subcells:
+                contents[column_name] = _find_cell_contents(
+                    driver, column_name,
+                    lambda cell: [subcell.text for subcell in dom.get_elements(cell, GRID_CELL_ASSAY_SUBCELL)])
+            else:
+                contents[column_name] = _find_cell_contents(driver, column_name)
+    finally:
+        if show_smiles:
+            toggle_show_smiles(driver)
+
+    return contents
+
+
 def get_grid_metadata(driver):
     """
     Get grid metadata that is displayed in the grid footer. This includes
@@ -146,7 +266,7 @@ def _find_smiles_contents(driver):
     :rtype: List[str]
     """
 
-    column_name = 'Compound Structure'
+    column_name = COMPOUND_STRUCTURE_COLUMN_NAME
     toggle_show_smiles(driver)
 
     smiles = _find_cell_contents(driver, column_name)
@@ -219,6 +339,96 @@ def _find_cell_contents(driver, column_name, get_info_from_cell=None):
     return [found_cells[idx] for idx in sorted(found_cells.keys())]
 
 
+def _find_cells_contents_via_script(driver, column_names, subcells=False):
+    """
+    Extract the contents of the given columns, reading each grid viewport with a single script call.
+
+    Columns are processed in batches: we scroll horizontally to the first column that hasn't been extracted yet, and
+    every other requested column that is rendered at that point is extracted in the same vertical sweep.
+
+    :param driver: selenium webdriver
+    :param column_names: list of str, names of the columns to extract
+    :param subcells: bool, extract a list of subcell texts for each cell instead of the cell text
+    :return: dict, column name -> list of extracted values, ordered by row
+    """
+    contents = {}
+    remaining_column_names = list(column_names)
+    while remaining_column_names:
+        first_column_name = remaining_column_names[0]
+        # NOTE: Scrolls horizontally
+        scroll_to_column_header(driver, first_column_name)
+        rendered_column_ids = driver.execute_script(_RENDERED_COLUMN_IDS_SCRIPT, GRID_HEADER_SELECTOR_,
+                                                    remaining_column_names)
+        if first_column_name not in rendered_column_ids:
+            rendered_column_ids[first_column_name] = db_column_id(driver, first_column_name)
+        batch = {
+            column_name: rendered_column_ids[column_name]
+            for column_name in remaining_column_names
+            if column_name in rendered_column_ids
+        }
+        for column_name in batch:
+            wait_until_cells_are_loaded(driver, column_name)
+
+        found_cells = _sweep_rows(driver, list(batch.values()), subcells)
+
+        for column_name, column_id in batch.items():
+            column_cells = [found_cells[idx].get(column_id) for idx in sorted(found_cells.keys())]
+            if any(cell is None for cell in column_cells):
+                # The column scrolled out of view during the sweep, extract it again in its own batch
+                continue
+            contents[column_name] = column_cells
+            remaining_column_names.remove(column_name)
+
+        if first_column_name in remaining_column_names:
+            raise dom.LiveDesignWebException(
+                'Unable to read all cells of column "{}" from the grid'.format(first_column_name))
+
+    return contents
+
+
+def _sweep_rows(driver, column_ids, subcells=False):
+    """
+    Scroll through all rows of the grid, reading each viewport with a single script call.
+
+    :param driver: selenium webdriver
+    :param column_ids: list of str, database ids of the columns to read
+    :param subcells: bool, read a list of subcell texts for each cell instead of the cell text
+    :return: dict, 0-indexed row number -> {column id: cell contents}
+    """
+    grid_metadata = get_grid_metadata(driver)
+    expected_rows = get_first_int(grid_metadata['row_visible_count'])
+
+    found_cells = {}
+    row_container = dom.get_element(driver, GRID_ROWS_CONTAINER)
+
+    # NOTE: Scrolls vertically
+    wheel_to_top(driver, row_container)
+
+    while True:
+        viewport = driver.execute_script(_EXTRACT_VISIBLE_ROWS_SCRIPT, row_container, column_ids,
+                                         GRID_CELL_ASSAY_SUBCELL if subcells else None, GRID_ROW,
+                                         GRID_ROW_SELECTION_CELL, GRID_CELL_COLUMN_ID_)
+        for text_idx, cells in viewport['rows'].items():
+            # Subtract 1 because rows are 1-indexed, arrays are 0-indexed.
+            found_cells[int(text_idx) - 1] = cells
+
+        if expected_rows == len(found_cells) or viewport['scrolledToBottom']:
+            break
+
+        row_tops = sorted(viewport['rowTops'])
+        if not row_tops:
+            raise ValueError('No visible rows found in the grid while extracting cell contents')
+        scroll_distance = row_tops[-1] - row_tops[0] + viewport['rowHeight']
+
+        # NOTE: Scrolls vertically
+        wheel_element(driver, row_container, scroll_distance)
+
+    # NOTE: Scrolls vertically
+    wheel_to_top(driver, row_container)
+
+    return found_cells
+
+
 def db_column_id(driver, column_name):
     """
     For the given column name, returns the database id number from the dom, which is the ld_addable_column.id
@@ -340,4 +550,4 @@ def wait_until_cells_are_loaded(driver, column_title: str, custom_timeout: int =
     if custom_timeout:
         wait.until_not_visible(driver, GRID_PENDING_CELLS_IN_COLUMN.format(column_id), timeout=custom_timeout)
     else:
-        wait.until_not_visible(driver, GRID_PENDING_CELLS_IN_COLUMN.format(column_id))
\ No newline at end of file
+        wait.until_not_visible(driver, GRID_PENDING_CELLS_IN_COLUMN.format(column_id))
@@ -1,17 +1,10 @@
 """
 Verify the state of the grid.
 """
-import tempfile
-from io import BytesIO
-
-import cairosvg
-import requests
-from PIL import Image, ImageChops, ImageStat
-
 from helpers.change.grid_row_actions import open_row_menu
 from helpers.extraction import paths
 from helpers.extraction.grid import find_column_contents, get_grid_metadata, get_grid_render_count_map, \
-    calculate_scroll_distance, find_column_subcell_contents
+    calculate_scroll_distance, find_column_subcell_contents, find_columns_contents
 from helpers.selection.column_tree import LIVEREPORT_COLUMN_CHECKBOX_LABEL_FROZEN
 from helpers.selection.general import OPENED_MENU_ITEMS
 from helpers.selection.grid import (
@@ -22,7 +15,7 @@ from helpers.selection.grid import (
     GRID_FIND_YELLOW_MARK, GRID_FIND_TOTAL_MATCHES, GRID_FOOTER, GRID_ERROR_NOTIFICATION, GRID_INFO_NOTIFICATION)
 from helpers.selection.live_report_tab import TAB_ACTIVE
 from helpers.verification.element import verify_is_visible, verify_is_not_visible
-from library import wait, dom
+from library import wait, dom, image_comparison
 from library.dom import LiveDesignWebException
 from library.eventually import eventually_equal, eventually
 from library.scroll import wheel_element, wheel_to_bottom
@@ -31,7 +24,7 @@ from library.utils import element_is_vertically_within_parent, get_current_test_
 COMPOUND_STRUCTURE_COLUMN_NAME = 'Compound Structure'
 
 
-def verify_grid_contents(driver, contents, inexact_match_columns=[COMPOUND_STRUCTURE_COLUMN_NAME]):
+def verify_grid_contents(driver, contents, inexact_match_columns=[COMPOUND_STRUCTURE_COLUMN_NAME], use_script=True):
     """
     Verify that the contents of the grid matches what is expected. Expected
     state is passed in as a dict of lists, for example:
@@ -68,11 +61,35 @@ def verify_grid_contents(driver, contents, inexact_match_columns=[COMPOUND_STRUC
          structures, etc. are scientifically valid. We leave scientific testing
          to the underlying libraries, and just verify that LD is passing
          *something* along
-    """
-    for column_name in contents:
-        expected_content = contents[column_name]
-        exact_match = column_name not in inexact_match_columns
-        verify_column_contents(driver, column_name, expected_content, exact_match=exact_match)
+    :param use_script: bool, extract all columns together, reading each grid
+        viewport with a single script call. If False, each column is verified
+        separately by walking the grid elements.
+    """
+    if not use_script:
+        for column_name in contents:
+            expected_content = contents[column_name]
+            exact_match = column_name not in inexact_match_columns
+            verify_column_contents(driver, column_name, expected_content, exact_match=exact_match, use_script=False)
+        return
+
+    if COMPOUND_STRUCTURE_COLUMN_NAME in contents and COMPOUND_STRUCTURE_COLUMN_NAME not in inexact_match_columns:
+        print(
+            'Warning: Performing exact match on Compound Structure column.  You probably only want to do this for scientific integrity tests!'
+        )
+
+    def get_actual_contents(driver):
+        try:
+            actual_contents = find_columns_contents(driver, list(contents))
+        except LiveDesignWebException:
+            actual_contents = {column_name: [] for column_name in contents}
+        for column_name in inexact_match_columns:
+            if actual_contents.get(column_name):
+                actual_contents[column_name] = contents[column_name]
+        return actual_contents
+
+    assert eventually_equal(driver, get_actual_contents,
+                            contents), 'Grid did not have expected contents `{}`.  Had `{}` instead.'.format(
+                                contents, get_actual_contents(driver))
 
 
 def verify_column_contains(driver, column_name, contents, negate=False):
@@ -101,7 +118,8 @@ def verify_column_contents(driver,
                            expected_content,
                            get_info_from_cell=None,
                            match_length_to_expected=False,
-                           exact_match=True):
+                           exact_match=True,
+                           use_script=True):
     """
     Verify the contents of a single named column.
 
@@ -118,6 +136,8 @@ def verify_column_contents(driver,
          strings, etc. are scientifically valid. We leave scientific testing
          to the underlying libraries, and just verify that LD is passing
          *something* along
+    :param use_script: bool, read each grid viewport with a single script call. See
+        helpers.extraction.grid.find_column_contents
     """
     if exact_match and column_name == 'Compound Structure':
         print(
@@ -129,7 +149,7 @@ def verify_column_contents(driver,
     # time of writing) 60 seconds.
     def get_actual_content(driver):
         try:
-            actual_contents = find_column_contents(driver, column_name, get_info_from_cell)
+            actual_contents = find_column_contents(driver, column_name, get_info_from_cell, use_script=use_script)
         except LiveDesignWebException:
             actual_contents = []
         if match_length_to_expected:
@@ -336,15 +356,30 @@ def verify_svg(driver, entity_id, expected_file_name):
     :param entity_id: str entity id
     :param expected_file_name: str file name of the expected compound image
     """
-    if not expected_file_name.endswith('.svg'):
-        assert False, 'Please provide an svg file'
+    verify_svgs(driver, {entity_id: expected_file_name})
 
-    expected_path = paths.get_resource_path(expected_file_name)
-    # Convert the svgs to pngs
-    expected_png = cairosvg.svg2png(url=expected_path)
-    actual_png = _get_actual_png(driver, entity_id)
 
-    verify_png(driver, expected_png, actual_png, entity_id)
+def verify_svgs(driver, expected_file_names):
+    """
+    Verify the compound image svgs of several entities in the grid, reporting all the mismatches at once.
+
+    :param driver: webdriver
+    :param expected_file_names: dict, entity id -> str file name of the expected compound image
+    """
+    for expected_file_name in expected_file_names.values():
+        if not expected_file_name.endswith('.svg'):
+            assert False, 'Please provide an svg file'
+
+    mismatches = []
+    for entity_id, expected_file_name in expected_file_names.items():
+        expected_png = image_comparison.rasterize_svg_file(paths.get_resource_path(expected_file_name))
+        actual_png = _get_actual_png(driver, entity_id)
+        try:
+            verify_png(driver, expected_png, actual_png, entity_id)
+        except AssertionError as e:
+            mismatches.append('{}: {}'.format(entity_id, e))
+
+    assert not mismatches, 'Compound images differ from the expected ones:\n{}'.format('\n'.join(mismatches))
 
 
 def verify_png(driver, expected_png, actual_png, entity_id):
@@ -353,28 +388,19 @@ def verify_png(driver, expected_png, actual_png, entity_id):
     NOTE: The threshold was determined experimentally, due to the nature of image comparison (there is no catch-all
         algorithm, because the way in which images are determined to be different matters - it is subjective by nature)
         However, in this case, the threshold of 1 might make sense if you think of a compound differing only by a
-        radical (a dot) as being different by 1 pixel (e.g. a pixel difference of 255). Look at the ImageStat.Stat
-        code to see where 255 is used (you'll see 256 since it's used by range()), etc.
+        radical (a dot) as being different by 1 pixel (e.g. a pixel difference of 255). See
+        library.image_comparison.channel_rms for how the RMS of each band is computed.
 
     :param driver: selenium webdriver
     :param expected_png: bytes, expected png formatted bytes string
     :param actual_png: bytes, actual png formatted bytes string
     :param entity_id: str entity id
     """
-    rms_threshold = 1
-    expected_im = Image.open(BytesIO(expected_png))
-    actual_im = Image.open(BytesIO(actual_png))
-
-    # The histogram is returned as a list of pixel counts, one for each pixel value in the source image. If the image
-    # has more than one band, the histograms for all bands are concatenated (for example, the histogram for an “RGBA”
-    # image contains 1024 values)
-    # Ex: [count r == 0, count r == 1, ..., count r = 255, count g == 0, count g == 1, ...],  length 1024 (256 * 4)
-    histogram = ImageChops.difference(expected_im, actual_im).histogram()
-
-    # This gives us a list of the RMS of each band (r,g,b, and a) in the image.
-    rgba_rms = ImageStat.Stat(histogram).rms
+    rms_threshold = image_comparison.DEFAULT_RMS_THRESHOLD
+    # This gives us a list of the RMS of the pixel differences of each band (r,g,b, and a) in the image.
+    rgba_rms = image_comparison.channel_rms(expected_png, actual_png)
     # Check if any rgba band's RMS is above the RMS threshold (standard deviation)
-    is_below_threshold = not any((band > rms_threshold for band in rgba_rms))
+    is_below_threshold = image_comparison.is_similar(rgba_rms, rms_threshold)
 
     if not is_below_threshold:
         test_name = get_current_test_name()
@@ -403,18 +429,12 @@ def _get_actual_png(driver, entity_id):
     """
     # Extract the actual src from the dom and make a GET request for it
     actual_src = dom.get_element(driver, GRID_COMPOUND_IMAGE_SELECTOR_.format(entity_id)).get_attribute('src')
-    actual_svg = requests.get(actual_src, auth=('demo', 'demo')).content
+    actual_svg = image_comparison.fetch_svg(actual_src)
 
     if not actual_svg.startswith(b'<!DOCTYPE svg'):
         assert False, 'Actual image is not an svg'
 
-    # Create a tempfile to create a png bytes string for the actual svg
-    with tempfile.NamedTemporaryFile(dir='.', suffix='.svg') as f:
-        f.write(actual_svg)
-        actual_path = f.name
-        actual_png = cairosvg.svg2png(url=actual_path)
-
-    return actual_png
+    return image_comparison.rasterize_svg(actual_svg)
 
 
 def verify_row_hovered(driver, entity_id):
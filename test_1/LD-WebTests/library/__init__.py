@@ -27,4 +27,10 @@ Files in the `library` submodule underlie most operations in a test.
               iframe
 
 * scroll.py - functions useful for scrolling the page using mouse wheel events.
+
+* polling.py - polling of conditions with a deadline and exponential backoff, used
+               by wait.until_condition_met and api.wait.wait_until_condition_met.
+
+* image_comparison.py - cached rasterization of structure image SVGs and their
+                        pixel-wise comparison, used by helpers.verification.grid.
 """
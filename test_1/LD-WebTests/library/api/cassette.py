@@ -0,0 +1,282 @@
+"""
+Record the HTTP traffic of the LiveDesign clients to a cassette, and serve cassettes from a local replay server that
+stands in for LiveDesign.
+
+Recording patches requests.Session.send, so it captures LDClient, ExtendedLDClient and LocustLDClient traffic alike
+(the Locust HttpSession is a requests.Session). It is turned on with `--record_cassette PATH` for pytest and Locust.
+
+A cassette is a gzipped JSON-lines file: a header line with the recorded origin, then one line per request with the
+method, path, query, a hash of the request body, the response status, the relevant response headers, the response
+body and the time the server took. Entries are written as they are recorded, so memory use doesn't grow with the run.
+
+Replay server:
+
+    $ python -m library.api.cassette results/api.cassette.gz --port 9080 --latency_ms 20 --concurrency 8
+    $ LD_SERVER=http://localhost:9080/ pytest tests/api ...
+    $ locust --host http://localhost:9080 ...
+
+Requests are matched on method, path, query and body first, then on method and path only (e.g. for bodies that
+contain unique names). Repeated requests get the recorded responses in order, e.g. the states of a polled async
+task, and the last one once the recording runs out.
+"""
+import argparse
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+CASSETTE_VERSION = 1
+# Response headers worth replaying, the others are regenerated by the replay server
+_RECORDED_HEADERS = {'content-type', 'set-cookie', 'location', 'content-disposition'}
+
+
+def request_key(method, path, query, body_hash):
+    return '{} {}?{} {}'.format(method.upper(), path, query, body_hash)
+
+
+def _normalized_query(query):
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def _body_hash(body):
+    if not body:
+        return ''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes):
+        # Streamed (e.g. file upload) bodies can't be hashed without consuming them
+        return 'stream'
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+class CassetteRecorder:
+    """
+    Appends the requests sent by every requests.Session of the process to a cassette, while started.
+
+    Example usage:
+
+        with CassetteRecorder('api.cassette.gz'):
+            client = ExtendedLDClient(...)
+            ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._original_send = None
+
+    def start(self):
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self._original_send = requests.Session.send
+        recorder = self
+
+        def recording_send(session, request, **kwargs):
+            response = recorder._original_send(session, request, **kwargs)
+            recorder._record(request, response)
+            return response
+
+        requests.Session.send = recording_send
+        return self
+
+    def stop(self):
+        if self._file is None:
+            return
+        requests.Session.send = self._original_send
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, request, response):
+        url = urlsplit(request.url)
+        raw_headers = getattr(response.raw, 'headers', None)
+        headers = []
+        for name in sorted(_RECORDED_HEADERS):
+            if hasattr(raw_headers, 'getlist'):
+                values = raw_headers.getlist(name)
+            else:
+                values = [response.headers[name]] if name in response.headers else []
+            headers.extend([name, value] for value in values)
+        try:
+            body, encoding = response.content.decode('utf-8'), 'text'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(response.content).decode('ascii'), 'base64'
+        entry = {
+            'method': request.method,
+            'path': url.path,
+            'query': _normalized_query(url.query),
+            'body_hash': _body_hash(request.body),
+            'status': response.status_code,
+            'headers': headers,
+            'body': body,
+            'encoding': encoding,
+            'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 1),
+        }
+        with self._lock:
+            if self._file is None:
+                return
+            if not self.recorded:
+                self._file.write(
+                    json.dumps({
+                        'version': CASSETTE_VERSION,
+                        'origin': '{}://{}'.format(url.scheme, url.netloc)
+                    }) + '\n')
+            self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self.recorded += 1
+
+
+class Cassette:
+    """
+    Recorded responses, indexed for replay
+    """
+
+    def __init__(self):
+        self.origins = set()
+        self._by_key = {}
+        self._by_path = {}
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as cassette_file:
+            for line in cassette_file:
+                entry = json.loads(line)
+                if 'version' in entry:
+                    self.origins.add(entry['origin'])
+                    continue
+                key = request_key(entry['method'], entry['path'], entry['query'], entry['body_hash'])
+                self._by_key.setdefault(key, []).append(entry)
+                self._by_path.setdefault((entry['method'], entry['path']), []).append(entry)
+        return self
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._by_key.values())
+
+    def find(self, method, path, query, body_hash):
+        """
+        :return: the recorded entry for the request, or None
+        """
+        for index_key, index in ((request_key(method, path, _normalized_query(query),
+                                              body_hash), self._by_key), ((method, path), self._by_path)):
+            entries = index.get(index_key)
+            if entries:
+                with self._lock:
+                    position = self._next.get(index_key, 0)
+                    self._next[index_key] = min(position + 1, len(entries) - 1)
+                return entries[position]
+        return None
+
+
+def make_handler(cassette, latency_ms=0.0, latency_factor=None, concurrency=None):
+    """
+    :param cassette: Cassette to serve
+    :param latency_ms: float, time added to every response
+    :param latency_factor: float, if set, also wait for the recorded server time multiplied by this factor
+    :param concurrency: int, number of requests processed at the same time, like the workers of a server
+    :return: BaseHTTPRequestHandler subclass
+    """
+    slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _replay(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            if slots is not None:
+                slots.acquire()
+            try:
+                entry = cassette.find(self.command, url.path, url.query, _body_hash(body))
+                delay = latency_ms + (entry['elapsed_ms'] * latency_factor if entry and latency_factor else 0)
+                if delay:
+                    time.sleep(delay / 1000)
+            finally:
+                if slots is not None:
+                    slots.release()
+            if entry is None:
+                self._respond(404, [['content-type', 'application/json']],
+                              json.dumps({'error': 'No recorded response for {} {}'.format(self.command, self.path)}))
+                return
+            if entry['encoding'] == 'base64':
+                response_body = base64.b64decode(entry['body'])
+            else:
+                response_body = self._rewrite_origins(entry['body']).encode('utf-8')
+            self._respond(entry['status'], entry['headers'], response_body)
+
+        def _rewrite_origins(self, text):
+            """
+            Make absolute URLs of the recorded server point at the replay server
+            """
+            origin = 'http://{}'.format(self.headers.get('Host', '{}:{}'.format(*self.server.server_address)))
+            for recorded_origin in cassette.origins:
+                text = text.replace(recorded_origin, origin)
+            return text
+
+        def _respond(self, status, headers, body):
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            self.send_response(status)
+            for name, value in headers:
+                if name == 'location':
+                    value = self._rewrite_origins(value)
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _replay
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def serve(cassette_paths, host='127.0.0.1', port=9080, latency_ms=0.0, latency_factor=None, concurrency=None):
+    cassette = Cassette()
+    for path in cassette_paths:
+        cassette.load(path)
+    server = ThreadingHTTPServer((host, port), make_handler(cassette, latency_ms, latency_factor, concurrency))
+    server.daemon_threads = True
+    print('Replaying {} responses from {} on http://{}:{}/'.format(len(cassette), ', '.join(cassette_paths), host,
+                                                                   server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve recorded LiveDesign responses')
+    parser.add_argument('cassettes', nargs='+', help='Cassette files or glob patterns, e.g. "results/api.cassette*"')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9080)
+    parser.add_argument('--latency_ms', type=float, default=0.0, help='Time added to every response')
+    parser.add_argument('--latency_factor',
+                        type=float,
+                        default=None,
+                        help='Also wait for the recorded server time multiplied by this factor, e.g. 1')
+    parser.add_argument('--concurrency',
+                        type=int,
+                        default=None,
+                        help='Number of requests processed at the same time, unlimited by default')
+    arguments = parser.parse_args()
+    paths = sorted(path for pattern in arguments.cassettes for path in glob.glob(pattern))
+    serve(paths, arguments.host, arguments.port, arguments.latency_ms, arguments.latency_factor, arguments.concurrency)
@@ -0,0 +1,139 @@
+"""
+Credential-keyed pool of logged-in LDClient objects.
+
+Logging in, pinging and building a new requests session for every API test is pure overhead when most tests use
+the same handful of users. The pool keeps one client per (client class, username, password) for the lifetime of the
+process (i.e. per xdist worker), re-validates it with a ping once it has been idle for a while, and logs in again
+when the ping fails, e.g. because the session token has expired.
+"""
+import time
+
+import requests
+
+from library.api.exceptions import LiveDesignAPIException
+from library.api.extended_ldclient.client import ExtendedLDClient
+from library.api import urls
+
+# Seconds a pooled client may sit unused before it is pinged again on checkout
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+
+
+class LDClientPool:
+    """
+    Hands out logged-in clients, creating at most one per client class and credential pair.
+
+    Example usage:
+
+        pool = LDClientPool()
+        client = pool.get_client('demo', 'demo')
+        same_client = pool.get_client('demo', 'demo')  # no login, no ping
+    """
+
+    def __init__(self, host=None, health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        """
+        :param host: str, LDClient host url, library.api.urls.LDCLIENT_HOST by default
+        :param health_check_interval: int, seconds after which a pooled client is pinged before being reused
+        """
+        self._host = host
+        self.health_check_interval = health_check_interval
+        self._clients = {}
+        self._last_verified = {}
+        self.logins = 0
+        self.logins_saved = 0
+        self.relogins = 0
+
+    @property
+    def host(self):
+        # Resolved on first use, so that the module-level CLIENT_POOL doesn't need the server at import
+        return self._host or urls.LDCLIENT_HOST
+
+    def get_client(self, username='demo', password='demo', client_class=ExtendedLDClient):
+        """
+        Get a logged-in client for the given credentials, reusing the pooled one when it is still healthy.
+
+        :param username: str, username for the client
+        :param password: str, password for the specified username
+        :param client_class: LDClient subclass to instantiate, ExtendedLDClient by default
+        :return: logged-in instance of client_class
+        """
+        key = (client_class, username, password)
+        client = self._clients.get(key)
+        if client is not None and self._is_healthy(key, client):
+            self.logins_saved += 1
+            return client
+
+        if client is not None:
+            self.relogins += 1
+        client = self._login(username, password, client_class)
+        self._clients[key] = client
+        self._last_verified[key] = time.monotonic()
+        return client
+
+    def invalidate(self, username='demo', password='demo', client_class=ExtendedLDClient):
+        """
+        Drop the pooled client for the given credentials, so the next checkout logs in again.
+        """
+        key = (client_class, username, password)
+        self._clients.pop(key, None)
+        self._last_verified.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every pooled client
+        """
+        self._clients.clear()
+        self._last_verified.clear()
+
+    def stats(self):
+        """
+        :return: dict, number of logins performed and avoided by the pool
+        """
+        return {
+            'pooled_clients': len(self._clients),
+            'logins': self.logins,
+            'relogins': self.relogins,
+            'logins_saved': self.logins_saved,
+        }
+
+    def _is_healthy(self, key, client):
+        if time.monotonic() - self._last_verified[key] < self.health_check_interval:
+            return True
+        try:
+            healthy = bool(client.ping())
+        except (requests.exceptions.RequestException, RuntimeError):
+            healthy = False
+        if healthy:
+            self._last_verified[key] = time.monotonic()
+        return healthy
+
+    def _login(self, username, password, client_class):
+        try:
+            # Note: Any wrong input for either host or username or password throws HTTPError.
+            client = client_class(host=self.host, username=username, password=password, compatibility_mode=(8, 10))
+        except requests.exceptions.HTTPError as e:
+            raise LiveDesignAPIException(
+                "Unable to get LDClient object for Host:{}, username:{} and password:{}, Getting Error:{}".format(
+                    self.host, username, password, e), e)
+        self.logins += 1
+        try:
+            ping_return = client.ping()
+        except RuntimeError as e:
+            raise LiveDesignAPIException("Ping returned error: {}".format(e), e)
+        if not ping_return:
+            raise LiveDesignAPIException("ldclient ping returned False, It may not be able to hit the about path")
+        return client
+
+
+# One pool per process, which means one pool per xdist worker
+CLIENT_POOL = LDClientPool()
+
+
+def get_pooled_api_client(username=None, password=None, client_class=ExtendedLDClient):
+    """
+    Pooled counterpart of library.api.ldclient.get_api_client
+
+    :param username: str, Username for the ldclient
+    :param password: str, password for the specified username
+    :param client_class: LDClient subclass to instantiate, ExtendedLDClient by default
+    """
+    return CLIENT_POOL.get_client(username, password, client_class)
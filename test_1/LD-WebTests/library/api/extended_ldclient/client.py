@@ -1,4 +1,5 @@
 from ldclient import LDClient
+from ldclient.api.paths import LIVE_REPORTS_PATH
 from typing import List, Optional
 
 from library.api.extended_ldclient.models import Reaction
@@ -108,3 +109,24 @@ class ExtendedLDClient(LDClient):
         :return: a dictionary mapping Startup hooks name to pass/fail status.
         """
         return self.client.get(service_path=STARTUP_HOOKS_PATH, path='')
+
+    def live_report_results(self, live_report_id, view_details, report_level='PARENT'):
+        """
+        Gets the results of a live report for the given views, e.g. only some rows and columns, like the grid does.
+        Same as ExperimentalLDClient.live_report_results.
+
+        :param live_report_id: str, live report id
+        :param view_details: list of dicts, the requested views, e.g. [{"type": "row_key", "row_return_type": "ALL",
+                             "projections": [column ids], "row_keys": [row keys]}]
+        :param report_level: str, "PARENT" or another report level of the live report
+
+        :rtype: :class:`dict`
+        :return: a dictionary mapping row keys to dictionaries of column ids to cells
+        """
+        return self.client.post(service_path=LIVE_REPORTS_PATH,
+                                path='/results',
+                                json_data={
+                                    'live_report_id': str(live_report_id),
+                                    'report_level': report_level,
+                                    'view_details': view_details,
+                                })
@@ -2,7 +2,7 @@ import requests
 
 from library.api.exceptions import LiveDesignAPIException
 from library.api.extended_ldclient.client import ExtendedLDClient
-from library.api.urls import LDCLIENT_HOST
+from library.api import urls
 
 
 def get_api_client(username=None, password=None):
@@ -14,11 +14,14 @@ def get_api_client(username=None, password=None):
     """
     try:
         # Note: Any wrong input for either LDCLIENT_HOST or username or password throws HTTPError.
-        client = ExtendedLDClient(host=LDCLIENT_HOST, username=username, password=password, compatibility_mode=(8, 10))
+        client = ExtendedLDClient(host=urls.LDCLIENT_HOST,
+                                  username=username,
+                                  password=password,
+                                  compatibility_mode=(8, 10))
     except requests.exceptions.HTTPError as e:
         raise LiveDesignAPIException(
             "Unable to get LDClient object for Host:{}, username:{} and password:{}, Getting Error:{}".format(
-                LDCLIENT_HOST, username, password, e), e)
+                urls.LDCLIENT_HOST, username, password, e), e)
     try:
         ping_return = client.ping()
         if ping_return:
@@ -0,0 +1,177 @@
+"""
+Pool of LiveReport copies made ahead of time for the duplicate_live_report fixture.
+
+Copying a big template LiveReport can take longer than the test that uses it. The pool copies templates in background
+threads while other tests run, so that a test can check out a ready copy and only has to rename it. Copies are keyed
+by user, project, template id and the entity/column subset, i.e. everything that determines their contents.
+
+Copies are requested ahead of time with prefetch(), e.g. for the tests coming up next, and checked-out copies are
+deleted together at the end of the session by close(), along with the copies that were never used.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from ldclient.models import LiveReport
+
+from library.api.exceptions import LiveDesignAPIException
+from library.utils import make_unique_name
+
+# Number of copies made at the same time
+DEFAULT_COPY_THREADS = 2
+# Title of the copies until they are checked out and renamed
+POOLED_COPY_TITLE = 'Pooled copy'
+
+
+class CopyKey:
+    """
+    What a LiveReport copy is made from
+    """
+
+    def __init__(self, username, password, project_id, template_id, entity_ids=None, column_ids=None):
+        self.username = username
+        self.password = password
+        self.project_id = str(project_id)
+        self.template_id = str(template_id)
+        self.entity_ids = tuple(entity_ids) if entity_ids is not None else None
+        self.column_ids = tuple(column_ids) if column_ids is not None else None
+
+    def _fields(self):
+        return self.username, self.password, self.project_id, self.template_id, self.entity_ids, self.column_ids
+
+    def __eq__(self, other):
+        return isinstance(other, CopyKey) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return 'CopyKey(user={}, project={}, template={})'.format(self.username, self.project_id, self.template_id)
+
+
+class LiveReportCopyPool:
+    """
+    Example usage:
+
+        pool = LiveReportCopyPool(get_api_client)
+        pool.prefetch(key)  # returns immediately
+        ...
+        live_report = pool.checkout(key, 'my test LR')  # ready copy, renamed to 'my test LR_<random digits>'
+        ...
+        pool.close()  # deletes all copies
+    """
+
+    def __init__(self, client_factory, copy_threads=DEFAULT_COPY_THREADS):
+        """
+        :param client_factory: function (username, password) -> logged-in LDClient. The pool keeps one client per
+                               thread and user, since LDClient objects aren't meant to be shared between threads.
+        :param copy_threads: int, number of copies made at the same time
+        """
+        self._client_factory = client_factory
+        self._executor = ThreadPoolExecutor(max_workers=copy_threads, thread_name_prefix='lr-copy')
+        self._thread_local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> list of futures of copies not checked out yet
+        self._to_delete = []  # (key, live report id)
+        self.copies = 0
+        self.copies_ready = 0
+        self.copies_waited_for = 0
+        self.copies_unused = 0
+
+    def prefetch(self, key, count=1):
+        """
+        Make sure that at least `count` copies for the key are ready or being made.
+        """
+        with self._lock:
+            pending = self._pending.setdefault(key, [])
+            for _ in range(count - len(pending)):
+                pending.append(self._executor.submit(self._copy, key))
+
+    def checkout(self, key, title):
+        """
+        Take a copy for the key, waiting for it if it isn't ready yet, and rename it.
+
+        :param key: CopyKey
+        :param title: str, title of the copy, made unique by library.utils.make_unique_name
+        :return: ldclient.models.LiveReport, the copy. It will be deleted by close().
+        """
+        with self._lock:
+            pending = self._pending.setdefault(key, [])
+            future = pending.pop(0) if pending else self._executor.submit(self._copy, key)
+        if future.done():
+            self.copies_ready += 1
+        else:
+            self.copies_waited_for += 1
+        live_report = future.result()
+        with self._lock:
+            self._to_delete.append((key, live_report.id))
+
+        live_report.title = make_unique_name(title)
+        try:
+            return self._client(key).update_live_report(live_report.id, live_report)
+        except requests.exceptions.RequestException as e:
+            raise LiveDesignAPIException('Unable to rename the copy of LiveReport {}: {}'.format(key.template_id, e),
+                                         error=e)
+
+    def close(self):
+        """
+        Cancel the copies that haven't started yet, and delete the checked out and unused copies, in parallel
+        """
+        with self._lock:
+            unused = [(key, future) for key, pending in self._pending.items() for future in pending]
+            self._pending.clear()
+        # Cancel them all before waiting, the copy threads would start the next copies during the waits
+        unused = [(key, future) for key, future in unused if not future.cancel()]
+        for key, future in unused:
+            try:
+                self._to_delete.append((key, future.result().id))
+            except LiveDesignAPIException:
+                continue
+            self.copies_unused += 1
+
+        futures = [self._executor.submit(self._delete, key, live_report_id) for key, live_report_id in self._to_delete]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except requests.exceptions.RequestException as e:
+                print('Unable to delete a LiveReport copy: {}'.format(e))
+        self._to_delete = []
+        self._executor.shutdown()
+
+    def stats(self):
+        """
+        :return: dict, number of copies made, checked out ready or waited for, and never used
+        """
+        return {
+            'copies': self.copies,
+            'copies_ready': self.copies_ready,
+            'copies_waited_for': self.copies_waited_for,
+            'copies_unused': self.copies_unused,
+        }
+
+    def _client(self, key):
+        clients = getattr(self._thread_local, 'clients', None)
+        if clients is None:
+            clients = self._thread_local.clients = {}
+        user = (key.username, key.password)
+        if user not in clients:
+            clients[user] = self._client_factory(key.username, key.password)
+        return clients[user]
+
+    def _copy(self, key):
+        live_report = LiveReport(title=make_unique_name(POOLED_COPY_TITLE), project_id=key.project_id)
+        entity_ids = list(key.entity_ids) if key.entity_ids is not None else None
+        column_ids = list(key.column_ids) if key.column_ids is not None else None
+        try:
+            copy = self._client(key).copy_live_report(template_id=key.template_id,
+                                                      live_report=live_report,
+                                                      entity_ids=entity_ids,
+                                                      projections=column_ids)
+        except Exception as e:
+            raise LiveDesignAPIException(e)
+        with self._lock:
+            self.copies += 1
+        return copy
+
+    def _delete(self, key, live_report_id):
+        self._client(key).delete_live_report(live_report_id)
@@ -1,5 +1,11 @@
 from urllib.parse import urljoin
 
-from library.url_endpoints import HOST
+from library import url_endpoints
 
-LDCLIENT_HOST = urljoin(HOST, 'livedesign/api/')
+
+def __getattr__(name):
+    # Resolved on first use, like the urls in library.url_endpoints
+    if name == 'LDCLIENT_HOST':
+        value = globals()[name] = urljoin(url_endpoints.HOST, 'livedesign/api/')
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
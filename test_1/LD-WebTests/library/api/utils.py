@@ -1,4 +1,6 @@
 import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 def sort_objects_based_on_field(list_of_objects, field_name_to_apply_sorting):
@@ -11,3 +13,49 @@ def sort_objects_based_on_field(list_of_objects, field_name_to_apply_sorting):
     :return: list, sorted list of objects
     """
     return sorted(list_of_objects, key=operator.attrgetter(field_name_to_apply_sorting))
+
+
+def chunked(items, chunk_size):
+    """
+    Split items into lists of at most chunk_size items, in order
+
+    :param items: iterable
+    :param chunk_size: int, largest number of items per chunk
+    :return: list of lists
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1, got {}'.format(chunk_size))
+    items = list(items)
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def submit_in_chunks(ld_client, request_function, items, chunk_size, max_concurrent_chunks=1, client_factory=None):
+    """
+    Call request_function for each chunk of items. The chunks are sent one at a time with ld_client, unless a
+    client_factory is given: then at most max_concurrent_chunks calls are in flight, each thread with its own client,
+    since LDClient objects aren't meant to be shared between threads.
+
+    :param ld_client: LDClient for the chunks sent one at a time
+    :param request_function: callable (LDClient, list of items) -> response, e.g. a call of LDClient.add_rows
+    :param items: iterable, e.g. corporate ids
+    :param chunk_size: int, largest number of items per call
+    :param max_concurrent_chunks: int, number of calls made at the same time with a client_factory
+    :param client_factory: function () -> logged-in LDClient of the same user as ld_client, or None
+    :return: list, what request_function returned for each chunk, in chunk order
+    :raises: the exception of the first chunk that failed, after all calls have finished
+    """
+    chunks = chunked(items, chunk_size)
+    if len(chunks) <= 1 or max_concurrent_chunks <= 1 or client_factory is None:
+        return [request_function(ld_client, chunk) for chunk in chunks]
+
+    thread_local = threading.local()
+
+    def request_chunk(chunk):
+        if not hasattr(thread_local, 'client'):
+            thread_local.client = client_factory()
+        return request_function(thread_local.client, chunk)
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrent_chunks, len(chunks)),
+                            thread_name_prefix='chunk') as executor:
+        futures = [executor.submit(request_chunk, chunk) for chunk in chunks]
+    return [future.result() for future in futures]
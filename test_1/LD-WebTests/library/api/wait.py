@@ -1,13 +1,21 @@
-import time
 from typing import Callable
 
+from library.polling import DEFAULT_MAX_INTERVAL, poll_until
+
+# Seconds the helpers/api/actions waits give the server, same as the former 60 retries 1 s apart
+DEFAULT_TIMEOUT = 59
+
 
 def wait_until_condition_met(condition_function: Callable, retries: int = 60, interval: int = 1000):
-    for i in range(retries):
-        try:
-            condition_function()
-            return
-        except AssertionError as e:
-            if i == retries - 1:
-                raise e
-            time.sleep(interval / 1000)
+    """
+    Retries condition_function until it doesn't raise an AssertionError, with backoff (see library.polling).
+
+    :param condition_function: a callable function
+    :param retries: int, the timeout is (retries - 1) * interval, i.e. the time the attempts used to be spread over;
+                    at least this many attempts are made, however long they take
+    :param interval: int, in ms, the longest time between attempts when above library.polling.DEFAULT_MAX_INTERVAL
+    """
+    poll_until(condition_function,
+               timeout=(retries - 1) * interval / 1000,
+               max_interval=max(interval / 1000, DEFAULT_MAX_INTERVAL),
+               min_attempts=retries)
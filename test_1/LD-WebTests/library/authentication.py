@@ -1,7 +1,15 @@
+import requests
+from selenium.webdriver.common.by import By
+
 from helpers.selection.authentication import USERNAME_INPUT, PASSWORD_INPUT, LOGIN_BUTTON, USER_NAME_ELEMENT
-from library import dom, url, wait, ensure
+from library import dom, url, url_endpoints, wait, ensure
 from helpers.selection.general import MENU_ITEM
-from library.url_endpoints import LOGIN_URL
+
+LOGGED_IN_PAGE_TITLE = 'LiveDesign'
+LOGIN_PAGE_TITLE = 'Log in to LiveDesign'
+
+# (username, password) -> session cookies, see get_session_cookies
+_session_cookies = {}
 
 
 def login(driver, uname='demo', pword='demo'):
@@ -10,15 +18,105 @@ def login(driver, uname='demo', pword='demo'):
     """
 
     do_login(driver, uname, pword)
-    wait.until_page_title_is(driver, 'LiveDesign')
+    wait.until_page_title_is(driver, LOGGED_IN_PAGE_TITLE)
+
+
+def fast_login(driver, uname='demo', pword='demo'):
+    """
+    Log into LD without going through the login page: the session cookies are obtained from the REST auth endpoint
+    (once per process and credential pair) and set in the browser before LD is opened.
+
+    Falls back to the login page when the cookies can't be obtained or are rejected even after logging in again.
+
+    :return: bool, whether the login page was skipped
+    """
+    for refresh in (False, True):
+        try:
+            cookies = get_session_cookies(uname, pword, refresh=refresh)
+        except requests.exceptions.RequestException as e:
+            print('Could not log in through {} ({}), using the login page'.format(url_endpoints.AUTH_LOGIN_URL, e))
+            break
+        set_session_cookies(driver, cookies)
+        url.go_to_url(driver, url_endpoints.LIVE_DESIGN_URL)
+        if _wait_for_logged_in_or_login_page(driver) == LOGGED_IN_PAGE_TITLE:
+            return True
+    clear_session_cookies(uname, pword)
+    driver.delete_all_cookies()
+    login(driver, uname, pword)
+    return False
+
+
+def get_session_cookies(uname, pword, refresh=False):
+    """
+    Log in through the REST auth endpoint, unless it was already done for these credentials
+
+    :param uname: str, username
+    :param pword: str, password
+    :param refresh: bool, whether to log in again even if cookies are cached, e.g. because the session expired
+    :return: list of dicts with the name, value, path and secure flag of the session cookies
+    """
+    key = (uname, pword)
+    if refresh or key not in _session_cookies:
+        with requests.Session() as session:
+            response = session.post(url_endpoints.AUTH_LOGIN_URL, data={'username': uname, 'password': pword})
+            response.raise_for_status()
+            _session_cookies[key] = [{
+                'name': cookie.name,
+                'value': cookie.value,
+                'path': cookie.path or '/',
+                'secure': bool(cookie.secure),
+            } for cookie in session.cookies]
+    return _session_cookies[key]
+
+
+def clear_session_cookies(uname=None, pword=None):
+    """
+    Drop the cached session cookies of the given credentials, or of all credentials, so that the next fast_login()
+    logs in through the REST auth endpoint again
+    """
+    if uname is None:
+        _session_cookies.clear()
+    else:
+        _session_cookies.pop((uname, pword), None)
+
+
+def set_session_cookies(driver, cookies):
+    """
+    Set the cookies for the LD host in the browser. Chrome accepts them before any page of the host is loaded; other
+    browsers only take cookies for the current page's domain, so a small static file of the host is loaded first.
+    """
+    driver.delete_all_cookies()
+    if hasattr(driver, 'execute_cdp_cmd'):
+        for cookie in cookies:
+            driver.execute_cdp_cmd('Network.setCookie', dict(cookie, url=url_endpoints.HOST))
+        return
+    url.go_to_url(driver, url_endpoints.COPYRIGHT_URL)
+    for cookie in cookies:
+        driver.add_cookie(cookie)
+
+
+def _wait_for_logged_in_or_login_page(driver):
+    """
+    :return: str, title of the page LD ended up on
+    """
+    titles = (LOGGED_IN_PAGE_TITLE, LOGIN_PAGE_TITLE)
+
+    def title_filter_function(element):
+        return (element.get_attribute('textContent') or '').strip() in titles
+
+    title_condition = dom.ElementCriteriaCondition((By.TAG_NAME, 'title'),
+                                                   must_be_visible=False,
+                                                   filter_function=title_filter_function)
+    dom.wait_until(driver, title_condition, 'Expected html page title to be one of {}'.format(titles))
+    return driver.title.strip()
 
 
 def do_login(driver, user_name, password):
     """
     Enter the username, password and do click login button
     """
-    url.go_to_url(driver, LOGIN_URL)
-    wait.until_page_title_is(driver, 'Log in to LiveDesign')
+    url.go_to_url(driver, url_endpoints.LOGIN_URL)
+    wait.until_page_title_is(driver, LOGIN_PAGE_TITLE)
 
     dom.set_element_value(driver, USERNAME_INPUT, user_name)
     dom.set_element_value(driver, PASSWORD_INPUT, password)
@@ -31,4 +129,4 @@ def logout(driver):
     """
     ensure.element_visible(driver, USER_NAME_ELEMENT, MENU_ITEM, expected_visible_selector_text='Log Out')
     dom.click_element(driver, MENU_ITEM, text='Log Out')
-    wait.until_page_title_is(driver, 'Log in to LiveDesign')
+    wait.until_page_title_is(driver, LOGIN_PAGE_TITLE)
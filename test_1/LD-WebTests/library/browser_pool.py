@@ -0,0 +1,145 @@
+"""
+Pool of WebDriver sessions that are reused across the selenium tests marked with `reuse_browser`.
+
+Launching a browser, loading LiveDesign and parsing its JS bundles costs several seconds per test. Tests that don't
+depend on a brand-new browser profile can instead get the driver of a previous test, after its session was reset to
+the state of a new browser:
+- alerts are dismissed, extra windows are closed and the driver is switched back to the top-level document,
+- local and session storage of the LiveDesign origin and all cookies are cleared,
+- the browser navigates to a blank page, which discards the LiveReport tabs, dialogs and metapicker of the previous test
+  along with the rest of the LiveDesign page.
+
+A driver is quit instead of being reused when its test failed, when it doesn't respond to the reset, or after
+MAX_REUSES tests, which bounds the memory growth of long-lived browsers.
+"""
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+
+NEUTRAL_URL = 'about:blank'
+MAX_REUSES = 50
+
+
+class BrowserPool:
+    """
+    Hands out idle drivers, launching a new one when none is available.
+
+    Example usage:
+
+        pool = BrowserPool()
+        driver = pool.checkout(launch_driver)
+        ...
+        pool.checkin(driver, reusable=test_passed)
+    """
+
+    def __init__(self, max_reuses=MAX_REUSES):
+        """
+        :param max_reuses: int, number of tests after which a driver is quit instead of reused
+        """
+        self.max_reuses = max_reuses
+        self._idle = []
+        self._uses = {}
+        self.launches = 0
+        self.launches_saved = 0
+        self.discarded = 0
+
+    def checkout(self, launch_driver):
+        """
+        Get an idle driver, or launch a new one.
+
+        :param launch_driver: function that launches and returns a new driver
+        :return: WebDriver
+        """
+        while self._idle:
+            driver = self._idle.pop()
+            if is_healthy(driver):
+                self.launches_saved += 1
+                self._uses[driver] += 1
+                return driver
+            self._discard(driver)
+
+        driver = launch_driver()
+        self.launches += 1
+        self._uses[driver] = 1
+        return driver
+
+    def checkin(self, driver, reusable=True):
+        """
+        Reset the driver's session and keep it for a later test, or quit it.
+
+        :param driver: WebDriver obtained from checkout
+        :param reusable: bool, False to quit the driver, e.g. because its test failed
+        """
+        if reusable and self._uses[driver] < self.max_reuses and reset_session(driver):
+            self._idle.append(driver)
+        else:
+            self._discard(driver)
+
+    def clear(self):
+        """
+        Quit every idle driver
+        """
+        while self._idle:
+            self._discard(self._idle.pop())
+
+    def stats(self):
+        """
+        :return: dict, number of browsers launched, launches avoided by the pool and drivers discarded
+        """
+        return {
+            'launches': self.launches,
+            'launches_saved': self.launches_saved,
+            'discarded': self.discarded,
+        }
+
+    def _discard(self, driver):
+        self._uses.pop(driver, None)
+        self.discarded += 1
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+def is_healthy(driver):
+    """
+    :return: bool, whether the browser still responds
+    """
+    try:
+        return bool(driver.window_handles)
+    except WebDriverException:
+        return False
+
+
+def reset_session(driver):
+    """
+    Bring the driver back to the state of a new browser, see the module docstring
+
+    :return: bool, whether the reset succeeded
+    """
+    try:
+        _dismiss_alert(driver)
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.switch_to.default_content()
+        if driver.current_url.startswith('http'):
+            driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+        driver.delete_all_cookies()
+        driver.get(NEUTRAL_URL)
+        # LiveDesign may ask to confirm leaving the page
+        _dismiss_alert(driver)
+        return driver.current_url == NEUTRAL_URL
+    except WebDriverException:
+        return False
+
+
+def _dismiss_alert(driver):
+    try:
+        driver.switch_to.alert.dismiss()
+    except NoAlertPresentException:
+        pass
+
+
+# One pool per process, which means one pool per xdist worker
+BROWSER_POOL = BrowserPool()
@@ -7,6 +7,7 @@ Note that these functions encapsulate logic to handle timeouts. The maximum time
 to wait for a matching element can be overridden by specifying a value for the
 timeout optional named parameter.
 """
+import os
 import sys
 import logging
 
@@ -17,12 +18,106 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.wait import WebDriverWait
 
-from library import simulate, utils
+from library import simulate, utils, wait_instrumentation
 
 DEFAULT_TIMEOUT = 60
 
+# Evaluate ElementCriteriaCondition criteria in the browser, with one script call per poll, rather than with several
+# WebDriver calls per candidate element. See ElementCriteriaCondition.
+# NOTE: Opt-in (LD_BATCHED_CRITERIA_EVALUATION=1): the script's innerText and visibility check only approximate
+# WebElement.text and is_displayed(), and their equivalence has only been checked on the login page so far.
+BATCHED_CRITERIA_EVALUATION = os.environ.get('LD_BATCHED_CRITERIA_EVALUATION', '0') == '1'
+
 LOGGER = logging.getLogger(__name__)
 
+# Finds the elements matching a locator and filters them on text, visibility and enabled state in a single round trip.
+# Returns the matching elements (at most arguments[7] of them, if non-zero) and, for each filtered element, why it
+# was filtered. Visibility and text follow what WebElement.is_displayed and WebElement.text would report: an element
+# that is not displayed has no text.
+_EVALUATE_CRITERIA_SCRIPT = """
+var root = arguments[0] || document;
+var selectorType = arguments[1];
+var selector = arguments[2];
+var expectedText = arguments[3];
+var exactTextMatch = arguments[4];
+var mustBeVisible = arguments[5];
+var mustBeClickable = arguments[6];
+var maxMatches = arguments[7];
+
+function findCandidates() {
+    if (selectorType === 'xpath') {
+        var snapshot = document.evaluate(selector, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var found = [];
+        for (var i = 0; i < snapshot.snapshotLength; i++) {
+            found.push(snapshot.snapshotItem(i));
+        }
+        return found;
+    }
+    if (selectorType === 'tag name') {
+        return root.getElementsByTagName(selector);
+    }
+    return root.querySelectorAll(selector);
+}
+
+function isDisplayed(element) {
+    if (!element.getClientRects().length) {
+        return false;
+    }
+    for (var node = element; node && node.nodeType === 1; node = node.parentNode) {
+        var style = window.getComputedStyle(node);
+        if (style.display === 'none' || style.opacity === '0' || (node === element && style.visibility !== 'visible')) {
+            return false;
+        }
+    }
+    return true;
+}
+
+function isEnabled(element) {
+    return !element.disabled && !(element.closest && element.closest('fieldset[disabled]'));
+}
+
+var candidates = findCandidates();
+var result = {elements: [], reasons: []};
+for (var i = 0; i < candidates.length; i++) {
+    var element = candidates[i];
+    var displayed = isDisplayed(element);
+    if (expectedText) {
+        var actualText = displayed ? (element.innerText || '').replace(/\u00a0/g, ' ').trim() : '';
+        if (exactTextMatch && actualText !== expectedText) {
+            result.reasons.push({reason: 'text_mismatch', text: actualText});
+            continue;
+        }
+        if (actualText.indexOf(expectedText) === -1) {
+            result.reasons.push({reason: 'text_missing', text: actualText});
+            continue;
+        }
+    }
+    if (mustBeVisible && !displayed) {
+        result.reasons.push({reason: 'not_visible'});
+        continue;
+    }
+    if (mustBeClickable && !isEnabled(element)) {
+        result.reasons.push({reason: 'not_clickable'});
+        continue;
+    }
+    result.elements.push(element);
+    if (maxMatches && result.elements.length >= maxMatches) {
+        break;
+    }
+}
+return result;
+"""
+
+# Locator types that _EVALUATE_CRITERIA_SCRIPT can resolve, mapped to the CSS selector equivalent where needed
+_BATCHABLE_LOCATOR_TYPES = {
+    By.CSS_SELECTOR: lambda selector: selector,
+    By.XPATH: lambda selector: selector,
+    By.TAG_NAME: lambda selector: selector,
+    By.ID: lambda selector: '[id="{}"]'.format(selector),
+    By.CLASS_NAME: lambda selector: '.{}'.format(selector),
+    By.NAME: lambda selector: '[name="{}"]'.format(selector),
+}
+
 
 def get_element(driver_or_parent_element,
                 selector,
@@ -258,7 +353,10 @@ def wait_until(driver_or_element, callback, message='', timeout=DEFAULT_TIMEOUT)
     Block testing until condition returned by callback is not false
     See: selenium.webdriver.support.wait.WebDriverWait
     """
-    return WebDriverWait(driver_or_element, timeout).until(callback, message)
+    wait = WebDriverWait(driver_or_element, timeout)
+    if wait_instrumentation.ENABLED:
+        return wait_instrumentation.instrumented(wait.until, callback, message)
+    return wait.until(callback, message)
 
 
 def wait_until_not(driver_or_element, callback, message='', timeout=DEFAULT_TIMEOUT):
@@ -266,8 +364,10 @@ def wait_until_not(driver_or_element, callback, message='', timeout=DEFAULT_TIME
     Block testing until condition returned by callback is not false
     See: selenium.webdriver.support.wait.WebDriverWait
     """
-    return WebDriverWait(driver_or_element, timeout) \
-        .until_not(callback, message)
+    wait = WebDriverWait(driver_or_element, timeout)
+    if wait_instrumentation.ENABLED:
+        return wait_instrumentation.instrumented(wait.until_not, callback, message)
+    return wait.until_not(callback, message)
 
 
 def get_visibility_callback(locator, text):
@@ -299,13 +399,20 @@ class ElementCriteriaCondition(object):
                  must_be_clickable=False,
                  return_all_matching=False,
                  require_single_matching_element=True,
-                 action_callback=None):
+                 action_callback=None,
+                 batched=None):
         """
         Constuct an ElementCriteriaCondition with the desired conditions. This
         can then be passed into wait_until or wait_until_not as the callback.
 
         For example usage, see dom.get_element or wait.until_page_title_is
 
+        By default, selector matching, text filtering and the visibility and
+        clickability checks are evaluated in the browser by a single injected
+        script per poll, and only the matching elements are sent back. This
+        saves one WebDriver round trip per candidate element and check. The
+        filter_function, if any, is then applied to those elements only.
+
         :param locator: a tuple of (selector_type, selector)
         :param text: str, optional. text that an element should contain
         :param exact_text_match: Whether text match should be exact or not.
@@ -320,6 +427,9 @@ class ElementCriteriaCondition(object):
         :param return_all_matching: return all found elements (may be slow)
         :param require_single_matching_element: if >1 element matches the selector, fail
         :param action_callback: optional function to pass that will act on the found element(s)
+        :param batched: evaluate the criteria with a single script per poll. Defaults to
+                        BATCHED_CRITERIA_EVALUATION. Locator types the script can't resolve (e.g. link text)
+                        are always evaluated element by element.
         """
         self.locator = locator
         self.expected_text = text
@@ -330,6 +440,8 @@ class ElementCriteriaCondition(object):
         self.must_be_visible = must_be_visible
         self.must_be_clickable = must_be_clickable
         self.filter_function = filter_function
+        self.batched = (BATCHED_CRITERIA_EVALUATION if batched is None else batched) and \
+            locator[0] in _BATCHABLE_LOCATOR_TYPES
         self.last_found_elements = ()
 
     def test_element(self, element):
@@ -358,11 +470,55 @@ class ElementCriteriaCondition(object):
 
         return True
 
+    def find_matching_elements(self, driver_or_parent_element):
+        """
+        Evaluate the selector, text, visibility and clickability criteria in a single script call.
+
+        :param driver_or_parent_element: webdriver or parent element object
+        :return: list of the elements that passed those criteria, in document order
+        """
+        driver = utils.get_driver_from_element(driver_or_parent_element)
+        root = None if driver_or_parent_element is driver else driver_or_parent_element
+        selector_type, selector = self.locator
+        script_selector_type = selector_type if selector_type in (By.XPATH, By.TAG_NAME) else By.CSS_SELECTOR
+        # Without a custom filter, one extra match is enough to tell whether the match is unique
+        max_matches = 0 if self.return_all_matching or self.filter_function else 2
+
+        result = driver.execute_script(_EVALUATE_CRITERIA_SCRIPT, root, script_selector_type,
+                                       _BATCHABLE_LOCATOR_TYPES[selector_type](selector), self.expected_text,
+                                       self.exact_text_match, self.must_be_visible, self.must_be_clickable, max_matches)
+
+        for filtered in result['reasons']:
+            if filtered['reason'] == 'text_mismatch':
+                self.reason_elements_filtered.append('element text `{}` did not match expected value `{}`'.format(
+                    filtered['text'], self.expected_text))
+            elif filtered['reason'] == 'text_missing':
+                self.reason_elements_filtered.append('element text `{}` did not contain expected substring `{}`'.format(
+                    filtered['text'], self.expected_text))
+            elif filtered['reason'] == 'not_visible':
+                self.reason_elements_filtered.append('element is not visible')
+            elif filtered['reason'] == 'not_clickable':
+                self.reason_elements_filtered.append('element is not clickable')
+
+        return result['elements']
+
+    def test_element_with_filter_function(self, element):
+        if self.filter_function and not self.filter_function(element):
+            self.reason_elements_filtered.append('element failed to pass custom filter')
+            return False
+
+        return True
+
     def __call__(self, driver_or_parent_element):
         try:
-            self.last_found_elements = driver_or_parent_element.find_elements(*self.locator)
             self.reason_elements_filtered = []
-            element_generator = (element for element in self.last_found_elements if self.test_element(element))
+            if self.batched:
+                self.last_found_elements = self.find_matching_elements(driver_or_parent_element)
+                element_generator = (
+                    element for element in self.last_found_elements if self.test_element_with_filter_function(element))
+            else:
+                self.last_found_elements = driver_or_parent_element.find_elements(*self.locator)
+                element_generator = (element for element in self.last_found_elements if self.test_element(element))
 
             if self.return_all_matching:
                 result = []
@@ -0,0 +1,60 @@
+"""
+xdist scheduling based on the duration history of library.test_durations. Only imported by the xdist hooks of the root
+conftest, so that the tests can run without pytest-xdist.
+"""
+from xdist.scheduler import LoadScopeScheduling
+
+from library.test_durations import module_of, plan_modules
+
+
+class DurationScheduling(LoadScopeScheduling):
+    """
+    xdist scheduler that runs whole modules, distributed over the workers according to the duration history.
+    """
+
+    def __init__(self, config, history, log=None):
+        super().__init__(config, log)
+        self.history = history
+        self.module_durations = None
+        self.plans = None
+        self.predicted_makespan = None
+
+    def _split_scope(self, nodeid):
+        return module_of(nodeid)
+
+    def _assign_work_unit(self, node):
+        if self.plans is None:
+            self._plan()
+        planned = self.plans.setdefault(node, [])
+        while planned and planned[0] not in self.workqueue:
+            planned.pop(0)
+        if not planned:
+            self._steal_for(node)
+        if planned:
+            # LoadScopeScheduling assigns the first work unit of the queue
+            self.workqueue.move_to_end(planned.pop(0), last=False)
+        super()._assign_work_unit(node)
+
+    def _plan(self):
+        self.module_durations = self.history.module_durations(self.collection)
+        nodes = [node for node in self.nodes if not node.shutting_down]
+        plans = plan_modules({module: self.module_durations[module] for module in self.workqueue}, len(nodes))
+        self.plans = dict(zip(nodes, plans))
+        self.predicted_makespan = max(sum(self.module_durations[m] for m in plan) for plan in plans) if plans else 0
+
+    def _steal_for(self, node):
+        """
+        Move the smallest remaining module of the worker with the most remaining planned work to the given worker
+        """
+        remaining = {
+            other: sum(self.module_durations.get(module, 0) for module in plan if module in self.workqueue)
+            for other, plan in self.plans.items()
+            if other is not node
+        }
+        if not remaining or max(remaining.values()) == 0:
+            return
+        busiest = max(remaining, key=remaining.get)
+        candidates = [module for module in self.plans[busiest] if module in self.workqueue]
+        stolen = candidates[-1]
+        self.plans[busiest].remove(stolen)
+        self.plans[node].append(stolen)
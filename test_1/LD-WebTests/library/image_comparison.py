@@ -0,0 +1,111 @@
+"""
+Rasterization and comparison of compound structure images, for helpers.verification.grid.
+
+- Expected SVG resources are rasterized once: the PNGs are kept in an on-disk cache keyed by a hash of the SVG contents
+  (and the CairoSVG version), so they are shared by the xdist workers and by later runs.
+- Actual SVGs are fetched over one pooled requests session and rasterized in memory.
+- Images are compared with NumPy: the RMS of the per-pixel difference of each channel (R, G, B, A), i.e. the same
+  measure as ImageStat.Stat(ImageChops.difference(...).histogram()).rms, without building histograms.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import cairosvg
+import numpy
+import requests
+from PIL import Image
+
+RASTER_CACHE_DIR_NAME = '.rasterized_svgs'
+# Per-channel RMS above which two images are different, see helpers.verification.grid.verify_png
+DEFAULT_RMS_THRESHOLD = 1
+
+_session = None
+
+
+def rasterize_svg(svg):
+    """
+    :param svg: bytes, svg document
+    :return: bytes, png formatted bytes string
+    """
+    return cairosvg.svg2png(bytestring=svg)
+
+
+def rasterize_svg_file(svg_path, cache_dir=None):
+    """
+    Rasterize an svg file, reusing the png from the cache when the file was rasterized before.
+
+    :param svg_path: str, path of the svg file
+    :param cache_dir: str, cache directory, RASTER_CACHE_DIR_NAME in the working directory by default
+    :return: bytes, png formatted bytes string
+    """
+    svg = Path(svg_path).read_bytes()
+    digest = hashlib.sha1(svg + cairosvg.__version__.encode('ascii')).hexdigest()
+    cache_path = Path(cache_dir or Path.cwd() / RASTER_CACHE_DIR_NAME) / '{}.png'.format(digest)
+    try:
+        return cache_path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    png = cairosvg.svg2png(url=str(svg_path))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, so that other workers never read a partial png
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=str(cache_path.parent), suffix='.tmp')
+    with os.fdopen(file_descriptor, 'wb') as temporary_file:
+        temporary_file.write(png)
+    os.replace(temporary_path, str(cache_path))
+    return png
+
+
+def fetch_svg(url, auth=('demo', 'demo')):
+    """
+    :param url: str, url of the image, e.g. the src of a grid compound image
+    :param auth: tuple, username and password
+    :return: bytes, the response body
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    response = _session.get(url, auth=auth)
+    response.raise_for_status()
+    return response.content
+
+
+def to_array(png):
+    """
+    :param png: bytes, png formatted bytes string
+    :return: numpy.ndarray, height x width x 4 (RGBA), int16 so that differences don't wrap around
+    """
+    with Image.open(BytesIO(png)) as image:
+        return numpy.asarray(image.convert('RGBA'), dtype=numpy.int16)
+
+
+def channel_rms(expected_png, actual_png):
+    """
+    RMS of the per-pixel difference of each channel. Like ImageChops.difference, only the area the images have in
+    common is compared.
+
+    :param expected_png: bytes or array from to_array()
+    :param actual_png: bytes or array from to_array()
+    :return: list of float, the RMS of the R, G, B and A differences
+    """
+    expected = expected_png if isinstance(expected_png, numpy.ndarray) else to_array(expected_png)
+    actual = actual_png if isinstance(actual_png, numpy.ndarray) else to_array(actual_png)
+    height = min(expected.shape[0], actual.shape[0])
+    width = min(expected.shape[1], actual.shape[1])
+    difference = expected[:height, :width] - actual[:height, :width]
+    if not difference.size:
+        return [0.0] * 4
+    squared = numpy.square(difference, dtype=numpy.float64)
+    return numpy.sqrt(squared.mean(axis=(0, 1))).tolist()
+
+
+def is_similar(rms, rms_threshold=DEFAULT_RMS_THRESHOLD):
+    """
+    :param rms: list of float, from channel_rms()
+    :param rms_threshold: float, largest RMS allowed for any channel
+    :return: bool, whether no channel is above the threshold
+    """
+    return not any(band > rms_threshold for band in rms)
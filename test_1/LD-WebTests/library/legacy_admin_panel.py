@@ -17,9 +17,8 @@ from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support.ui import Select
 
-from library import dom, utils, wait
+from library import dom, url_endpoints, utils, wait
 from library.authentication import login
-from library.url_endpoints import (ADMIN_URL, ADMIN_LOGIN_URL, LOGIN_URL)
 
 # NOTE: This is a hack to force the Admin Panel tests to run serially, as a
 # workaround for the lack of support for simultaneous sessions being logged in
@@ -29,8 +28,13 @@ DEFAULT_TIMEOUT = 60
 
 @pytest.mark.usefixtures('selenium_class')
 class AdminSeleniumWebDriverTestCase(TestCase):
-    live_server_url = ADMIN_URL
-    login_url = ADMIN_LOGIN_URL
+    @property
+    def live_server_url(self):
+        return url_endpoints.ADMIN_URL
+
+    @property
+    def login_url(self):
+        return url_endpoints.ADMIN_LOGIN_URL
 
     # Override to
     webdriver_class = 'selenium.webdriver.chrome.webdriver.WebDriver'
@@ -55,7 +59,7 @@ class AdminSeleniumWebDriverTestCase(TestCase):
         if url_params:
             path += "?{querystring}".format(querystring=urlencode(url_params))
 
-        self.selenium.get(urljoin(domain or ADMIN_URL, path))
+        self.selenium.get(urljoin(domain or url_endpoints.ADMIN_URL, path))
         self.wait_until_present('body')
 
     def login_livedesign(self, username='demo', password='demo'):
@@ -64,7 +68,7 @@ class AdminSeleniumWebDriverTestCase(TestCase):
 
     def login(self, username='demo', password='demo'):
         """ Helper method to log in """
-        self.selenium.get(LOGIN_URL)
+        self.selenium.get(url_endpoints.LOGIN_URL)
         wait.until_page_title_is(self.selenium, 'Log in to LiveDesign')
 
         dom.set_element_value(self.selenium, 'input[name="username"]', username)
@@ -72,7 +76,7 @@ class AdminSeleniumWebDriverTestCase(TestCase):
 
         dom.click_element(self.selenium, '#loginButton')
         self.wait(5)
-        self.goto(ADMIN_URL)
+        self.goto(url_endpoints.ADMIN_URL)
         wait.until_visible(self.selenium, '.section', text='MODEL AND PROTOCOL CONFIGURATION')
 
     def logout(self):
@@ -92,7 +96,7 @@ class AdminSeleniumWebDriverTestCase(TestCase):
         """
         # Navigate to the main page, if we are logged in we won't be on the
         # login page
-        self.selenium.get(ADMIN_URL)
+        self.selenium.get(url_endpoints.ADMIN_URL)
         wait.sleep_if_k8s(3)
         try:
             self.selenium.find_element(By.NAME, 'username')
@@ -0,0 +1,153 @@
+"""
+Deadline-based polling with exponential backoff, shared by library.wait.until_condition_met and
+library.api.wait.wait_until_condition_met.
+
+The first retry comes after FIRST_INTERVAL, so conditions that are met almost right away don't cost a full polling
+interval, and the interval then doubles (with some jitter, so that parallel tests don't poll in lockstep) up to a cap,
+so that slow conditions don't keep hitting the server at a high rate. The last attempt is made at the deadline. The
+time the attempts take counts towards the deadline; callers that were promised a number of attempts pass min_attempts:
+the attempts still owed are spread over the time left, and a slow condition still gets them past the deadline.
+
+Attempts and time to success are recorded per call site, i.e. per condition function, see get_stats(). Callers that
+account for where their time goes (e.g. the load tests) can wrap the attempts and the sleeps, see instrument().
+"""
+import contextlib
+import random
+import time
+
+FIRST_INTERVAL = 0.05  # s
+BACKOFF_FACTOR = 2
+JITTER = 0.2  # fraction of the interval
+DEFAULT_MAX_INTERVAL = 2.0  # s
+
+# Fields of the stats of a call site
+_CALLS, _ATTEMPTS, _TIMEOUTS, _SUCCESS_TIME, _MAX_SUCCESS_TIME = range(5)
+
+_stats = {}
+
+# Context managers entered around every attempt and every sleep of poll_until, see instrument()
+_attempt_context = contextlib.nullcontext
+_sleep_context = contextlib.nullcontext
+
+
+def instrument(attempt_context=contextlib.nullcontext, sleep_context=contextlib.nullcontext):
+    """
+    Wrap every attempt and every sleep of poll_until in the given context managers, for this process.
+
+    :param attempt_context: callable returning a context manager, entered around each call of condition_function
+    :param sleep_context: callable returning a context manager, entered around each sleep between attempts
+    """
+    global _attempt_context, _sleep_context
+    _attempt_context = attempt_context
+    _sleep_context = sleep_context
+
+
+def poll_until(condition_function, timeout, max_interval=DEFAULT_MAX_INTERVAL, args=(), min_attempts=1):
+    """
+    Call condition_function until it doesn't raise an AssertionError, or until the timeout is reached.
+
+    :param condition_function: callable that raises AssertionError while the condition isn't met
+    :param timeout: float, seconds after which the last attempt is made
+    :param max_interval: float, longest time between attempts (s)
+    :param args: arguments of condition_function
+    :param min_attempts: int, attempts made even if they go past the timeout
+    :return: what condition_function returns
+    :raises AssertionError: the error of the last attempt, if the condition wasn't met by the deadline (and in
+                            min_attempts attempts)
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = FIRST_INTERVAL
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            with _attempt_context():
+                result = condition_function(*args)
+        except AssertionError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and attempts >= min_attempts:
+                _record(condition_function, attempts, None)
+                raise
+            delay = interval * random.uniform(1 - JITTER, 1 + JITTER)
+            if remaining > 0:
+                # Leave room for the attempts still owed; past the deadline they are made at the current interval
+                delay = min(delay, remaining / max(1, min_attempts - attempts))
+            with _sleep_context():
+                time.sleep(delay)
+            interval = min(interval * BACKOFF_FACTOR, max_interval)
+        else:
+            _record(condition_function, attempts, time.monotonic() - start)
+            return result
+
+
+def call_site(condition_function):
+    function = getattr(condition_function, 'func', condition_function)  # functools.partial
+    return '{}.{}'.format(getattr(function, '__module__', '?'),
+                          getattr(function, '__qualname__',
+                                  type(function).__qualname__))
+
+
+def _record(condition_function, attempts, success_time):
+    site = call_site(condition_function)
+    stats = _stats.get(site)
+    if stats is None:
+        stats = _stats[site] = [0, 0, 0, 0.0, 0.0]
+    stats[_CALLS] += 1
+    stats[_ATTEMPTS] += attempts
+    if success_time is None:
+        stats[_TIMEOUTS] += 1
+    else:
+        stats[_SUCCESS_TIME] += success_time
+        stats[_MAX_SUCCESS_TIME] = max(stats[_MAX_SUCCESS_TIME], success_time)
+
+
+def get_stats():
+    """
+    :return: dict, call site -> dict with the number of calls, attempts and timeouts, and the total and max time to
+             success (s)
+    """
+    return {
+        site: {
+            'calls': stats[_CALLS],
+            'attempts': stats[_ATTEMPTS],
+            'timeouts': stats[_TIMEOUTS],
+            'success_s': stats[_SUCCESS_TIME],
+            'max_success_s': stats[_MAX_SUCCESS_TIME],
+        } for site, stats in _stats.items()
+    }
+
+
+def merge(all_stats):
+    """
+    Merge the get_stats() of several processes (e.g. xdist workers) into one
+    """
+    merged = {}
+    for stats in all_stats:
+        for site, site_stats in stats.items():
+            if site not in merged:
+                merged[site] = dict(site_stats)
+                continue
+            merged_stats = merged[site]
+            for field in ('calls', 'attempts', 'timeouts', 'success_s'):
+                merged_stats[field] += site_stats[field]
+            merged_stats['max_success_s'] = max(merged_stats['max_success_s'], site_stats['max_success_s'])
+    return merged
+
+
+def format_report(stats, top=15):
+    """
+    :return: list of report lines for the call sites that spent the most time polling until success
+    """
+    sites = sorted(stats, key=lambda site: stats[site]['success_s'], reverse=True)[:top]
+    if not sites:
+        return []
+    lines = ['Polling call sites by total time to success:']
+    for site in sites:
+        site_stats = stats[site]
+        successes = site_stats['calls'] - site_stats['timeouts']
+        lines.append('  {:>9.1f} s  {:>6} calls  {:>7} attempts  {:>4} timeouts  mean {}  max {:.2f} s  {}'.format(
+            site_stats['success_s'], site_stats['calls'], site_stats['attempts'], site_stats['timeouts'],
+            '{:.2f} s'.format(site_stats['success_s'] / successes) if successes else '-', site_stats['max_success_s'],
+            site))
+    return lines
@@ -0,0 +1,81 @@
+"""
+Cross-process lock on the LiveDesign server configuration, so that the test runner can run its pytest phases at the same
+time.
+
+Tests that change server properties (i.e. use the customized_server_config fixture) or are marked exclusive (since
+they can't run next to the tests of the parallel phase) hold the lock exclusively, every other test holds it shared.
+An exclusive holder waits for the tests that are already running to finish, and no new test starts until it is done.
+The runner turns the lock on by setting SERVER_CONFIG_LOCK_DIR_ENV_VAR for its pytest processes; without it, locking is
+a no-op. The time spent waiting for the lock is logged in the lock directory, see total_wait_time().
+
+The lock is built from two flock()ed files:
+- "turnstile": taken exclusively by a waiting writer, and briefly by readers before they take the shared lock, so that
+  a stream of readers can't starve a writer
+- "server_config": the lock itself, shared or exclusive
+"""
+import contextlib
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SERVER_CONFIG_LOCK_DIR_ENV_VAR = 'LD_SERVER_CONFIG_LOCK_DIR'
+
+# File of the lock directory with the seconds each holder waited for the lock, one line per holder
+WAIT_LOG_FILENAME = 'waits'
+
+
+def is_supported():
+    return fcntl is not None
+
+
+@contextlib.contextmanager
+def server_config_lock(exclusive, lock_dir=None):
+    """
+    Hold the server configuration lock for the duration of the context.
+
+    :param exclusive: bool, whether the server configuration will be changed
+    :param lock_dir: str, directory of the lock files. Defaults to the SERVER_CONFIG_LOCK_DIR_ENV_VAR environment
+                     variable; if neither is set, nothing is locked.
+    """
+    lock_dir = lock_dir or os.environ.get(SERVER_CONFIG_LOCK_DIR_ENV_VAR)
+    if not lock_dir or not is_supported():
+        yield
+        return
+
+    with open(os.path.join(lock_dir, 'turnstile'), 'a') as turnstile, \
+            open(os.path.join(lock_dir, 'server_config'), 'a') as lock:
+        wait_start = time.monotonic()
+        fcntl.flock(turnstile, fcntl.LOCK_EX)
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        finally:
+            if not exclusive:
+                fcntl.flock(turnstile, fcntl.LOCK_UN)
+        _log_wait(lock_dir, time.monotonic() - wait_start)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            if exclusive:
+                fcntl.flock(turnstile, fcntl.LOCK_UN)
+
+
+def total_wait_time(lock_dir):
+    """
+    :return: float, seconds the holders of the lock in lock_dir spent waiting for it, summed over all holders
+    """
+    try:
+        with open(os.path.join(lock_dir, WAIT_LOG_FILENAME)) as wait_log:
+            return sum(float(line) for line in wait_log if line.strip())
+    except FileNotFoundError:
+        return 0.0
+
+
+def _log_wait(lock_dir, seconds):
+    # Short appends are atomic, so the pytest processes can share the file
+    with open(os.path.join(lock_dir, WAIT_LOG_FILENAME), 'a') as wait_log:
+        wait_log.write('{:.3f}\n'.format(seconds))
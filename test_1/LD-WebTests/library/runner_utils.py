@@ -4,7 +4,13 @@ This file is meant to deduplicate code between the API test runner & the seleniu
 from enum import Enum
 
 import os
+import shutil
 import subprocess
+import sys
+import tempfile
+import time
+
+from library import resource_lock
 
 
 class PytestExitCode(Enum):
@@ -22,21 +28,74 @@ SHOULD_ERROR_SET = {
 SHOULD_SUCCEED_SET = {PytestExitCode.SUCCESS, PytestExitCode.NO_TESTS_COLLECTED}
 
 
-def run_pytest_commands(pytest_cmds, error_on_fail):
+def run_pytest_commands(pytest_cmds, error_on_fail, concurrent=False):
     """
     :param pytest_cmds: pytest commands to run
     :type pytest_cmds: list of list of str
     :param error_on_fail: Whether or not to propagate the first error exit code
     :type error_on_fail: bool
+    :param concurrent: Whether to run all the commands at the same time, coordinating tests that change the server
+                       configuration through library.resource_lock. The output of all but the first command is
+                       printed once that command has finished.
+    :type concurrent: bool
     """
-    exit_codes = []
-    for cmd in pytest_cmds:
-        proc = subprocess.Popen(cmd, cwd=os.getcwd())
-        proc.communicate()
-        exit_codes.append(proc.returncode)
+    if concurrent and len(pytest_cmds) > 1 and resource_lock.is_supported():
+        exit_codes = _run_concurrently(pytest_cmds)
+    else:
+        exit_codes = []
+        for cmd in pytest_cmds:
+            proc = subprocess.Popen(cmd, cwd=os.getcwd())
+            proc.communicate()
+            exit_codes.append(proc.returncode)
     if error_on_fail:
         print(exit_codes)
         for e in exit_codes:
             if PytestExitCode(e) in SHOULD_ERROR_SET:
                 print("Error exit codes returned for one or more subprocesses: {}".format(exit_codes))
                 exit(e)
+
+
+def _run_concurrently(pytest_cmds):
+    """
+    :return: exit codes of the commands, in the order of pytest_cmds
+    """
+    lock_dir = tempfile.mkdtemp(prefix='ld_server_config_lock_')
+    env = dict(os.environ, **{resource_lock.SERVER_CONFIG_LOCK_DIR_ENV_VAR: lock_dir})
+    start = time.monotonic()
+    procs = []
+    outputs = []
+    try:
+        for index, cmd in enumerate(pytest_cmds):
+            output = None if index == 0 else tempfile.TemporaryFile()
+            procs.append(subprocess.Popen(cmd, cwd=os.getcwd(), env=env, stdout=output, stderr=output))
+            outputs.append(output)
+
+        durations = [None] * len(procs)
+        while True:
+            for index, proc in enumerate(procs):
+                if durations[index] is None and proc.poll() is not None:
+                    durations[index] = time.monotonic() - start
+            if None not in durations:
+                break
+            time.sleep(0.5)
+
+        for output in outputs[1:]:
+            output.seek(0)
+            sys.stdout.flush()
+            shutil.copyfileobj(output, sys.stdout.buffer)
+            sys.stdout.flush()
+        lock_wait = resource_lock.total_wait_time(lock_dir)
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+        for output in outputs[1:]:
+            output.close()
+        shutil.rmtree(lock_dir, ignore_errors=True)
+
+    # NOTE: The phase durations include the time their tests spent waiting for the server configuration lock, so their
+    # sum isn't what the phases would take one after another; compare the wall clock with a --sequential_phases run
+    print("Ran {} pytest phases concurrently in {:.0f} s of wall-clock time (phases took {} s); the tests waited "
+          "{:.0f} s for the server configuration lock, summed over the test processes".format(
+              len(pytest_cmds), max(durations), ", ".join("{:.0f}".format(d) for d in durations), lock_wait))
+    return [proc.returncode for proc in procs]
@@ -0,0 +1,121 @@
+"""
+Duration history of the tests, which the xdist scheduling of library.duration_scheduling is based on.
+
+After every run, the root conftest merges the measured test durations (setup + call + teardown, including reruns) into
+a local JSON history file. On later runs:
+- DurationScheduling pre-assigns the test modules to the xdist workers with longest-processing-time-first bin packing.
+  Modules are never split, so their module-scoped fixtures are set up once. A worker that runs out of planned modules
+  takes over the smallest module planned for the busiest other worker.
+- With `-n auto`, the number of workers is derived from the historical critical path (the longest module): more workers
+  than total duration / critical path can't make the run any shorter.
+
+The history is kept per profile (browser + whether the serial phase is run), since those select different tests.
+"""
+import json
+import math
+import os
+import statistics
+
+HISTORY_FILE_NAME = '.test_durations.json'
+DEFAULT_MAX_WORKERS = 8
+
+# Weight of the latest run in the duration history (exponential moving average)
+_LATEST_RUN_WEIGHT = 0.5
+# Duration used for tests without history, when there isn't any history at all
+_DEFAULT_TEST_DURATION = 10.0
+
+
+def module_of(nodeid):
+    return nodeid.split('::', 1)[0]
+
+
+def get_profile(config):
+    driver = config.getoption('--driver', default=None)
+    phase = 'serial' if config.getoption('--customized_server_config', default=False) else 'parallel'
+    return '{}/{}'.format(driver or 'api', phase)
+
+
+class DurationHistory:
+    """
+    Durations (s) per test node id, as stored in the history file:
+
+        {"<profile>": {"tests": {"<nodeid>": <seconds>, ...}}, ...}
+    """
+
+    def __init__(self, path, profile):
+        self.path = path
+        self.profile = profile
+        self.tests = self._load().get(profile, {}).get('tests', {})
+
+    def _load(self):
+        try:
+            with open(self.path) as history_file:
+                return json.load(history_file)
+        except (OSError, ValueError):
+            return {}
+
+    def duration_of(self, nodeid):
+        """
+        :return: historical duration of the test, or the median duration if the test has no history
+        """
+        if nodeid in self.tests:
+            return self.tests[nodeid]
+        return statistics.median(self.tests.values()) if self.tests else _DEFAULT_TEST_DURATION
+
+    def module_durations(self, nodeids=None):
+        """
+        :param nodeids: tests to account for, all tests in the history by default
+        :return: dict, module -> sum of the durations of its tests
+        """
+        durations = {}
+        for nodeid in (self.tests if nodeids is None else nodeids):
+            module = module_of(nodeid)
+            durations[module] = durations.get(module, 0) + self.duration_of(nodeid)
+        return durations
+
+    def suggested_workers(self, max_workers):
+        """
+        :return: number of workers after which adding more no longer shortens the run, at most max_workers
+        """
+        module_durations = self.module_durations()
+        if not module_durations:
+            return max_workers
+        critical_path = max(module_durations.values())
+        total = sum(module_durations.values())
+        return max(1, min(max_workers, math.ceil(total / critical_path)))
+
+    def update(self, measured):
+        """
+        Merge the measured durations into the history file.
+
+        The file is read again right before writing, since other pytest processes (e.g. the other phase of the test
+        runner) may have updated it in the meantime.
+
+        :param measured: dict, nodeid -> duration (s)
+        """
+        history = self._load()
+        tests = history.setdefault(self.profile, {}).setdefault('tests', {})
+        for nodeid, duration in measured.items():
+            previous = tests.get(nodeid)
+            tests[nodeid] = duration if previous is None else (_LATEST_RUN_WEIGHT * duration +
+                                                               (1 - _LATEST_RUN_WEIGHT) * previous)
+        self.tests = tests
+        temporary_path = '{}.{}'.format(self.path, os.getpid())
+        with open(temporary_path, 'w') as history_file:
+            json.dump(history, history_file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+
+def plan_modules(module_durations, number_of_workers):
+    """
+    Longest-processing-time-first bin packing of modules onto workers.
+
+    :return: list (one entry per worker) of lists of modules, longest module first
+    """
+    plans = [[] for _ in range(number_of_workers)]
+    loads = [0.0] * number_of_workers
+    for module in sorted(module_durations, key=lambda m: (-module_durations[m], m)):
+        worker = loads.index(min(loads))
+        plans[worker].append(module)
+        loads[worker] += module_durations[module]
+    return plans
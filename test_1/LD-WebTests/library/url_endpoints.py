@@ -1,32 +1,33 @@
+"""
+URLs of the LiveDesign server under test.
+
+HOST and the URLs derived from it are resolved on first use, not at import, so that collecting tests doesn't need the
+server. Use them as attributes of the module (`url_endpoints.HOST`) where they are needed; `from library.url_endpoints
+import HOST` resolves the host when the importing module is imported.
+
+HOST comes from the LD_SERVER environment variable or, when it isn't set, from the Jenkins selenium testserver job. The
+host found on Jenkins is cached in a local file for HOST_CACHE_SECONDS, so that the xdist workers and the pytest runs
+that follow each other don't all walk the Jenkins build history.
+"""
+import json
 import os
+import tempfile
+import time
 from urllib.parse import urljoin
 
-from library import selenium_jenkins
-
-# TODO Extract this to a config file
-HOST = os.getenv('LD_SERVER', '').strip()
-if HOST:
-    if not HOST.startswith('http'):
-        raise ValueError('LD_SERVER must include protocol, i.e. it should start with http:// for local developer '
-                         'environments and nodes on jenkins server, and spinner machines (hopefully also everything '
-                         'else) are https://')
-    print('Using HOST from LD_SERVER env param')
-else:
-    print('Getting HOST from Jenkins...')
-    HOST = selenium_jenkins.get_host()
-    print('')
-
-LIVE_DESIGN_URL = urljoin(HOST, 'livedesign/')
-LOGIN_URL = urljoin(HOST, 'livedesign/static/login.html')
-print('HOST: {}'.format(HOST))
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+HOST_CACHE_FILE = os.path.join(tempfile.gettempdir(), 'ld_webtests_jenkins_host.json')
+HOST_CACHE_SECONDS = 600
 
 # Get the admin url from the env if set, or fallback on the default
 # If you're using the ADMIN_SERVER env variable, be sure to include
 # the URL_PATH_PREFIX if necessary
 
 # Note (williams): Keep in sync with runserver command  in Makefile
-ADMIN_URL = os.environ.get('ADMIN_SERVER', HOST + 'admin/').strip()
-ADMIN_LOGIN_URL = ADMIN_URL + 'login/'
 ADMIN_LD_PROPERTY_URL = 'ldproperties/ldproperty/'
 ADMIN_COVERPAGE_URL = 'coverpage/coverpage/'
 ADMIN_ASYNCDRIVER_URL = 'asyncdrivers/asyncdriver/'
@@ -34,5 +35,91 @@ OLD_ADMIN_ASYNCDRIVER_URL = 'models/asyncdriver/'
 ADMIN_PROTOCOL_URL = 'models/protocol/'
 ADMIN_LDMODEL_URL = 'models/ldmodel/'
 
-LDCLIENT_CONFIG_SEARCH = urljoin(HOST, 'livedesign/api/config/search')
-COPYRIGHT_URL = urljoin(HOST, 'livedesign/static/resources/licenses/version_license.txt')
+# URLs that depend on HOST, by name. They are computed on first use, see __getattr__.
+_HOST_URLS = {
+    'LIVE_DESIGN_URL': lambda: urljoin(get_host(), 'livedesign/'),
+    'LOGIN_URL': lambda: urljoin(get_host(), 'livedesign/static/login.html'),
+    'AUTH_LOGIN_URL': lambda: urljoin(get_host(), 'livedesign/api/auth/login'),
+    'ADMIN_URL': lambda: os.environ.get('ADMIN_SERVER',
+                                        get_host() + 'admin/').strip(),
+    'ADMIN_LOGIN_URL': lambda: __getattr__('ADMIN_URL') + 'login/',
+    'LDCLIENT_CONFIG_SEARCH': lambda: urljoin(get_host(), 'livedesign/api/config/search'),
+    'COPYRIGHT_URL': lambda: urljoin(get_host(), 'livedesign/static/resources/licenses/version_license.txt'),
+}
+
+_host = None
+
+
+def get_host():
+    """
+    :return: str, url of the LiveDesign server, e.g. 'http://localhost:8080/'
+    """
+    global _host
+    if _host is None:
+        # TODO Extract this to a config file
+        host = os.getenv('LD_SERVER', '').strip()
+        if host:
+            if not host.startswith('http'):
+                raise ValueError('LD_SERVER must include protocol, i.e. it should start with http:// for local '
+                                 'developer environments and nodes on jenkins server, and spinner machines (hopefully '
+                                 'also everything else) are https://')
+            print('Using HOST from LD_SERVER env param')
+        else:
+            host = _get_jenkins_host()
+        print('HOST: {}'.format(host))
+        _host = host
+    return _host
+
+
+def _get_jenkins_host():
+    with open(HOST_CACHE_FILE + '.lock', 'a') as lock:
+        # Only one process asks Jenkins, the others wait for its answer in the cache file
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            host = _read_cached_host()
+            if host:
+                print('Using HOST found on Jenkins less than {} s ago, from {}'.format(
+                    HOST_CACHE_SECONDS, HOST_CACHE_FILE))
+                return host
+
+            # Only needed without LD_SERVER
+            from library import selenium_jenkins
+
+            print('Getting HOST from Jenkins...')
+            host = selenium_jenkins.get_host()
+            print('')
+            _write_cached_host(host)
+            return host
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_cached_host():
+    try:
+        with open(HOST_CACHE_FILE) as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or time.time() - cached.get('resolved_at', 0) > HOST_CACHE_SECONDS:
+        return None
+    return cached.get('host')
+
+
+def _write_cached_host(host):
+    temporary_path = '{}.{}.tmp'.format(HOST_CACHE_FILE, os.getpid())
+    with open(temporary_path, 'w') as cache_file:
+        json.dump({'host': host, 'resolved_at': time.time()}, cache_file)
+    os.replace(temporary_path, HOST_CACHE_FILE)
+
+
+def __getattr__(name):
+    if name == 'HOST':
+        value = get_host()
+    elif name in _HOST_URLS:
+        value = _HOST_URLS[name]()
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
@@ -4,7 +4,7 @@ from random import randint
 
 from selenium.common.exceptions import TimeoutException
 
-from library.url_endpoints import HOST
+from library import url_endpoints
 
 
 def make_unique_name(name):
@@ -161,4 +161,4 @@ def is_k8s():
     """
     Is this test running in k8s?
     """
-    return "LD_K8S_DIR" in os.environ or "k8s.dev.bb.schrodinger.com" in HOST
+    return "LD_K8S_DIR" in os.environ or "k8s.dev.bb.schrodinger.com" in url_endpoints.HOST
@@ -5,7 +5,8 @@ from selenium.webdriver.common.by import By
 from typing import Callable
 from helpers.selection.grid import GRID_SCROLLBAR_THUMB
 from helpers.selection.modal import EXTJS_LOADING_MASK, LOADING_MASK, LR_LOADING_MASK
-from library import dom, utils
+from library import dom, utils, wait_instrumentation
+from library.polling import DEFAULT_MAX_INTERVAL, poll_until
 from library.dom import DEFAULT_TIMEOUT, ElementCriteriaCondition, \
     LiveDesignWebException
 from library.style import get_inline_style_as_dict
@@ -196,25 +197,27 @@ def until_grid_is_scrolled_to_leftmost(driver):
 
 def until_condition_met(condition_function: Callable, retries: int = 60, interval: int = 1000, driver=None):
     """
-    Retries to execute a callable function with wait time in-between each attempt.
-    Exits if function is successfully executed before maximum number of retries given.
+    Retries to execute a callable function until it doesn't raise an AssertionError, polling quickly at first and then
+    backing off (see library.polling). Exits if function is successfully executed before the attempts run out.
 
     :param condition_function: a callable function
-    :param retries: int, max # of retries
-    :param interval: int, wait time in-between each attempt of execution of the function (in ms)
+    :param retries: int, the timeout is (retries - 1) * interval, i.e. the time the attempts used to be spread over;
+                    at least this many attempts are made, however long they take
+    :param interval: int, in ms, the longest time between attempts when above library.polling.DEFAULT_MAX_INTERVAL
     :param driver: selenium webdriver
     """
-    for i in range(retries):
-        try:
-            if driver:
-                condition_function(driver)
-            else:
-                condition_function()
-            return
-        except AssertionError as e:
-            if i == retries - 1:
-                raise e
-            time.sleep(interval / 1000)
+    if wait_instrumentation.ENABLED:
+        wait_instrumentation.instrumented(_poll_condition, condition_function, retries, interval, driver)
+    else:
+        _poll_condition(condition_function, retries, interval, driver)
+
+
+def _poll_condition(condition_function, retries, interval, driver):
+    poll_until(condition_function,
+               timeout=(retries - 1) * interval / 1000,
+               max_interval=max(interval / 1000, DEFAULT_MAX_INTERVAL),
+               args=(driver,) if driver else (),
+               min_attempts=retries)
 
 
 def sleep_if_k8s(seconds: int):
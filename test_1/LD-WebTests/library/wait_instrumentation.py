@@ -0,0 +1,194 @@
+"""
+Opt-in instrumentation of the waits in library.dom and library.wait (pytest option --instrument_waits).
+
+For every wait it records what was waited for (the selector, or the name of the condition function), the helper that
+waited (the innermost `helpers.*` function on the stack, or the test itself), the number of polls, the number of
+WebDriver commands sent, the elapsed time and whether it timed out. The records are aggregated per selector, per helper
+and per test, and reported at the end of the run, slowest first. Waits nested in another wait (e.g. a dom wait within
+the condition of a library.wait wait) are only part of the outermost one, so that their time isn't counted twice.
+
+When disabled, the waits only pay for reading ENABLED. WebDriver commands are counted by wrapping
+WebDriver.execute, which only happens once the instrumentation is enabled.
+"""
+import json
+import sys
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+ENABLED = False
+
+# Fields of an aggregated entry
+_COUNT, _ELAPSED, _POLLS, _RPCS, _TIMEOUTS, _MAX_ELAPSED = range(6)
+
+# Modules whose frames are skipped when looking for the waiting helper
+_WAIT_MODULES = ('library.dom', 'library.wait', 'library.wait_instrumentation', 'library.ensure')
+
+_rpc_count = 0
+_original_execute = None
+_current_test = None
+# Number of instrumented waits in progress, see instrumented()
+_wait_depth = 0
+_stats = {'selectors': {}, 'helpers': {}, 'tests': {}}
+
+
+def enable():
+    global ENABLED, _original_execute
+    if ENABLED:
+        return
+    _original_execute = WebDriver.execute
+
+    def counting_execute(self, *args, **kwargs):
+        global _rpc_count
+        _rpc_count += 1
+        return _original_execute(self, *args, **kwargs)
+
+    WebDriver.execute = counting_execute
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    if not ENABLED:
+        return
+    WebDriver.execute = _original_execute
+    ENABLED = False
+
+
+def set_current_test(nodeid):
+    global _current_test
+    _current_test = nodeid
+
+
+def instrumented(run_wait, condition, *args):
+    """
+    Run a wait and record it. Only call this when ENABLED.
+
+    :param run_wait: function that performs the wait, called as run_wait(polled_condition, *args)
+    :param condition: the condition that is polled, e.g. an ElementCriteriaCondition
+    :return: what run_wait returns
+    """
+    global _wait_depth
+    if _wait_depth:
+        # Nested wait: its time, polls and WebDriver commands are recorded as part of the outermost wait
+        return run_wait(condition, *args)
+
+    polls = 0
+
+    def polled_condition(*condition_args, **condition_kwargs):
+        nonlocal polls
+        polls += 1
+        return condition(*condition_args, **condition_kwargs)
+
+    rpcs_before = _rpc_count
+    start = time.perf_counter()
+    timed_out = False
+    _wait_depth += 1
+    try:
+        return run_wait(polled_condition, *args)
+    except (TimeoutException, AssertionError):
+        timed_out = True
+        raise
+    finally:
+        _wait_depth -= 1
+        record(describe(condition), find_caller(), polls, _rpc_count - rpcs_before,
+               time.perf_counter() - start, timed_out)
+
+
+def describe(condition):
+    """
+    :return: str, the selector of an ElementCriteriaCondition, or the qualified name of a condition function
+    """
+    locator = getattr(condition, 'locator', None)
+    if isinstance(locator, tuple) and len(locator) == 2:
+        return '{} `{}`'.format(*locator)
+    function = getattr(condition, '__func__', condition)
+    name = getattr(function, '__qualname__', None) or type(condition).__qualname__
+    return '{}.{}'.format(getattr(function, '__module__', '?'), name)
+
+
+def find_caller():
+    """
+    :return: str, module.function of the innermost helper on the stack, or of the first frame outside the wait modules
+             if no helper is involved (e.g. a test that waits directly)
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('helpers.'):
+            return '{}.{}'.format(module, frame.f_code.co_name)
+        if fallback is None and module not in _WAIT_MODULES and not module.startswith('selenium.'):
+            fallback = '{}.{}'.format(module, frame.f_code.co_name)
+        frame = frame.f_back
+    return fallback or '?'
+
+
+def record(subject, caller, polls, rpcs, elapsed, timed_out):
+    for group, key in (('selectors', subject), ('helpers', caller), ('tests', _current_test or '?')):
+        entry = _stats[group].get(key)
+        if entry is None:
+            entry = _stats[group][key] = [0, 0.0, 0, 0, 0, 0.0]
+        entry[_COUNT] += 1
+        entry[_ELAPSED] += elapsed
+        entry[_POLLS] += polls
+        entry[_RPCS] += rpcs
+        entry[_TIMEOUTS] += timed_out
+        entry[_MAX_ELAPSED] = max(entry[_MAX_ELAPSED], elapsed)
+
+
+def get_stats():
+    return _stats
+
+
+def merge(all_stats):
+    """
+    Merge the stats of several processes (e.g. xdist workers) into one
+    """
+    merged = {'selectors': {}, 'helpers': {}, 'tests': {}}
+    for stats in all_stats:
+        for group, entries in stats.items():
+            for key, entry in entries.items():
+                merged_entry = merged[group].get(key)
+                if merged_entry is None:
+                    merged[group][key] = list(entry)
+                    continue
+                for field in (_COUNT, _ELAPSED, _POLLS, _RPCS, _TIMEOUTS):
+                    merged_entry[field] += entry[field]
+                merged_entry[_MAX_ELAPSED] = max(merged_entry[_MAX_ELAPSED], entry[_MAX_ELAPSED])
+    return merged
+
+
+def _as_rows(entries):
+    rows = [{
+        'key': key,
+        'waits': entry[_COUNT],
+        'elapsed_s': round(entry[_ELAPSED], 3),
+        'polls': entry[_POLLS],
+        'webdriver_commands': entry[_RPCS],
+        'timeouts': entry[_TIMEOUTS],
+        'max_elapsed_s': round(entry[_MAX_ELAPSED], 3),
+    } for key, entry in entries.items()]
+    return sorted(rows, key=lambda row: row['elapsed_s'], reverse=True)
+
+
+def format_report(stats, top=15):
+    """
+    :return: list of report lines with the slowest selectors, helpers and tests
+    """
+    lines = []
+    for group, title in (('helpers', 'helpers'), ('selectors', 'selectors'), ('tests', 'tests')):
+        rows = _as_rows(stats[group])[:top]
+        if not rows:
+            continue
+        lines.append('Slowest {} by total wait time:'.format(title))
+        for row in rows:
+            lines.append('  {elapsed_s:>9.1f} s  {waits:>6} waits  {polls:>7} polls  {webdriver_commands:>7} cmds  '
+                         '{timeouts:>4} timeouts  max {max_elapsed_s:.1f} s  {key}'.format(**row))
+    return lines
+
+
+def write_report(stats, path):
+    with open(path, 'w') as report_file:
+        json.dump({group: _as_rows(entries) for group, entries in stats.items()}, report_file, indent=2)
@@ -13,7 +13,11 @@
 
 import locust
 
+from locustload.util.ldlocust import ActionBreakdownReporter
+from locustload.util.ldlocust import CassetteRecording
+from locustload.util.ldlocust import CellWaitReporter
 from locustload.util.ldlocust import RawDataLogger
+from locustload.util.saturation import SaturationMonitor
 
 from locustload.default_user import DefaultUser
 
@@ -28,6 +32,10 @@ from locustload.suites.subtasksets.create_taskset import create_taskset
 from locustload.suites.cleanup import CleanupTaskSet
 
 raw_data_logger = RawDataLogger()
+cell_wait_reporter = CellWaitReporter()
+action_breakdown_reporter = ActionBreakdownReporter()
+cassette_recording = CassetteRecording()
+saturation_monitor = SaturationMonitor()
 
 
 class BasicUser(DefaultUser):
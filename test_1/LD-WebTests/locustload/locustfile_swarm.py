@@ -7,62 +7,29 @@ import helpers.api.actions.row
 import locust
 from locustload import dbprofile
 from locustload.default_user import DefaultUser
+from locustload.default_user import default_wait_time
 from locustload.suites.abstract_taskset import AbstractTaskSet
 from locustload.suites.subtasksets.create_taskset import create_taskset
 from locustload.util import ldlocust
+from locustload.util import loadshape
+from locustload.util.arrival import OpenLoopScheduler
+from locustload.util.ldlocust import ActionBreakdownReporter
+from locustload.util.ldlocust import CassetteRecording
+from locustload.util.ldlocust import CellWaitReporter
 from locustload.util.ldlocust import RawDataLogger
+from locustload.util.loadshape import StagedLoad
+from locustload.util.saturation import SaturationMonitor
 from locustload.util.timed import PropagateError
 
 raw_data_logger = RawDataLogger()
+cell_wait_reporter = CellWaitReporter()
+action_breakdown_reporter = ActionBreakdownReporter()
+cassette_recording = CassetteRecording()
+saturation_monitor = SaturationMonitor()
+open_loop_scheduler = OpenLoopScheduler()
 
 default_repetitions = 10
 
-# Denotes the load shape: default_load or variable_load
-# Command line arg: --load_profile
-# NOTE(kansal): Don't use default_load with single taskset users without specifying --max_run_time
-# since we run them in a loop indefinitely
-load_profile = None
-
-# Denotes the max number of users running concurrently
-# Command line arg: --max_user_count
-max_user_count = None
-
-# Denotes the max number of users that can run concurrently
-# Command line arg: --custom_spawn_rate
-custom_spawn_rate = None
-
-# Denotes max run time for the test
-# Command line arg: --max_run_time
-max_run_time = None
-
-# Denotes the time at which concurrent number of users should reach max_user_count
-# Used when load_profile = variable_load
-# Command line arg: --peak_run_time
-peak_run_time = None
-
-
-@locust.events.init_command_line_parser.add_listener
-def _(parser):
-    parser.add_argument("--load_profile", type=str, env_var="LOCUST_LOAD_PROFILE", default="constant")
-    parser.add_argument("--max_user_count", type=int, env_var="LOCUST_MAX_USER_COUNT", default=1)
-    parser.add_argument("--custom_spawn_rate", type=int, env_var="LOCUST_CUSTOM_SPAWN_RATE", default=1)
-    parser.add_argument("--max_run_time", type=int, env_var="LOCUST_MAX_RUN_TIME", default=None)
-    parser.add_argument("--peak_run_time", type=int, env_var="LOCUST_PEAK_RUN_TIME", default=None)
-
-
-@locust.events.init.add_listener
-def set_options(environment, **kwargs):
-    global load_profile
-    load_profile = environment.parsed_options.load_profile
-    global max_user_count
-    max_user_count = environment.parsed_options.max_user_count
-    global custom_spawn_rate
-    custom_spawn_rate = environment.parsed_options.custom_spawn_rate
-    global max_run_time
-    max_run_time = environment.parsed_options.max_run_time
-    global peak_run_time
-    peak_run_time = environment.parsed_options.peak_run_time
-
 
 def sketch_compound(self):
     self.timed_sketch_compound("[section] 2 - Sketch Compound", False)
@@ -223,54 +190,39 @@ Add3DColumnTaskset = create_taskset(add_3D_column)
 ThreeDStructureSearch = create_taskset(threed_structure_search)
 
 
+# Stages of the run (--load_shape), see locustload.util.loadshape
+staged_load = StagedLoad(raw_data_logger)
+
+
 class SwarmUser(DefaultUser):
+    # Closed-loop unless --arrival_profile is given, see locustload.util.arrival
+    wait_time = open_loop_scheduler.wait_time(default_wait_time)
+    # The names are the ones the stage weights of the load shapes refer to
     tasks = [
-        SketchCompoundTaskset,
-        SwitchAggregationModeTaskset,
-        ReorderColumnsTaskset,
-        SortColumnsTaskset,
-        AddScaffoldTaskset,
-        AddAndRemoveFiltersTaskset,
-        RemoveAndAddRowsTaskset,
-        CreateAndEditFFCTaskset,
-        AddModelTaskset,
-        NumericRangeValueSearchTaskset,
-        NumericDefinedValueSearchTaskset,
-        TextExactValueSearchTaskset,
-        TextDefinedValueSearchTaskset,
-        ListLiveReportsAndProjectsTaskset,
-        AddCompoundsViaImportCSVTaskset,
-        AddCompoundsViaSubstructureSearchTaskset,
-        AddCompoundsViaSimilaritySearchTaskset,
-        CreatePlotTaskset,
-        Add3DColumnTaskset,
-        ThreeDStructureSearch,
+        staged_load.task_picker({
+            "SketchCompoundTaskset": SketchCompoundTaskset,
+            "SwitchAggregationModeTaskset": SwitchAggregationModeTaskset,
+            "ReorderColumnsTaskset": ReorderColumnsTaskset,
+            "SortColumnsTaskset": SortColumnsTaskset,
+            "AddScaffoldTaskset": AddScaffoldTaskset,
+            "AddAndRemoveFiltersTaskset": AddAndRemoveFiltersTaskset,
+            "RemoveAndAddRowsTaskset": RemoveAndAddRowsTaskset,
+            "CreateAndEditFFCTaskset": CreateAndEditFFCTaskset,
+            "AddModelTaskset": AddModelTaskset,
+            "NumericRangeValueSearchTaskset": NumericRangeValueSearchTaskset,
+            "NumericDefinedValueSearchTaskset": NumericDefinedValueSearchTaskset,
+            "TextExactValueSearchTaskset": TextExactValueSearchTaskset,
+            "TextDefinedValueSearchTaskset": TextDefinedValueSearchTaskset,
+            "ListLiveReportsAndProjectsTaskset": ListLiveReportsAndProjectsTaskset,
+            "AddCompoundsViaImportCSVTaskset": AddCompoundsViaImportCSVTaskset,
+            "AddCompoundsViaSubstructureSearchTaskset": AddCompoundsViaSubstructureSearchTaskset,
+            "AddCompoundsViaSimilaritySearchTaskset": AddCompoundsViaSimilaritySearchTaskset,
+            "CreatePlotTaskset": CreatePlotTaskset,
+            "Add3DColumnTaskset": Add3DColumnTaskset,
+            "ThreeDStructureSearch": ThreeDStructureSearch,
+        })
     ]
 
 
-class CustomLoadShape(locust.LoadTestShape):
-
-    def is_within_time_limit(self):
-        if max_run_time == None or max_run_time > self.get_run_time():
-            return True
-        return False
-
-    def constant_load(self):
-        return (max_user_count, custom_spawn_rate)
-
-    def variable_load(self):
-        run_time = self.get_run_time()
-        break_time = max(0, max_run_time - 2 * peak_run_time)
-        if run_time > peak_run_time and run_time < (peak_run_time + break_time):
-            return (0, 1)
-        spawn_rate = max_user_count / peak_run_time
-        return (max_user_count, spawn_rate)
-
-    def tick(self):
-        if self.is_within_time_limit():
-            if load_profile == "constant":
-                return self.constant_load()
-            elif load_profile == "variable":
-                return self.variable_load()
-
-        return None
+class SwarmLoadShape(loadshape.StagedLoadShape):
+    staged_load = staged_load
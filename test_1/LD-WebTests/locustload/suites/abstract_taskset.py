@@ -23,6 +23,9 @@ from locustload.util import timed
 from locustload.util.timed import PropagateError
 from locustload.util.timed import TimedAction
 
+# Number of intervals a push-based cell wait goes without change events before it re-reads all the cells anyway
+PUSH_SAFETY_POLL_FACTOR = 2
+
 
 class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderMixin):
     """
@@ -55,9 +58,10 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
         for i in range(retries):
             try:
                 if i > 0:
-                    time.sleep(interval * 0.001)
+                    timed.sleep(interval * 0.001)
                     count_retries += 1
-                v = condition_function(**kwargs)
+                with timed.polling():
+                    v = condition_function(**kwargs)
                 return v
             except AssertionError as e:  # condition_function() is not satisfied
                 latest_assertion_exception = e
@@ -101,6 +105,148 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
             row_keys_to_statuses_and_values[row_key] = cell
         return row_keys_to_statuses_and_values
 
+    def wait_until_cells_condition(self,
+                                   live_report_id,
+                                   column_ids,
+                                   row_keys,
+                                   condition_function,
+                                   retries=dbprofile.get().common.default_retries,
+                                   interval=dbprofile.get().common.default_wait_interval,
+                                   refresh_after=None):
+        """
+        Wait until condition_function(rows) is met, where rows is a dictionary of row_key -> {column_id: cell} for the
+        given row_keys (or all rows if row_keys is empty) and column_ids. Like in wait_until_condition(), the
+        condition is met when the call does not raise an AssertionError.
+
+        When the user has a websocket subscription to the LiveReport (see ldlocust.User.live_report_change_feed), the
+        wait blocks on change events and only re-reads the rows they affect, at most once per interval (the events
+        that arrive in the meantime are merged into the next read). It still re-reads all rows if no event arrives
+        for PUSH_SAFETY_POLL_FACTOR intervals, in case an event was missed, and every interval until the subscription
+        has delivered events. Without a subscription, this polls through wait_until_condition(). Either way, the
+        number of requests and the detection lag are recorded for the cell wait report of the current timed action.
+
+        :param retries: number of retries; retries * interval is the timeout
+        :param interval: delay in milliseconds
+        :param refresh_after: if given, refresh the LiveReport results every refresh_after seconds while waiting
+        :return: the returned value of condition_function() once it is met
+        """
+        action_name = timed.current_action_name(self.user)
+        start_time = time.time()
+        reads = 0
+        last_refresh_time = start_time
+        last_read_time = start_time
+
+        def read_rows(requested_row_keys):
+            nonlocal reads, last_refresh_time, last_read_time
+            last_read_time = time.time()
+            reads += 1
+            with timed.polling():
+                if refresh_after is not None and time.time() - last_refresh_time > refresh_after:
+                    print('Refreshing LR results on an interval of {}'.format(time.time() - last_refresh_time))
+                    last_refresh_time = time.time()
+                    self.locust_ld_client.refresh_live_report_results([str(live_report_id)])
+                return self.get_live_report_results(live_report_id, projections=column_ids, row_keys=requested_row_keys)
+
+        feed = self.user.live_report_change_feed(live_report_id)
+        if feed is None:
+
+            def condition():
+                return condition_function(read_rows(row_keys))
+
+            try:
+                return self.wait_until_condition(condition, retries=retries, interval=interval)
+            finally:
+                ldlocust.record_cell_wait(action_name, False, reads, time.time() - start_time, interval)
+
+        def rows_to_read(requested, changed_row_keys):
+            # Merge the changed rows into the rows to read next: row_keys to read all of them, None for no read
+            if changed_row_keys is None or rows is None or requested == row_keys:
+                return row_keys
+            if requested:
+                changed_row_keys = changed_row_keys | {str(row_key) for row_key in requested}
+            if not row_keys:
+                return sorted(changed_row_keys)
+            return [row_key for row_key in row_keys if str(row_key) in changed_row_keys] or None
+
+        deadline = start_time + retries * interval * 0.001
+        version = feed.version
+        rows = None
+        requested_row_keys = row_keys
+        event_time = None
+        failures = 0
+        latest_assertion_exception = None
+        latest_non_assertion_exception = None
+        while True:
+            try:
+                if requested_row_keys == row_keys:
+                    rows = dict(read_rows(row_keys))
+                else:
+                    rows.update(read_rows(requested_row_keys))
+                v = condition_function(rows)
+                detection_lag = time.time() - event_time if event_time is not None else None
+                ldlocust.record_cell_wait(action_name, True, reads, time.time() - start_time, interval, detection_lag)
+                return v
+            except AssertionError as e:  # condition_function() is not satisfied
+                latest_assertion_exception = e
+            except timed.exception_list as e:  # a known exception: record and read everything again
+                latest_non_assertion_exception = e
+                failures += 1
+                rows = None
+
+            requested_row_keys = None
+            event_time = None
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not feed.is_usable:
+                    break
+                if requested_row_keys is not None:
+                    # A read is due, but at most one per interval: keep collecting the events until then
+                    timeout = min(remaining, last_read_time + interval * 0.001 - time.time())
+                    if timeout <= 0:
+                        break
+                else:
+                    # Until the subscription has delivered events (it may not be active yet, or the server may not
+                    # push them), fall back to the polling interval
+                    factor = PUSH_SAFETY_POLL_FACTOR if feed.is_connected and feed.events_received else 1
+                    timeout = min(remaining, factor * interval * 0.001)
+                with timed.waiting():
+                    change = feed.wait_for_change(version, timeout)
+                if change is None:
+                    if requested_row_keys is None:  # no event for a while: re-read everything
+                        requested_row_keys = row_keys
+                    break
+                version, changed_row_keys = change
+                requested_row_keys = rows_to_read(requested_row_keys, changed_row_keys)
+                if requested_row_keys is not None and event_time is None:
+                    event_time = time.time()
+                # Otherwise none of the awaited rows changed, keep waiting without a request
+
+            if not feed.is_usable or time.time() >= deadline:
+                break
+
+        ldlocust.record_cell_wait(action_name, True, reads, time.time() - start_time, interval)
+        if time.time() < deadline:
+            # The subscription failed: poll for the rest of the timeout
+            remaining_retries = max(1, int((deadline - time.time()) * 1000 // interval))
+            return self.wait_until_cells_condition(live_report_id,
+                                                   column_ids,
+                                                   row_keys,
+                                                   condition_function,
+                                                   retries=remaining_retries,
+                                                   interval=interval,
+                                                   refresh_after=refresh_after)
+
+        # NOTE: Same messages as wait_until_condition(), so that Locust groups the failures together
+        total_duration = (retries * interval) * 0.001
+        if failures > 0:
+            assert False, \
+                "Timeout ({} seconds) (failed {}/{} retries with non-assertion exceptions, the latest: {})".format(
+                    total_duration, failures, reads, repr(latest_non_assertion_exception))
+        else:
+            assert False, \
+                "Timeout ({} seconds, waiting for assertion: {})".format(
+                    total_duration, repr(latest_assertion_exception))
+
     def wait_for_cell_values(self,
                              live_report_id,
                              addable_column_id,
@@ -118,15 +264,13 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
         :param row_key_to_expected_value: Dictionary of row_key -> expected value.
         :param accept_statuses: list of cell statuses
 
-        Any additional keyword arguments are passed unchanged as parameters to self.wait_until_condition() call,
-        so one can set the delay interval and the number of retries.
+        Any additional keyword arguments are passed unchanged as parameters to self.wait_until_cells_condition()
+        call, so one can set the delay interval and the number of retries.
         """
 
-        def condition():
-            row_keys = list(row_key_to_expected_value.keys())
-            requested_cells = self.get_cells(live_report_id, addable_column_id, row_keys)
+        def condition(rows):
             for row_key, expected_value in row_key_to_expected_value.items():
-                actual_cell = requested_cells[row_key]
+                actual_cell = rows[row_key][addable_column_id]
                 actual_statuses = actual_cell.get("statuses", [])
                 actual_values = actual_cell.get("values", [])
                 print("LR {}. Wait for cell ({},{}). Actual state: {}. Expected values: {}.".format(
@@ -138,7 +282,8 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
                         live_report_id, addable_column_id, row_key, repr(actual_statuses), repr(actual_values),
                         expected_value)
 
-        self.wait_until_condition(condition, **kwargs)
+        self.wait_until_cells_condition(live_report_id, [addable_column_id], list(row_key_to_expected_value.keys()),
+                                        condition, **kwargs)
 
     def wait_for_cell_values_change(self, live_report_id, addable_column_id, row_key_to_old_values,
                                     row_key_to_expected_values, **kwargs):
@@ -152,25 +297,17 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
         :param row_key_to_old_values: Dictionary of row_key -> old value.
         :param row_key_to_expected_value: Dictionary of row_key -> expected value.
 
-        Any additional keyword arguments are passed unchanged as parameters to self.wait_until_condition() call,
-        so one can set the delay interval and the number of retries.
+        Any additional keyword arguments are passed unchanged as parameters to self.wait_until_cells_condition()
+        call, so one can set the delay interval and the number of retries.
         """
 
-        # Waiting time to refresh LR (in the middle of the full waiting time, measured in ms)
+        # Waiting time to refresh LR (in the middle of the full waiting time, measured in s)
         wait_to_refresh = 0.5 * (dbprofile.get().common.default_retries *
                                  dbprofile.get().common.default_wait_interval) * 0.001
 
-        def condition(start_time):
-            current_time = time.time()
-            if current_time - start_time > wait_to_refresh:
-                print('Refreshing LR results on an interval of {}'.format(current_time - start_time))
-                start_time = current_time  # reset the waiting clock
-                self.locust_ld_client.refresh_live_report_results([str(self.live_report_id)])
-
-            row_keys = list(row_key_to_old_values.keys())
-            requested_cells = self.get_cells(live_report_id, addable_column_id, row_keys)
+        def condition(rows):
             for row_key, old_value in row_key_to_old_values.items():
-                actual_value = requested_cells[row_key].get("values", [])
+                actual_value = rows[row_key][addable_column_id].get("values", [])
                 new_value_found = (actual_value != old_value) or (len(actual_value) == 1 and (str(
                     actual_value[0]) == str(row_key_to_expected_values[row_key])))
                 print(
@@ -182,7 +319,11 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
                     "LR {}. Cell ({},{}) contains: {}. Old value: {}".format(
                         live_report_id, addable_column_id, row_key, repr(actual_value), repr(old_value))
 
-        self.wait_until_condition(condition, start_time=time.time())
+        self.wait_until_cells_condition(live_report_id, [addable_column_id],
+                                        list(row_key_to_old_values.keys()),
+                                        condition,
+                                        refresh_after=wait_to_refresh,
+                                        **kwargs)
 
     def wait_for_async_task(self, task_id: int, **kwargs):
         """
@@ -459,9 +600,7 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
         """
         with self.timed(action_name):
 
-            def condition():
-                results = self.get_live_report_results(self.live_report_id, projections=column_ids)
-
+            def condition(results):
                 number_of_cells_with_values = 0
                 for row_key in results:
                     for column_id in column_ids:
@@ -480,7 +619,7 @@ class AbstractTaskSet(locust.SequentialTaskSet, ldlocust.LocustLDClientProviderM
                         minimum_number_of_cells_with_values
                     )
 
-            self.wait_until_condition(condition, **kwargs)
+            self.wait_until_cells_condition(self.live_report_id, column_ids, [], condition, **kwargs)
 
     def timed_change_report_level(self, action_name, live_report_id, new_level, has_parent=True):
         with self.timed(action_name, has_parent):
@@ -0,0 +1,363 @@
+"""
+Aggregates the results of a Locust run in a single streaming pass over "<prefix>_all_data.csv".
+
+Usage (same arguments as locustload.util.jenkins):
+
+    $ python -m locustload.util.aggregate results/locust _BasicUser_01_users
+
+The pass writes:
+- the two JTL files for the Jenkins performance plugin ("<prefix>_1<test>_main_data.jtl" and
+  "<prefix>_2<test>_all_data.jtl"),
+- "<prefix><test>_throughput.csv" with the number of requests/actions per label and time window,
+- "<prefix><test>_summary.json" with the verdict and, per label, the count, error rate, mean, p50/p90/p99/p99.9 and
+  max of the elapsed time and the peak and mean throughput,
+and prints the verdict: the run FAILs when more than 5% of the rows of the main JTL failed.
+
+For runs with a load shape (see locustload.util.loadshape), the summary also has the results of each stage: the rows
+of the main JTL that completed during the stage, with their throughput, error rate and elapsed time percentiles, overall
+and per label. The stage rows themselves are left out of the JTL files.
+
+For open-loop runs (see locustload.util.arrival), the labels of the timed actions also get the same statistics of the
+corrected elapsed time, i.e. the elapsed time plus the start delay of the action's arrival ("corrected_*" keys).
+
+Memory use doesn't depend on the length of the run: elapsed times go to log-linear (HDR-style) histograms with a
+bounded number of buckets, and each throughput window is written out as soon as the next one starts.
+"""
+import csv
+import json
+import math
+import sys
+
+from locustload.util import jenkins
+from locustload.util import rawdata
+
+MAX_FAILURE_RATE = 5  # %
+THROUGHPUT_WINDOW = 60  # seconds
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Values below 2^_SUB_BUCKET_BITS microseconds get a bucket each, larger values get 2^(_SUB_BUCKET_BITS - 1) buckets
+# per power of two, i.e. the recorded values are within 1/64 (1.6%) of the actual ones.
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+
+class Histogram:
+    """
+    Log-linear histogram of elapsed times, in the spirit of HdrHistogram.
+
+    Values are recorded in milliseconds with microsecond resolution.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value_ms):
+        value_us = max(0, int(value_ms * 1000))
+        bucket = _bucket_index(value_us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """
+        :return: the elapsed time (ms) below which the given percentage of the recorded values fall
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                lowest, highest = _bucket_range(bucket)
+                return min(max((lowest + highest) / 2000, self.min), self.max)
+        return self.max
+
+
+def _bucket_index(value_us):
+    if value_us < _SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + ((value_us >> shift) - _SUB_BUCKET_HALF)
+
+
+def _bucket_range(bucket):
+    """
+    :return: lowest and highest value (us) of a bucket
+    """
+    if bucket < _SUB_BUCKET_COUNT:
+        return bucket, bucket
+    shift = (bucket - _SUB_BUCKET_COUNT) // _SUB_BUCKET_HALF + 1
+    mantissa = (bucket - _SUB_BUCKET_COUNT) % _SUB_BUCKET_HALF + _SUB_BUCKET_HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LabelStats:
+    """
+    Aggregated results of one JTL label
+    """
+
+    def __init__(self, label, main):
+        self.label = label
+        self.main = main
+        self.histogram = Histogram()
+        # Elapsed time + schedule delay, for the timed actions of open-loop runs
+        self.corrected_histogram = Histogram()
+        self.failures = 0
+        self.windows = 0
+        self.peak_throughput = 0  # per window
+
+    def to_dict(self, window_seconds):
+        histogram = self.histogram
+        stats = {
+            "label": self.label,
+            "main": self.main,
+            "count": histogram.count,
+            "failures": self.failures,
+            "error_rate": round(self.failures * 100 / histogram.count, 3),
+            "mean_ms": round(histogram.mean, 3),
+            **{"p{}_ms".format(p): round(histogram.percentile(p), 3) for p in PERCENTILES},
+            "max_ms": round(histogram.max, 3),
+            "peak_throughput_per_s": round(self.peak_throughput / window_seconds, 3),
+            "mean_throughput_per_s": round(histogram.count / (max(self.windows, 1) * window_seconds), 3),
+        }
+        corrected = self.corrected_histogram
+        if corrected.count:
+            stats.update({
+                "corrected_count": corrected.count,
+                "corrected_mean_ms": round(corrected.mean, 3),
+                **{"corrected_p{}_ms".format(p): round(corrected.percentile(p), 3) for p in PERCENTILES},
+                "corrected_max_ms": round(corrected.max, 3),
+            })
+        return stats
+
+
+class StageStats:
+    """
+    Aggregated results of the main JTL rows that completed during one load shape stage
+    """
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.histogram = Histogram()
+        self.failures = 0
+        self.labels = {}  # label -> [Histogram, failures]
+
+    def record(self, label, timestamp, response_time, success):
+        self.end = max(self.end, timestamp)
+        self.histogram.record(response_time)
+        self.failures += not success
+        label_stats = self.labels.setdefault(label, [Histogram(), 0])
+        label_stats[0].record(response_time)
+        label_stats[1] += not success
+
+    def to_dict(self):
+        histogram = self.histogram
+        duration = self.end - self.start
+        return {
+            "stage": self.name,
+            "start": round(self.start, 3),
+            "duration_s": round(duration, 3),
+            "count": histogram.count,
+            "failures": self.failures,
+            "error_rate": round(self.failures * 100 / histogram.count, 3) if histogram.count else 0,
+            "throughput_per_s": round(histogram.count / duration, 3) if duration > 0 else None,
+            **{"p{}_ms".format(p): _round(histogram.percentile(p)) for p in PERCENTILES},
+            "labels": [{
+                "label": label,
+                "count": label_histogram.count,
+                "failures": label_failures,
+                **{"p{}_ms".format(p): _round(label_histogram.percentile(p)) for p in PERCENTILES},
+            } for label, (label_histogram, label_failures) in sorted(self.labels.items())],
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class Aggregator:
+    """
+    Consumes raw data rows one at a time, writing the JTL and throughput rows as it goes.
+    """
+
+    def __init__(self, main_jtl_file, all_jtl_file, throughput_file, window_seconds=THROUGHPUT_WINDOW):
+        self.window_seconds = window_seconds
+        self.labels = {}
+        self.main_count = 0
+        self.main_failures = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self._main_jtl = csv.DictWriter(main_jtl_file, jenkins.JTL_FIELDS)
+        self._all_jtl = csv.DictWriter(all_jtl_file, jenkins.JTL_FIELDS)
+        self._throughput = csv.writer(throughput_file)
+        self._main_jtl.writeheader()
+        self._all_jtl.writeheader()
+        self._throughput.writerow(["window_start", "label", "count", "failures"])
+        self._window = None
+        self._window_counts = {}
+        self.stages = []
+        self._stage_names = set()
+
+    def add_row(self, row):
+        if row["http_method"] == rawdata.STAGE_MARKER:
+            self._start_stage(row["name"], float(row["timestamp"]))
+            return
+        jtl_row = jenkins.jtl_row(row)
+        main = not jenkins.is_ignored(row["name"])
+        self._all_jtl.writerow(jtl_row)
+        if main:
+            self._main_jtl.writerow(jtl_row)
+
+        timestamp = float(row["timestamp"])
+        success = row["success"] == "True"
+        label = jtl_row["label"]
+        stats = self.labels.get(label)
+        if stats is None:
+            stats = self.labels[label] = LabelStats(label, main)
+        response_time = float(row["response_time"])
+        stats.histogram.record(response_time)
+        schedule_delay = row.get(rawdata.SCHEDULE_DELAY)
+        if schedule_delay:
+            stats.corrected_histogram.record(response_time + float(schedule_delay))
+        stats.failures += not success
+        if main:
+            self.main_count += 1
+            self.main_failures += not success
+            if self.stages:
+                self.stages[-1].record(label, timestamp, response_time, success)
+
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = max(self.last_timestamp or timestamp, timestamp)
+
+        # Rows are written when requests complete, so timestamps only go back by a request duration at most;
+        # such late rows are counted in the current window.
+        window = int((timestamp - self.first_timestamp) // self.window_seconds)
+        if self._window is None or window > self._window:
+            self._close_window()
+            self._window = window
+        counts = self._window_counts.setdefault(label, [0, 0])
+        counts[0] += 1
+        counts[1] += not success
+
+    def finish(self):
+        self._close_window()
+
+    def _start_stage(self, name, timestamp):
+        # The workers of a distributed run each mark the stages; keep the first marker
+        if name in self._stage_names:
+            return
+        self._stage_names.add(name)
+        if self.stages:
+            self.stages[-1].end = timestamp
+        self.stages.append(StageStats(name, timestamp))
+
+    @property
+    def failure_rate(self):
+        """
+        Failure rate of the rows of the main JTL, in whole percents
+        """
+        return self.main_failures * 100 // self.main_count if self.main_count else 0
+
+    @property
+    def passed(self):
+        return self.failure_rate <= MAX_FAILURE_RATE
+
+    def summary(self):
+        return {
+            "verdict": "pass" if self.passed else "FAIL",
+            "error_rate": self.failure_rate,
+            "max_error_rate": MAX_FAILURE_RATE,
+            "count": self.main_count,
+            "failures": self.main_failures,
+            "duration_s": round((self.last_timestamp or 0) - (self.first_timestamp or 0), 3),
+            "throughput_window_s": self.window_seconds,
+            "labels": [self.labels[label].to_dict(self.window_seconds) for label in sorted(self.labels)],
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    def _close_window(self):
+        if self._window is None:
+            return
+        window_start = self.first_timestamp + self._window * self.window_seconds
+        for label, (count, failures) in sorted(self._window_counts.items()):
+            self._throughput.writerow([int(window_start), label, count, failures])
+            stats = self.labels[label]
+            stats.windows += 1
+            stats.peak_throughput = max(stats.peak_throughput, count)
+        self._window_counts = {}
+
+
+def aggregate(input_file_path, main_jtl_path, all_jtl_path, throughput_path, summary_path):
+    """
+    Read the raw data (including its rotated parts) once and write all the outputs.
+
+    :return: the summary dictionary, as written to summary_path
+    """
+    with open(main_jtl_path, "w") as main_jtl_file, \
+            open(all_jtl_path, "w") as all_jtl_file, \
+            open(throughput_path, "w", newline="") as throughput_file:
+        aggregator = Aggregator(main_jtl_file, all_jtl_file, throughput_file)
+        for row in rawdata.iter_rows(input_file_path):
+            aggregator.add_row(row)
+        aggregator.finish()
+
+    summary = aggregator.summary()
+    summary["input"] = input_file_path
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
+
+
+def format_summary(summary, name):
+    """
+    Format the verdict like the former summary.sh did: the overall status, followed by the actions that failed or
+    whose names start with "[section]", and by the results of the load shape stages.
+    """
+    lines = ["{} (errors: {}%) {}".format(summary["verdict"], summary["error_rate"], name)]
+    for label_stats in summary["labels"]:
+        if not (label_stats["failures"] > 0 or label_stats["label"].startswith("[section]")):
+            continue
+        status = "{}%".format(int(label_stats["error_rate"])) if label_stats["failures"] > 0 else "ok"
+        lines.append("     {:<8} {:<60} Avg: {} p50: {} p90: {} p99: {} Max: {}".format(
+            status, label_stats["label"], round(label_stats["mean_ms"]), round(label_stats["p50_ms"]),
+            round(label_stats["p90_ms"]), round(label_stats["p99_ms"]), round(label_stats["max_ms"])))
+        if "corrected_count" in label_stats:
+            lines.append("     {:<8} {:<60} Avg: {} p50: {} p90: {} p99: {} Max: {}".format(
+                "", "  corrected for schedule delay", round(label_stats["corrected_mean_ms"]),
+                round(label_stats["corrected_p50_ms"]), round(label_stats["corrected_p90_ms"]),
+                round(label_stats["corrected_p99_ms"]), round(label_stats["corrected_max_ms"])))
+    for stage_stats in summary.get("stages", []):
+        percentiles = [stage_stats[key] for key in ("p50_ms", "p90_ms", "p99_ms")]
+        lines.append("     {:<8} {:<60} {} s, {}/s, errors: {}%, p50: {} p90: {} p99: {}".format(
+            "stage", stage_stats["stage"], round(stage_stats["duration_s"]), stage_stats["throughput_per_s"],
+            stage_stats["error_rate"], *("-" if value is None else round(value) for value in percentiles)))
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    results_prefix = sys.argv[1]
+    test_prefix = sys.argv[2]
+    main_jtl_path = results_prefix + "_1" + test_prefix + "_main_data.jtl"
+    summary = aggregate(
+        results_prefix + test_prefix + "_all_data.csv",
+        main_jtl_path,
+        results_prefix + "_2" + test_prefix + "_all_data.jtl",
+        results_prefix + test_prefix + "_throughput.csv",
+        results_prefix + test_prefix + "_summary.json",
+    )
+    print(format_summary(summary, main_jtl_path))
@@ -0,0 +1,199 @@
+"""
+Open-loop (arrival-rate) pacing of Locust users.
+
+By default the suites are closed-loop: a user waits a fixed time after each task, so when LiveDesign slows down the
+offered load drops with it, and the reported latencies leave out the time work would have waited to start
+("coordinated omission"). With --arrival_profile, the users of a locustfile that uses OpenLoopScheduler.wait_time
+instead take their task starts from a schedule of arrivals shared by all the users of the process:
+
+- every wait of a user between Locust tasks becomes a wait for the next unclaimed arrival; the arrivals follow the
+  target rate whatever the response times are. Waits within timed actions (e.g. between the iterations of a task
+  loop) are part of the task, and keep the closed-loop wait time, so that the pacing doesn't end up in the timings,
+- when no user is free at an arrival, it starts late, as soon as a user is. The delay between the intended and the
+  actual start is recorded with the timed actions of the task ("schedule_delay" in the raw data), and
+  locustload.util.aggregate reports the corrected latencies (elapsed time + schedule delay) next to the uncorrected
+  ones.
+
+Provision enough users (see --load_shape) for the target rate: the arrivals only start on time while some user is
+free.
+
+Profiles, in task starts per second:
+
+    constant:2                   2 arrivals per second, evenly spaced
+    poisson:2                    2 arrivals per second on average, exponentially distributed gaps
+    step:60x0.5,120x1,120x2      0.5/s for 60 s, then 1/s for 120 s, then 2/s until the end of the run
+
+In a distributed run, give --arrival_profile to the master: the rate is split between the --expect-workers workers.
+"""
+import itertools
+import random
+import time
+
+import locust
+from locust import runners as locust_runners
+
+from locustload.util import timed
+
+
+def constant_arrivals(rate):
+    """
+    :param rate: arrivals per second
+    :return: iterator of the arrival times, in seconds from the start of the schedule
+    """
+    return (i / rate for i in itertools.count())
+
+
+def poisson_arrivals(rate, rng=None):
+    """
+    :param rate: mean arrivals per second
+    :param rng: random.Random, for reproducible schedules
+    :return: iterator of the arrival times, in seconds from the start of the schedule
+    """
+    rng = rng or random.Random()
+    offset = 0.0
+    while True:
+        yield offset
+        offset += rng.expovariate(rate)
+
+
+def step_arrivals(steps):
+    """
+    :param steps: list of (duration in seconds, arrivals per second); the last rate is kept after the last step. A step
+                  with a rate of 0 has no arrivals.
+    :return: iterator of the arrival times, in seconds from the start of the schedule
+    """
+    step_start = 0.0
+    for position, (duration, rate) in enumerate(steps):
+        last_step = position == len(steps) - 1
+        step_end = float("inf") if last_step else step_start + duration
+        if rate > 0:
+            for i in itertools.count():
+                offset = step_start + i / rate
+                if offset >= step_end:
+                    break
+                yield offset
+        step_start = step_end
+
+
+def parse_profile(profile, rate_scale=1.0):
+    """
+    :param profile: str, e.g. "constant:2", "poisson:2" or "step:60x0.5,120x1", see the module documentation
+    :param rate_scale: factor applied to all the rates, e.g. 1 / number of workers
+    :return: iterator of the arrival times, in seconds from the start of the schedule
+    :raises ValueError: if the profile can't be parsed
+    """
+    kind, _, arguments = profile.partition(":")
+    try:
+        if kind in ("constant", "poisson"):
+            rate = float(arguments) * rate_scale
+            if rate <= 0:
+                raise ValueError("the rate must be positive")
+            return constant_arrivals(rate) if kind == "constant" else poisson_arrivals(rate)
+        if kind == "step":
+            steps = []
+            for step in arguments.split(","):
+                duration, _, rate = step.partition("x")
+                steps.append((float(duration), float(rate) * rate_scale))
+            return step_arrivals(steps)
+    except ValueError as e:
+        raise ValueError("Invalid arrival profile {!r}: {}".format(profile, e))
+    raise ValueError("Unknown arrival profile {!r}, expected constant:<rate>, poisson:<rate> or "
+                     "step:<seconds>x<rate>,...".format(profile))
+
+
+class ArrivalSchedule:
+    """
+    Intended start times of the tasks of one Locust process. The schedule starts when its first arrival is claimed.
+    """
+
+    def __init__(self, offsets):
+        """
+        :param offsets: iterator of the arrival times, in seconds from the start of the schedule
+        """
+        self._offsets = iter(offsets)
+        self.start = None
+        self.claimed = 0
+
+    def claim(self):
+        """
+        :return: the time.monotonic() time at which the next arrival should start, None when the schedule has ended
+        """
+        if self.start is None:
+            self.start = time.monotonic()
+        offset = next(self._offsets, None)
+        if offset is None:
+            return None
+        self.claimed += 1
+        return self.start + offset
+
+
+class OpenLoopScheduler:
+    """
+    Adds the --arrival_profile option and provides the wait_time of open-loop users.
+
+    Usage, in a locustfile:
+
+        open_loop_scheduler = OpenLoopScheduler()
+
+        class SwarmUser(DefaultUser):
+            wait_time = open_loop_scheduler.wait_time(default_wait_time)
+    """
+
+    def __init__(self):
+        self._schedule = None
+        self._profile = None
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._check_profile)
+
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--arrival_profile",
+                            type=str,
+                            env_var="LOCUST_ARRIVAL_PROFILE",
+                            default=None,
+                            help="Start tasks open-loop, following this arrival rate profile (constant:<rate>, "
+                            "poisson:<rate> or step:<seconds>x<rate>,...), instead of waiting after each task; see "
+                            "locustload.util.arrival")
+
+    @staticmethod
+    def _check_profile(environment, **kwargs):
+        profile = getattr(environment.parsed_options, "arrival_profile", None)
+        if profile:
+            parse_profile(profile)
+
+    def wait_time(self, closed_loop_wait_time):
+        """
+        :param closed_loop_wait_time: wait_time function used without --arrival_profile, e.g. locust.constant(0.25)
+        :return: wait_time function for a Locust User
+        """
+
+        def wait_time(user):
+            if timed.current_actions():
+                # A wait within a task: the arrival (and its schedule delay) is that of the task
+                return closed_loop_wait_time(user)
+            schedule = self._get_schedule(user.environment)
+            intended_start = schedule.claim() if schedule is not None else None
+            if intended_start is None:
+                timed.set_schedule_delay(user, None)
+                return closed_loop_wait_time(user)
+            remaining = intended_start - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            timed.set_schedule_delay(user, max(0.0, time.monotonic() - intended_start))
+            return 0
+
+        return wait_time
+
+    def _get_schedule(self, environment):
+        # Read on first use rather than at init: the workers of a distributed run get the options of the master with
+        # their first spawn message
+        options = environment.parsed_options
+        profile = getattr(options, "arrival_profile", None)
+        if profile != self._profile:
+            self._profile = profile
+            self._schedule = None
+            if profile:
+                workers = getattr(options, "expect_workers", 1) or 1
+                is_worker = isinstance(environment.runner, locust_runners.WorkerRunner)
+                self._schedule = ArrivalSchedule(parse_profile(profile, 1 / workers if is_worker else 1.0))
+        return self._schedule
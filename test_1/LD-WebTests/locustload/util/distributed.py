@@ -0,0 +1,164 @@
+"""
+Merging of the raw data of a distributed (--master / --worker) Locust run.
+
+In a distributed run every worker process writes its own raw data, see ldlocust.RawDataLogger:
+
+    <prefix>_all_data.worker-<client id>.csv (and its rotated parts)
+    <prefix>_all_data.worker-<client id>.json, the worker's clock offset to the master, measured at the start of the run
+
+merge() combines them into the usual "<prefix>_all_data.csv", so that locustload.util.aggregate, jenkins and timeline
+read the result of a distributed run like the result of a single process:
+- the timestamps and the start/end times of the timed actions are corrected by the clock offset of their worker,
+- the rows are merged in timestamp order, streaming, without loading the worker files in memory,
+- the locust_user_id of every row is replaced with a small integer that is unique over all workers (the ids the
+  workers record are only unique within one process),
+- every worker marks the start of the load shape stages; only the first marker of each stage is kept.
+
+Usage:
+
+    $ python -m locustload.util.distributed results/locust_all_users_all_data.csv
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+
+from locustload.util import rawdata
+
+WORKER_INFIX = ".worker-"
+METADATA_SUFFIX = ".json"
+
+CLOCK_PROBE_MESSAGE = "ld_clock_probe"
+CLOCK_REPLY_MESSAGE = "ld_clock_reply"
+
+
+def worker_csv_path(csv_path, client_id):
+    """
+    :param csv_path: path of the merged raw data CSV file, "<prefix>_all_data.csv"
+    :param client_id: Locust client id of the worker
+    :return: path of the raw data CSV file of the worker
+    """
+    base = csv_path[:-len(".csv")] if csv_path.endswith(".csv") else csv_path
+    return "{}{}{}.csv".format(base, WORKER_INFIX, client_id)
+
+
+def worker_metadata_path(worker_csv):
+    return worker_csv[:-len(".csv")] + METADATA_SUFFIX
+
+
+def worker_csv_files(csv_path):
+    """
+    :return: paths of the (first parts of the) raw data CSV files of all workers, sorted
+    """
+    pattern = worker_csv_path(glob.escape(csv_path), "*")
+    return sorted(glob.glob(pattern))
+
+
+def write_worker_metadata(worker_csv, client_id, clock_offset, round_trip):
+    """
+    :param worker_csv: path of the raw data CSV file of the worker
+    :param client_id: Locust client id of the worker
+    :param clock_offset: seconds to add to the worker's time.time() to get the master's, None if it wasn't measured
+    :param round_trip: round trip time (s) of the probe the offset comes from, its error is at most half of it
+    """
+    with open(worker_metadata_path(worker_csv), "w") as output_file:
+        json.dump({"client_id": client_id, "clock_offset": clock_offset, "round_trip": round_trip}, output_file)
+
+
+def read_worker_metadata(worker_csv):
+    try:
+        with open(worker_metadata_path(worker_csv)) as input_file:
+            return json.load(input_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _shift(value, offset):
+    return value if value == "" else float(value) + offset
+
+
+def _iter_corrected_rows(worker_index, worker_csv, offset):
+    # Sort keys: the corrected timestamp, then the worker and the position in its file, so that rows are never compared
+    for position, row in enumerate(rawdata.iter_rows(worker_csv)):
+        timestamp = float(row[rawdata.TIMESTAMP]) + offset
+        yield timestamp, worker_index, position, row
+
+
+def merge(csv_path, remove_worker_files=True, **writer_options):
+    """
+    Merge the raw data of the workers into one time-ordered raw data file.
+
+    :param csv_path: path of the merged raw data CSV file, "<prefix>_all_data.csv"
+    :param remove_worker_files: remove the worker files once they are merged, so that a later run with the same prefix
+                                doesn't merge them again
+    :param writer_options: rawdata.RawDataWriter options of the merged file, e.g. rotate_rows or columnar
+    :return: int, number of merged rows
+    """
+    worker_files = worker_csv_files(csv_path)
+    if not worker_files:
+        raise FileNotFoundError("No worker raw data files for {}".format(csv_path))
+
+    offsets = []
+    streams = []
+    for worker_index, worker_csv in enumerate(worker_files):
+        metadata = read_worker_metadata(worker_csv)
+        offset = metadata.get("clock_offset")
+        if offset is None:
+            print("No clock offset for {}; merging its timestamps uncorrected".format(worker_csv))
+            offset = 0.0
+        else:
+            print("Worker {}: clock offset {:+.1f} ms (round trip {:.1f} ms)".format(
+                metadata.get("client_id", worker_csv), offset * 1000,
+                metadata.get("round_trip", 0) * 1000))
+        offsets.append(offset)
+        streams.append(_iter_corrected_rows(worker_index, worker_csv, offset))
+
+    user_ids = {}
+    stage_names = set()
+    row_count = 0
+    writer = rawdata.RawDataWriter(csv_path, **writer_options)
+    try:
+        for timestamp, worker_index, _, row in heapq.merge(*streams):
+            if row[rawdata.HTTP_METHOD] == rawdata.STAGE_MARKER:
+                if row[rawdata.NAME] in stage_names:
+                    continue
+                stage_names.add(row[rawdata.NAME])
+            offset = offsets[worker_index]
+            locust_user_id = row[rawdata.LOCUST_USER_ID]
+            if locust_user_id != "":
+                locust_user_id = user_ids.setdefault((worker_index, locust_user_id), len(user_ids) + 1)
+            # Keep this tuple in the order of rawdata.ALL_FIELDS
+            writer.add_row((timestamp, row[rawdata.NAME], row[rawdata.HTTP_METHOD], row[rawdata.RESPONSE_TIME],
+                            row[rawdata.SUCCESS], locust_user_id, _shift(row[rawdata.START], offset),
+                            _shift(row[rawdata.END], offset), row.get(rawdata.SCHEDULE_DELAY, "")))
+            row_count += 1
+    finally:
+        writer.close()
+
+    if remove_worker_files:
+        for worker_csv in worker_files:
+            for path in rawdata.raw_data_files(worker_csv):
+                os.remove(path)
+            if os.path.exists(worker_metadata_path(worker_csv)):
+                os.remove(worker_metadata_path(worker_csv))
+    print("Merged {} rows of {} workers ({} users) into {}".format(row_count, len(worker_files), len(user_ids),
+                                                                   csv_path))
+    return row_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the raw data of the workers of a distributed Locust run")
+    parser.add_argument("csv_path", help='path of the merged raw data CSV file, "<prefix>_all_data.csv"')
+    parser.add_argument("--keep_worker_files", action="store_true", help="don't remove the worker files")
+    parser.add_argument("--rotate_rows", type=int, default=0, help="rotate the merged file after this many rows")
+    parser.add_argument("--columnar", action="store_true", help="also write the compressed columnar file")
+    args = parser.parse_args()
+    merge(args.csv_path,
+          remove_worker_files=not args.keep_worker_files,
+          rotate_rows=args.rotate_rows,
+          columnar=args.columnar)
+
+
+if __name__ == "__main__":
+    main()
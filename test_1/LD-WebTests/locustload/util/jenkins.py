@@ -1,37 +1,55 @@
 """
 Module/script for converting Locust raw results for Jenkins JTL results for the performance plugin.
+
+NOTE: locustload.util.aggregate writes the same JTL files together with the summary of the run, in a single pass over
+the raw data. This module holds the conversion of a single row.
 """
 import csv
 import sys
 
+from locustload.util import rawdata
+
 _prefixes_to_ignore = {"[poll", "[ignore]", "/livedesign/api/"}
 
+JTL_FIELDS = ["timeStamp", "elapsed", "label", "success", "bytes", "responseCode"]
+
+
+def is_ignored(name):
+    """
+    :return: whether the action or request is left out of the main JTL file
+    """
+    return any(name[:len(prefix_to_ignore)] == prefix_to_ignore for prefix_to_ignore in _prefixes_to_ignore)
+
+
+def jtl_label(row):
+    return "{} ({})".format(row["name"], row["http_method"])
+
+
+def jtl_row(row):
+    # NOTE(fennell): the Jenkins performance plugin is SUPER choosy about the type
+    # of data the appears in the JTL file. If you put a float for elapsed, it will
+    # crash, for example.
+    return {
+        "timeStamp": int(float(row["timestamp"])),
+        "elapsed": int(float(row["response_time"])),
+        "label": jtl_label(row),
+        "success": row["success"].lower(),
+        "bytes": "0",
+        "responseCode": "200",
+    }
+
 
 def convert_data_to_jtl(input_file_path, output_file_path, ignore_certain_prefixes=True):
-    with open(input_file_path, "r") as input_f:
-        with open(output_file_path, "w") as output_f:
-            input_csv = csv.DictReader(input_f)
-            output_csv = csv.DictWriter(
-                output_f,
-                ["timeStamp", "elapsed", "label", "success", "bytes", "responseCode"],
-            )
-            output_csv.writeheader()
-            for row in input_csv:
-                name = row["name"]
-                if ignore_certain_prefixes and any(
-                        name[:len(prefix_to_ignore)] == prefix_to_ignore for prefix_to_ignore in _prefixes_to_ignore):
-                    continue
-                # NOTE(fennell): the Jenkins performance plugin is SUPER choosy about the type
-                # of data the appears in the JTL file. If you put a float for elapsed, it will
-                # crash, for example.
-                output_csv.writerow({
-                    "timeStamp": int(float(row["timestamp"])),
-                    "elapsed": int(float(row["response_time"])),
-                    "label": "{} ({})".format(row["name"], row["http_method"]),
-                    "success": row["success"].lower(),
-                    "bytes": "0",
-                    "responseCode": "200",
-                })
+    with open(output_file_path, "w") as output_f:
+        output_csv = csv.DictWriter(output_f, JTL_FIELDS)
+        output_csv.writeheader()
+        # NOTE: iter_rows also reads the rotated parts of the raw data file, if any
+        for row in rawdata.iter_rows(input_file_path):
+            if row["http_method"] == rawdata.STAGE_MARKER:
+                continue
+            if ignore_certain_prefixes and is_ignored(row["name"]):
+                continue
+            output_csv.writerow(jtl_row(row))
 
 
 if __name__ == "__main__":
@@ -8,13 +8,25 @@ import contextlib
 import csv
 import time
 
+import gevent
 import ldclient
 from ldclient.__experimental.experimental_client import ExperimentalLDClient
 import locust
 from locust import exception as locust_exception
+from locust import runners as locust_runners
 
 from locustload import dbprofile
 from locustload.livedesign import paths
+from locustload.util import distributed
+from locustload.util import ldwebsockets
+from locustload.util import rawdata
+from locustload.util import timed
+
+CELL_WAIT_MODE_PUSH = "push"
+CELL_WAIT_MODE_POLL = "poll"
+
+# Seconds before a user tries to subscribe to a LiveReport again after its subscription failed
+_CHANGE_FEED_RETRY_INTERVAL = 60
 
 
 class LocustLDClient(ExperimentalLDClient):
@@ -70,6 +82,8 @@ class User(locust.HttpUser):
     abstract = True  # So that Locust doesn't run tests with this empty class
     locust_ld_client: LocustLDClient = None
     stop_on_last_user = 1
+    _live_report_change_feed: ldwebsockets.LiveReportChangeFeed = None
+    _live_report_change_feed_failed_at = None
 
     def on_start(self):
         self.locust_ld_client = LocustLDClient(
@@ -79,15 +93,59 @@ class User(locust.HttpUser):
             password=dbprofile.get().common.password,
             model_encoder=ldclient.models.ModelEncoder,
         )
-        if hasattr(self.environment.parsed_options, "load_profile"):
-            self.stop_on_last_user = self.environment.parsed_options.load_profile == "variable"
+        if self.environment.shape_class is not None:
+            # The load shape ends the run, and may go through stages without users
+            self.stop_on_last_user = 0
 
     def on_stop(self):
+        if self._live_report_change_feed is not None:
+            self._live_report_change_feed.close()
+            self._live_report_change_feed = None
         runner = self.environment.runner
         if runner.user_count <= 1 and self.stop_on_last_user == 1:
             print("This is the last user to stop; quitting")
             self.environment.runner.quit()
 
+    def context(self):
+        # Tags every request event with the timed actions it is sent in, see ActionBreakdownReporter
+        return {"action_stack": timed.current_action_stack()}
+
+    def wait(self):
+        # A wait within timed actions, e.g. between the iterations of a task loop, is part of their wait time
+        with timed.waiting():
+            super().wait()
+
+    def live_report_change_feed(self, live_report_id):
+        """
+        Get the websocket change feed of the given LiveReport, subscribing to it if necessary.
+
+        A user keeps at most one subscription open, for the LiveReport it waited on last.
+
+        :return: ldwebsockets.LiveReportChangeFeed, or None if cell waits should poll instead (polling mode, or the
+                 subscription has failed recently)
+        """
+        if getattr(self.environment.parsed_options, "cell_wait_mode", CELL_WAIT_MODE_POLL) != CELL_WAIT_MODE_PUSH:
+            return None
+
+        feed = self._live_report_change_feed
+        if feed is not None:
+            if feed.live_report_id == str(live_report_id) and feed.is_usable:
+                return feed
+            if not feed.is_usable:
+                print("LiveReport {} subscription failed ({}); polling instead".format(
+                    feed.live_report_id, repr(feed.failure)))
+                self._live_report_change_feed_failed_at = time.monotonic()
+            feed.close()
+            self._live_report_change_feed = None
+
+        failed_at = self._live_report_change_feed_failed_at
+        if failed_at is not None and time.monotonic() - failed_at < _CHANGE_FEED_RETRY_INTERVAL:
+            return None
+
+        cookie = "; ".join("{}={}".format(c.name, c.value) for c in self.client.cookies)
+        self._live_report_change_feed = ldwebsockets.LiveReportChangeFeed(self.environment.host, live_report_id, cookie)
+        return self._live_report_change_feed
+
 
 class LocustLDClientProviderMixin:
     """
@@ -131,29 +189,89 @@ class RawDataLogger:
     """
     Class that enables writing all Locust raw data to a CSV file.
 
-    The class listens to Locust events (request and quitting), stores all Locust requests,
-    and writes them in a CSV file when Locust process exits. One instance of this logger
-    is created in locustfile.py.
+    The class listens to Locust events (init, request and quitting) and streams every Locust request to
+    "<csv prefix>_all_data.csv" while the test runs, see locustload.util.rawdata. Rows are buffered as tuples and
+    written in chunks, so memory use stays bounded on long runs and a crash loses at most one chunk. One instance of
+    this logger is created in locustfile.py.
+
+    In a distributed run, the master writes no raw data: every worker writes its own file next to the master's (the
+    workers get --raw_data_prefix rather than --csv, whose stats files would clash with the master's) and measures its
+    clock offset to the master. locustload.util.distributed merges the worker files into "<csv prefix>_all_data.csv"
+    after the run.
     """
 
-    _TIMESTAMP = "timestamp"
-    _NAME = "name"
-    _HTTP_METHOD = "http_method"
-    _RESPONSE_TIME = "response_time"
-    _SUCCESS = "success"
-    _LOCUST_USER_ID = 'locust_user_id'
-    _START = 'start'
-    _END = 'end'
-    _ALL_FIELDS = [_TIMESTAMP, _NAME, _HTTP_METHOD, _RESPONSE_TIME, _SUCCESS, _LOCUST_USER_ID, _START, _END]
+    _TIMESTAMP = rawdata.TIMESTAMP
+    _NAME = rawdata.NAME
+    _HTTP_METHOD = rawdata.HTTP_METHOD
+    _RESPONSE_TIME = rawdata.RESPONSE_TIME
+    _SUCCESS = rawdata.SUCCESS
+    _LOCUST_USER_ID = rawdata.LOCUST_USER_ID
+    _START = rawdata.START
+    _END = rawdata.END
+    _SCHEDULE_DELAY = rawdata.SCHEDULE_DELAY
+    _ALL_FIELDS = rawdata.ALL_FIELDS
 
     def __init__(self):
-        self._data = []
+        self._writer = None
+        self._clock_probe = None
         # NOTE(fennell): all listener functions have **kwargs captures to aid with forward
         # compatibility with future versions of Locust, which may pass additional arguments
         # to the handler.
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._open)
         locust.events.request.add_listener(self._request_handler)
         locust.events.quitting.add_listener(self._write)
 
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--raw_data_flush_rows",
+                            type=int,
+                            env_var="LOCUST_RAW_DATA_FLUSH_ROWS",
+                            default=1000,
+                            help="Number of buffered raw data rows that triggers a write to disk")
+        parser.add_argument("--raw_data_fsync_interval",
+                            type=float,
+                            env_var="LOCUST_RAW_DATA_FSYNC_INTERVAL",
+                            default=10,
+                            help="Seconds between fsync calls on the raw data file")
+        parser.add_argument("--raw_data_rotate_rows",
+                            type=int,
+                            env_var="LOCUST_RAW_DATA_ROTATE_ROWS",
+                            default=0,
+                            help="Start a new raw data file part after this many rows, 0 to never rotate")
+        parser.add_argument("--raw_data_columnar",
+                            action="store_true",
+                            env_var="LOCUST_RAW_DATA_COLUMNAR",
+                            default=False,
+                            help="Also write the raw data to a compressed columnar file")
+        parser.add_argument("--raw_data_prefix",
+                            type=str,
+                            env_var="LOCUST_RAW_DATA_PREFIX",
+                            default=None,
+                            help="Prefix of the raw data files, the --csv prefix by default. Give it to the workers "
+                            "of a distributed run, see locustload.util.distributed")
+
+    def _open(self, environment, runner=None, **kwargs):
+        runner = runner or environment.runner
+        if isinstance(runner, locust_runners.MasterRunner):
+            # The workers write the raw data; the master only answers their clock probes
+            runner.register_message(distributed.CLOCK_PROBE_MESSAGE, _answer_clock_probe)
+            return
+        options = environment.parsed_options
+        prefix = None if options is None else options.raw_data_prefix or options.csv_prefix
+        if prefix is None:
+            return
+        csv_path = prefix + "_all_data.csv"
+        # Decided here, at init: the spawn messages of the master later overwrite the custom options of the workers
+        if isinstance(runner, locust_runners.WorkerRunner):
+            csv_path = distributed.worker_csv_path(csv_path, runner.client_id)
+            self._clock_probe = ClockOffsetProbe(runner)
+        self._writer = rawdata.RawDataWriter(csv_path,
+                                             flush_rows=options.raw_data_flush_rows,
+                                             fsync_interval=options.raw_data_fsync_interval,
+                                             rotate_rows=options.raw_data_rotate_rows,
+                                             columnar=options.raw_data_columnar)
+
     def _success_handler(self, **kwargs):
         self._add_data_entry(success=True, **kwargs)
 
@@ -166,28 +284,317 @@ class RawDataLogger:
         locust_user_id = timed_action_info['locust_user_id']
         start = timed_action_info['start']
         end = timed_action_info['end']
-        self._add_data_entry(request_type, name, response_time, success, locust_user_id, start, end)
-
-    def _add_data_entry(self, request_type, name, response_time, success, locust_user_id, start, end):
-        self._data.append({
-            self._TIMESTAMP: time.time(),
-            self._NAME: name,
-            self._HTTP_METHOD: request_type,
-            self._RESPONSE_TIME: response_time,
-            self._SUCCESS: success,
-            self._LOCUST_USER_ID: locust_user_id,
-            self._START: start,
-            self._END: end,
-        })
+        schedule_delay = timed_action_info.get('schedule_delay', '')
+        self._add_data_entry(request_type, name, response_time, success, locust_user_id, start, end, schedule_delay)
+
+    def _add_data_entry(self,
+                        request_type,
+                        name,
+                        response_time,
+                        success,
+                        locust_user_id,
+                        start,
+                        end,
+                        schedule_delay=''):
+        if self._writer is None:
+            return
+        # Keep this tuple in the order of rawdata.ALL_FIELDS
+        self._writer.add_row(
+            (time.time(), name, request_type, response_time, success, locust_user_id, start, end, schedule_delay))
+
+    def add_stage_marker(self, stage_name):
+        """
+        Mark the start of a load shape stage in the raw data, see locustload.util.loadshape.
+        """
+        self._add_data_entry(rawdata.STAGE_MARKER, stage_name, 0, True, '', '', '')
 
     def _write(self, environment, **kwargs):
-        if environment.parsed_options.csv_prefix is not None:
-            output_file_path = environment.parsed_options.csv_prefix + "_all_data.csv"
-            with open(output_file_path, "w") as f:
-                csv_writer = csv.DictWriter(f, self._ALL_FIELDS)
-                csv_writer.writeheader()
-                for data in self._data:
-                    csv_writer.writerow(data)
+        if self._writer is not None:
+            self._writer.close()
+            if self._clock_probe is not None:
+                distributed.write_worker_metadata(self._writer.csv_path, self._clock_probe.client_id,
+                                                  self._clock_probe.offset, self._clock_probe.round_trip)
+
+
+def _answer_clock_probe(environment, msg, **kwargs):
+    reply = {"worker_time": msg.data["worker_time"], "master_time": time.time()}
+    environment.runner.send_message(distributed.CLOCK_REPLY_MESSAGE, reply, client_id=msg.node_id)
+
+
+class ClockOffsetProbe:
+    """
+    Measures the clock offset of a worker to its master, NTP style.
+
+    The worker sends a few probes with its time; the master replies with its own. Assuming the reply was stamped
+    half-way through the round trip, the offset is master time - (sent + received) / 2, with an error of at most half
+    the round trip. The probe with the shortest round trip wins.
+
+    The probes are sent once the test starts on the worker, i.e. on the first spawn message of the master: the workers
+    are started before the master, and probes sent earlier would wait for it in the message queue, adding its startup
+    time to their round trips.
+    """
+
+    def __init__(self, runner, probes=5, interval=0.5):
+        """
+        :param runner: locust.runners.WorkerRunner
+        :param probes: number of probes to send
+        :param interval: seconds between probes
+        """
+        self.client_id = runner.client_id
+        self.offset = None
+        self.round_trip = None
+        self._runner = runner
+        self._probes = probes
+        self._interval = interval
+        self._started = False
+        runner.register_message(distributed.CLOCK_REPLY_MESSAGE, self._on_reply)
+        locust.events.test_start.add_listener(self._start)
+
+    def _start(self, environment, **kwargs):
+        # test_start fires again when a stopped test is restarted; one measurement is enough
+        if self._started:
+            return
+        self._started = True
+        gevent.spawn(self._send_probes, self._probes, self._interval)
+
+    def _send_probes(self, probes, interval):
+        for _ in range(probes):
+            self._runner.send_message(distributed.CLOCK_PROBE_MESSAGE, {"worker_time": time.time()})
+            gevent.sleep(interval)
+
+    def _on_reply(self, environment, msg, **kwargs):
+        received = time.time()
+        sent = msg.data["worker_time"]
+        round_trip = received - sent
+        if self.round_trip is None or round_trip < self.round_trip:
+            self.round_trip = round_trip
+            self.offset = msg.data["master_time"] - (sent + received) / 2
+
+
+class CellWaitReporter:
+    """
+    Class that adds the --cell_wait_mode option and reports how the LiveReport cell waits performed.
+
+    In "push" mode the cell waits of AbstractTaskSet block on LiveReport websocket change events and only re-read the
+    affected cells, at most once per wait interval; "poll" mode (the default until push mode is validated against
+    the polling baseline, and the fallback when the subscription fails) polls the results on a fixed interval. For
+    every timed action the reporter prints and writes to "<csv prefix>_cell_waits.csv":
+    - the number of result requests sent, and how many a fixed-interval poll would have needed in the same time,
+    - the detection lag of push waits (time from the deciding change event to the condition being met), to be
+      compared with the error bound of polling, which is one wait interval.
+
+    One instance of this reporter is created in locustfile.py.
+    """
+
+    _FIELDS = [
+        "action", "waits", "push_waits", "result_requests", "polling_requests_estimate", "requests_avoided",
+        "mean_detection_lag_ms", "max_detection_lag_ms", "polling_error_bound_ms"
+    ]
+
+    def __init__(self):
+        self._csv_prefix = None
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._init)
+        locust.events.quitting.add_listener(self._report)
+
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--cell_wait_mode",
+                            type=str,
+                            env_var="LOCUST_CELL_WAIT_MODE",
+                            choices=[CELL_WAIT_MODE_PUSH, CELL_WAIT_MODE_POLL],
+                            default=CELL_WAIT_MODE_POLL,
+                            help="How LiveReport cell waits detect changes: websocket events or fixed-interval polling")
+
+    def _init(self, environment, **kwargs):
+        options = environment.parsed_options
+        self._csv_prefix = options.csv_prefix if options is not None else None
+
+    def _report(self, environment, **kwargs):
+        if not _cell_wait_stats:
+            return
+        rows = [self._build_row(action_name, stats) for action_name, stats in sorted(_cell_wait_stats.items())]
+        print("Cell waits (requests avoided / detection lag):")
+        for row in rows:
+            print("  {action}: {result_requests} result requests instead of ~{polling_requests_estimate} "
+                  "({requests_avoided} avoided), {push_waits}/{waits} push waits, detection lag mean "
+                  "{mean_detection_lag_ms} ms / max {max_detection_lag_ms} ms vs polling error up to "
+                  "{polling_error_bound_ms} ms".format(**row))
+        if self._csv_prefix is not None:
+            with open(self._csv_prefix + "_cell_waits.csv", "w", newline="") as output_file:
+                writer = csv.DictWriter(output_file, fieldnames=self._FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+
+    @staticmethod
+    def _build_row(action_name, stats):
+        lag_count = stats["detection_lag_count"]
+        return {
+            "action": action_name,
+            "waits": stats["waits"],
+            "push_waits": stats["push_waits"],
+            "result_requests": stats["reads"],
+            "polling_requests_estimate": stats["polling_reads"],
+            "requests_avoided": max(0, stats["polling_reads"] - stats["reads"]),
+            "mean_detection_lag_ms": round(stats["detection_lag_sum"] / lag_count, 1) if lag_count else "",
+            "max_detection_lag_ms": round(stats["detection_lag_max"], 1) if lag_count else "",
+            "polling_error_bound_ms": stats["interval"],
+        }
+
+
+class ActionBreakdownReporter:
+    """
+    Class that reports where the time of the timed actions goes: for every action name it prints and writes to
+    "<csv prefix>_action_breakdown.csv" (one file per worker in distributed runs) the mean of
+    - request_ms: the response times of the requests sent within the action, other than polls,
+    - polling_ms: the response times of the requests sent while waiting for a condition (within [poll ...] actions,
+      wait_until_condition, wait_until_cells_condition and library.polling.poll_until), and the waits within the
+      action (wait_ms: sleeps between polls, waits for LiveReport change events, user waits between loop iterations),
+    - client_overhead_ms: the rest of the elapsed time, spent in the client (e.g. building requests, parsing
+      responses) or waiting for the event loop,
+    and the number of requests, polls and response bytes.
+
+    The requests are attributed by the "action_stack" the User adds to the context of every request event. Requests
+    sent concurrently (e.g. by submit_in_chunks) add up to more than the elapsed time; the client overhead is then 0.
+
+    One instance of this reporter is created in each locustfile.
+    """
+
+    _FIELDS = [
+        "action", "count", "mean_ms", "request_ms", "polling_ms", "wait_ms", "client_overhead_ms", "requests",
+        "poll_requests", "response_kb"
+    ]
+
+    def __init__(self):
+        self._csv_path = None
+        # The polling of the helpers.api actions (library.polling) is polling and waiting of the actions too
+        from library import polling
+        polling.instrument(timed.polling, timed.waiting)
+        locust.events.init.add_listener(self._init)
+        locust.events.request.add_listener(self._attribute_request)
+        locust.events.quitting.add_listener(self._report)
+
+    def _init(self, environment, runner=None, **kwargs):
+        runner = runner or environment.runner
+        options = environment.parsed_options
+        prefix = options and (getattr(options, "raw_data_prefix", None) or options.csv_prefix)
+        if prefix is not None:
+            self._csv_path = prefix + "_action_breakdown.csv"
+            if isinstance(runner, locust_runners.WorkerRunner):
+                self._csv_path = distributed.worker_csv_path(self._csv_path, runner.client_id)
+
+    @staticmethod
+    def _attribute_request(response_time, response_length, context, **kwargs):
+        # The timed actions are reported as requests too; their time is already that of the actions around them
+        if "action" not in context and context.get("action_stack"):
+            timed.record_request(response_time, response_length)
+
+    def _report(self, environment, **kwargs):
+        breakdown = timed.action_breakdown()
+        if not breakdown:
+            return
+        rows = [self._build_row(action_name, totals) for action_name, totals in sorted(breakdown.items())]
+        print("Timed actions (mean time in requests / polling / client):")
+        for row in rows:
+            print("  {action} ({count}x, {mean_ms} ms): requests {request_ms} ms, polling {polling_ms} ms (waiting "
+                  "{wait_ms} ms), client {client_overhead_ms} ms; {requests} requests, {poll_requests} polls, "
+                  "{response_kb} kB".format(**row))
+        if self._csv_path is not None:
+            with open(self._csv_path, "w", newline="") as output_file:
+                writer = csv.DictWriter(output_file, fieldnames=self._FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+
+    @staticmethod
+    def _build_row(action_name, totals):
+        count = totals["count"]
+        polling = totals["poll_request_time"] + totals["wait_time"]
+        client_overhead = max(0.0, totals["duration"] - totals["request_time"] - polling)
+        return {
+            "action": action_name,
+            "count": count,
+            "mean_ms": round(totals["duration"] * 1000 / count, 1),
+            "request_ms": round(totals["request_time"] * 1000 / count, 1),
+            "polling_ms": round(polling * 1000 / count, 1),
+            "wait_ms": round(totals["wait_time"] * 1000 / count, 1),
+            "client_overhead_ms": round(client_overhead * 1000 / count, 1),
+            "requests": round(totals["requests"] / count, 1),
+            "poll_requests": round(totals["poll_requests"] / count, 1),
+            "response_kb": round(totals["request_bytes"] / 1024 / count, 1),
+        }
+
+
+class CassetteRecording:
+    """
+    Records the HTTP traffic of the run to a cassette when --record_cassette is given, see library.api.cassette.
+
+    One instance of this listener is created in locustfile.py.
+    """
+
+    def __init__(self):
+        self._recorder = None
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._start)
+        locust.events.quitting.add_listener(self._stop)
+
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--record_cassette",
+                            type=str,
+                            env_var="LOCUST_RECORD_CASSETTE",
+                            default=None,
+                            help="Record the HTTP traffic of the run to this cassette file, for the replay server of "
+                            "library.api.cassette")
+
+    def _start(self, environment, **kwargs):
+        options = environment.parsed_options
+        if options is None or not options.record_cassette:
+            return
+        # Imported here since the rest of the library isn't needed to run Locust
+        from library.api.cassette import CassetteRecorder
+        self._recorder = CassetteRecorder(options.record_cassette).start()
+
+    def _stop(self, environment, **kwargs):
+        if self._recorder is not None:
+            print("Recorded {} requests to {}".format(self._recorder.recorded, self._recorder.path))
+            self._recorder.stop()
+
+
+_cell_wait_stats = {}
+
+
+def record_cell_wait(action_name, push, reads, duration, interval, detection_lag=None):
+    """
+    Record the outcome of one LiveReport cell wait for CellWaitReporter.
+
+    :param action_name: name of the timed action the wait belongs to
+    :param push: whether the wait was driven by websocket change events
+    :param reads: number of result requests the wait sent
+    :param duration: duration of the wait (s)
+    :param interval: polling interval of the wait (ms)
+    :param detection_lag: time from the deciding change event to the condition being met (s), for push waits
+    """
+    stats = _cell_wait_stats.setdefault(
+        action_name or "(no action)", {
+            "waits": 0,
+            "push_waits": 0,
+            "reads": 0,
+            "polling_reads": 0,
+            "detection_lag_sum": 0,
+            "detection_lag_count": 0,
+            "detection_lag_max": 0,
+            "interval": interval
+        })
+    stats["waits"] += 1
+    stats["push_waits"] += int(push)
+    stats["reads"] += reads
+    # A fixed-interval poll reads once right away and then once per interval
+    stats["polling_reads"] += 1 + int(duration * 1000 // interval)
+    stats["interval"] = interval
+    if detection_lag is not None:
+        stats["detection_lag_sum"] += detection_lag * 1000
+        stats["detection_lag_count"] += 1
+        stats["detection_lag_max"] = max(stats["detection_lag_max"], detection_lag * 1000)
 
 
 def stop_user():
@@ -6,9 +6,14 @@ import json
 import threading
 import time
 from contextlib import contextmanager
+from urllib.parse import urlsplit
 
 import requests
 import websockets
+from websockets.sync.client import connect as connect_websocket
+
+# Number of change events kept by a LiveReportChangeFeed. Waiters that fall further behind re-read everything.
+_MAX_RECORDED_CHANGES = 1000
 
 
 @contextmanager
@@ -122,6 +127,164 @@ class _LiveReportSubscriptionThread(threading.Thread):
             await asyncio.sleep(0.1)
 
 
+class LiveReportChangeFeed:
+    """
+    Gevent-compatible LiveReport subscription that records the change events pushed by the server, so load tests can
+    block on them instead of polling the LiveReport results.
+
+    Unlike _LiveReportSubscriptionThread, this uses the synchronous websockets client, which only relies on sockets
+    and threads. Both are cooperative once Locust has monkey-patched the standard library, so the connection is served
+    by a greenlet next to the Locust users. Usage:
+
+        feed = LiveReportChangeFeed(host, live_report_id, cookie)
+        version = feed.version
+        # read the cells
+        change = feed.wait_for_change(version, timeout=10)
+        if change is not None:
+            version, changed_row_keys = change  # changed_row_keys is None when any row may have changed
+        feed.close()
+
+    The feed only subscribes to the results of the LiveReport, not to the project and LiveReport metadata events of
+    the UI subscription, so that the waits of many users don't wake up on every project event.
+
+    Every successful connect also counts as a change of all rows, since events may have been missed before the
+    subscription became active.
+    """
+
+    def __init__(self, host, live_report_id, cookie, open_timeout=10):
+        """
+        :param host: LiveDesign host, e.g. http://localhost:9080
+        :param live_report_id: id of the LiveReport to subscribe to
+        :param cookie: value of the Cookie header of a logged-in session
+        :param open_timeout: seconds to wait for the websocket connection to open
+        """
+        self.live_report_id = str(live_report_id)
+        self.version = 0
+        self.events_received = 0  # change events pushed by the server, not counting the connects
+        self.failure = None
+        self._host = host
+        self._cookie = cookie
+        self._open_timeout = open_timeout
+        self._changes = []  # (version, set of row keys or None)
+        self._connected = False
+        self._closed = False
+        self._websocket = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def is_connected(self):
+        return self._connected
+
+    @property
+    def is_usable(self):
+        """
+        False once the connection has failed or been closed, in which case callers should fall back to polling.
+        """
+        return self.failure is None and not self._closed
+
+    def wait_for_change(self, since_version, timeout):
+        """
+        Block until a change newer than since_version has been recorded or the timeout has passed.
+
+        :param since_version: the feed version the caller has already seen
+        :param timeout: seconds to wait
+        :return: tuple of (new version, set of changed row keys or None if any row may have changed), or None if
+                 nothing changed before the timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > since_version or not self.is_usable, timeout)
+            if self.version <= since_version:
+                return None
+            changes = [row_keys for version, row_keys in self._changes if version > since_version]
+            if len(changes) < self.version - since_version or any(row_keys is None for row_keys in changes):
+                return self.version, None
+            return self.version, set().union(*changes)
+
+    def close(self):
+        self._closed = True
+        if self._websocket is not None:
+            self._websocket.close()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        parts = urlsplit(self._host)
+        scheme = "wss" if parts.scheme == "https" else "ws"
+        try:
+            with connect_websocket("{}://{}/livedesign/api/websocket".format(scheme, parts.netloc),
+                                   additional_headers={
+                                       "Origin": "{}://{}".format(parts.scheme, parts.netloc),
+                                       "Cookie": self._cookie
+                                   },
+                                   open_timeout=self._open_timeout) as websocket:
+                self._websocket = websocket
+                websocket.send(_build_live_report_results_subscription_message(self.live_report_id))
+                self._connected = True
+                self._record_change(None)
+                for message in websocket:
+                    if self._closed:
+                        break
+                    relevant, row_keys = _parse_live_report_change(message, self.live_report_id)
+                    if relevant:
+                        self.events_received += 1
+                        self._record_change(row_keys)
+        except (websockets.exceptions.WebSocketException, OSError, TimeoutError) as e:
+            if not self._closed:
+                self.failure = e
+        finally:
+            self._connected = False
+            with self._condition:
+                self._condition.notify_all()
+
+    def _record_change(self, row_keys):
+        with self._condition:
+            self.version += 1
+            self._changes.append((self.version, row_keys))
+            del self._changes[:-_MAX_RECORDED_CHANGES]
+            self._condition.notify_all()
+
+
+def _parse_live_report_change(message, live_report_id):
+    """
+    Extract the affected row keys from a websocket message.
+
+    The message format isn't documented, so this is deliberately lenient: messages that name a different LiveReport
+    are ignored, and the row keys are collected from any "row_key"/"row_keys" entries. When the message can't be
+    parsed or doesn't name any rows, all rows are considered changed; since LiveReportChangeFeed only subscribes to
+    the results of its LiveReport, such messages are result changes too.
+
+    :return: tuple of (whether the message concerns the LiveReport, set of row keys or None)
+    """
+    try:
+        payload = json.loads(message)
+    except (TypeError, ValueError):
+        return True, None
+
+    row_keys = set()
+    live_report_ids = set()
+    pending = [payload]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key == "row_key" and isinstance(value, (str, int)):
+                    row_keys.add(str(value))
+                elif key == "row_keys" and isinstance(value, list):
+                    row_keys.update(str(row_key) for row_key in value if isinstance(row_key, (str, int)))
+                elif key == "live_report_id" and isinstance(value, (str, int)):
+                    live_report_ids.add(str(value))
+                else:
+                    pending.append(value)
+
+    if live_report_ids and live_report_id not in live_report_ids:
+        return False, None
+    return True, (row_keys or None)
+
+
 def _build_live_report_subscription_message(live_report_id: str, project_ids: list) -> str:
     """
     Build the websocket message that when sent to the BE results in the LR being subscribed to.
@@ -158,29 +321,44 @@ def _build_live_report_subscription_message(live_report_id: str, project_ids: li
             "SCAFFOLD": project_ids,
             "TAG": project_ids,
         },
-        "live_report_result_subscriptions": [{
-            "live_report_id":
-                live_report_id,
-            "report_level":
-                "parent",
-            "view_details": [
-                {
-                    "type": "page",
-                    "row_return_type": "FROZEN_ONLY",
-                    "projections": [],
-                },
-                {
-                    "type": "page",
-                    "row_return_type": "ALL",
-                    "projections": [],
-                    "start": 0,
-                    "size": 250,
-                },
-                {
-                    "type": "page",
-                    "row_return_type": "ALL",
-                    "projections": []
-                },
-            ],
-        }],
+        "live_report_result_subscriptions": _live_report_result_subscriptions(live_report_id),
     })
+
+
+def _build_live_report_results_subscription_message(live_report_id: str) -> str:
+    """
+    Build the websocket message that subscribes to the results of the LR only, without its metadata and project events.
+    """
+    return json.dumps({
+        "live_report_subscriptions": {},
+        "project_subscriptions": {},
+        "live_report_result_subscriptions": _live_report_result_subscriptions(live_report_id),
+    })
+
+
+def _live_report_result_subscriptions(live_report_id: str) -> list:
+    return [{
+        "live_report_id":
+            live_report_id,
+        "report_level":
+            "parent",
+        "view_details": [
+            {
+                "type": "page",
+                "row_return_type": "FROZEN_ONLY",
+                "projections": [],
+            },
+            {
+                "type": "page",
+                "row_return_type": "ALL",
+                "projections": [],
+                "start": 0,
+                "size": 250,
+            },
+            {
+                "type": "page",
+                "row_return_type": "ALL",
+                "projections": []
+            },
+        ],
+    }]
@@ -0,0 +1,313 @@
+"""
+Declarative load shapes: the stages of a run, loaded from a profile file.
+
+A profile file is a JSON object with a list of stages. Each entry has a "type" (one of the builders below), an
+optional "name" and "weights", and the arguments of its builder:
+
+    {
+      "description": "Step up to 12 users to find the knee of the throughput curve",
+      "stages": [
+        {"type": "ramp", "name": "Warm up", "duration": 120, "users": 2},
+        {"type": "step_ladder", "start_users": 2, "step_users": 2, "steps": 6, "step_duration": 300},
+        {"type": "soak", "name": "Cool down", "duration": 120, "users": 1, "weights": {"SketchCompoundTaskset": 1}}
+      ]
+    }
+
+- ramp: go linearly from the users of the previous stage to "users" in "duration" seconds
+- step_ladder: "steps" stages of "step_duration" seconds, from "start_users" up by "step_users" each step
+- spike: "base_users", with a jump to "spike_users" at "spike_start" for "spike_duration" seconds, "duration" in total
+- soak: "users" for "duration" seconds, or until the run is stopped when the duration is left out (last stage only)
+- diurnal: a day-like cosine between "min_users" and "max_users" with the given "period", in "steps_per_period"
+  stages, for "duration" seconds
+
+"weights" maps task names (see StagedLoad.task_picker) to relative weights for the stages of the entry: the users pick
+their next task with these weights, and never pick unlisted tasks. Without weights, all tasks are equally likely.
+
+--load_shape takes the path of a profile file or the name of one of the files in locustload/load_shapes. Every stage
+start is marked in the raw data by a row with the http_method "stage" and the stage name (see
+RawDataLogger.add_stage_marker), and locustload.util.aggregate summarizes the results per stage. In a distributed run,
+the master runs the shape and tells the workers the stage, so that they use its weights and mark it.
+"""
+import dataclasses
+import json
+import math
+import os
+import random
+from typing import Dict
+from typing import Optional
+
+import locust
+from locust import runners as locust_runners
+
+LOAD_SHAPES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "load_shapes")
+STAGE_MESSAGE = "ld_stage"
+
+# Users started or stopped per second when a stage doesn't change the number of users, or doesn't say how fast to
+DEFAULT_SPAWN_RATE = 1
+
+
+@dataclasses.dataclass
+class Stage:
+    name: str
+    duration: Optional[float]  # seconds, None to run until the run is stopped
+    users: int
+    spawn_rate: float
+    weights: Dict[str, float] = dataclasses.field(default_factory=dict)
+
+
+def ramp(previous_users, duration, users, name="Ramp", weights=None):
+    # Locust moves towards the target user count at the spawn rate; pick the rate that reaches it at the end
+    spawn_rate = abs(users - previous_users) / duration if users != previous_users else DEFAULT_SPAWN_RATE
+    return [Stage(name, duration, users, spawn_rate, weights or {})]
+
+
+def step_ladder(previous_users,
+                start_users,
+                step_users,
+                steps,
+                step_duration,
+                spawn_rate=DEFAULT_SPAWN_RATE,
+                name="Step",
+                weights=None):
+    return [
+        Stage("{} {}/{}, {} users".format(name, step + 1, steps, start_users + step * step_users), step_duration,
+              start_users + step * step_users, spawn_rate, weights or {}) for step in range(steps)
+    ]
+
+
+def spike(previous_users,
+          base_users,
+          spike_users,
+          duration,
+          spike_start,
+          spike_duration,
+          spawn_rate=None,
+          name="Spike",
+          weights=None):
+    # By default the spike users all start within a second
+    spike_rate = spawn_rate or max(abs(spike_users - base_users), DEFAULT_SPAWN_RATE)
+    weights = weights or {}
+    return [
+        Stage("{} base".format(name), spike_start, base_users, DEFAULT_SPAWN_RATE, weights),
+        Stage("{} peak".format(name), spike_duration, spike_users, spike_rate, weights),
+        Stage("{} recovery".format(name), duration - spike_start - spike_duration, base_users, spike_rate, weights),
+    ]
+
+
+def soak(previous_users, users, duration=None, spawn_rate=DEFAULT_SPAWN_RATE, name="Soak", weights=None):
+    return [Stage(name, duration, users, spawn_rate, weights or {})]
+
+
+def diurnal(previous_users, min_users, max_users, period, duration, steps_per_period=24, name="Diurnal", weights=None):
+    step_duration = period / steps_per_period
+    stages = []
+    users = previous_users
+    for step in range(math.ceil(duration / step_duration)):
+        phase = 2 * math.pi * step / steps_per_period
+        target = round(min_users + (max_users - min_users) * (1 - math.cos(phase)) / 2)
+        spawn_rate = abs(target - users) / step_duration if target != users else DEFAULT_SPAWN_RATE
+        stages.append(
+            Stage("{} {}/{}, {} users".format(name, step % steps_per_period + 1, steps_per_period, target),
+                  min(step_duration, duration - step * step_duration), target, spawn_rate, weights or {}))
+        users = target
+    return stages
+
+
+STAGE_BUILDERS = {
+    "ramp": ramp,
+    "step_ladder": step_ladder,
+    "spike": spike,
+    "soak": soak,
+    "diurnal": diurnal,
+}
+
+# Without --load_shape: one user until the run is stopped
+DEFAULT_STAGES = [Stage("Constant", None, 1, DEFAULT_SPAWN_RATE)]
+
+
+def build_stages(entries):
+    """
+    :param entries: list of dict, the "stages" of a profile file
+    :return: list of Stage
+    :raises ValueError: if an entry is invalid
+    """
+    stages = []
+    for position, entry in enumerate(entries):
+        entry = dict(entry)
+        builder = STAGE_BUILDERS.get(entry.pop("type", None))
+        if builder is None:
+            raise ValueError("Stage {}: the type must be one of {}".format(position + 1, ", ".join(STAGE_BUILDERS)))
+        previous_users = stages[-1].users if stages else 0
+        try:
+            stages.extend(builder(previous_users, **entry))
+        except (TypeError, ZeroDivisionError) as e:
+            raise ValueError("Stage {}: {}".format(position + 1, e))
+
+    names = set()
+    for position, stage in enumerate(stages):
+        if stage.duration is None and position < len(stages) - 1:
+            raise ValueError("Only the last stage may run without a duration, not {!r}".format(stage.name))
+        if stage.duration is not None and stage.duration <= 0 or stage.users < 0 or stage.spawn_rate <= 0:
+            raise ValueError("Stage {!r} needs a positive duration and spawn rate".format(stage.name))
+        if stage.weights and not any(weight > 0 for weight in stage.weights.values()):
+            raise ValueError("Stage {!r} needs a positive weight".format(stage.name))
+        # Stage markers are matched by name, e.g. when merging the raw data of workers
+        name = stage.name
+        copy = 1
+        while name in names:
+            copy += 1
+            name = "{} ({})".format(stage.name, copy)
+        stage.name = name
+        names.add(name)
+    return stages
+
+
+def load_stages(load_shape):
+    """
+    :param load_shape: path of a profile file, or the name of a profile file in LOAD_SHAPES_DIR
+    :return: list of Stage
+    :raises ValueError: if the profile can't be found or is invalid
+    """
+    path = load_shape
+    if not os.path.exists(path):
+        path = os.path.join(LOAD_SHAPES_DIR, load_shape + ".json")
+    if not os.path.exists(path):
+        available = sorted(name[:-len(".json")] for name in os.listdir(LOAD_SHAPES_DIR) if name.endswith(".json"))
+        raise ValueError("Unknown load shape {!r}: not a file, nor one of {}".format(load_shape, ", ".join(available)))
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    try:
+        return build_stages(profile["stages"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid load shape {}: {}".format(path, e))
+
+
+class StagedLoad:
+    """
+    Adds the --load_shape option, tracks the current stage of the run and picks the tasks of the users by its weights.
+
+    Usage, in a locustfile:
+
+        staged_load = StagedLoad(raw_data_logger)
+
+        class MyLoadShape(loadshape.StagedLoadShape):
+            staged_load = staged_load
+
+        class MyUser(DefaultUser):
+            tasks = [staged_load.task_picker({"SketchCompoundTaskset": SketchCompoundTaskset, ...})]
+    """
+
+    def __init__(self, raw_data_logger=None):
+        """
+        :param raw_data_logger: ldlocust.RawDataLogger, to mark the stages in the raw data
+        """
+        self.stages = DEFAULT_STAGES
+        self.current = None
+        self._current_weights = {}
+        self._raw_data_logger = raw_data_logger
+        self._task_names = set()
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._init)
+
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--load_shape",
+                            type=str,
+                            env_var="LOCUST_LOAD_SHAPE",
+                            default=None,
+                            help="Profile file, or name of a profile in locustload/load_shapes, with the stages of "
+                            "the run; see locustload.util.loadshape")
+
+    def _init(self, environment, runner=None, **kwargs):
+        runner = runner or environment.runner
+        if isinstance(runner, locust_runners.WorkerRunner):
+            # The master runs the shape, and sends the stages as they start
+            runner.register_message(STAGE_MESSAGE, self._on_stage_message)
+            return
+        load_shape = getattr(environment.parsed_options, "load_shape", None)
+        if load_shape:
+            self.stages = load_stages(load_shape)
+        for stage in self.stages:
+            unknown = set(stage.weights) - self._task_names
+            if unknown and self._task_names:
+                raise ValueError("Stage {!r} weighs unknown tasks: {}".format(stage.name, ", ".join(sorted(unknown))))
+
+    def stage_at(self, run_time):
+        """
+        :param run_time: seconds since the start of the run
+        :return: (position, Stage) of the stage at the given time, or None after the last stage
+        """
+        stage_end = 0
+        for position, stage in enumerate(self.stages):
+            if stage.duration is None:
+                return position, stage
+            stage_end += stage.duration
+            if run_time < stage_end:
+                return position, stage
+        return None
+
+    def start_stage(self, environment, last_position):
+        """
+        Start the stage at the given position, after the ones before it that haven't been started yet (a stage can be
+        skipped while Locust is still spawning the users of the previous one).
+        """
+        first = 0 if self.current is None else self.current + 1
+        for position in range(first, last_position + 1):
+            stage = self.stages[position]
+            print("Load shape: stage {}/{} {!r}, {} users".format(position + 1, len(self.stages), stage.name,
+                                                                  stage.users))
+            self.current = position
+            self._mark_stage(stage.name, stage.weights)
+            if isinstance(environment.runner, locust_runners.MasterRunner):
+                environment.runner.send_message(STAGE_MESSAGE, {"name": stage.name, "weights": stage.weights})
+
+    def _on_stage_message(self, environment, msg, **kwargs):
+        self._mark_stage(msg.data["name"], msg.data["weights"])
+
+    def _mark_stage(self, name, weights):
+        self._current_weights = weights
+        if self._raw_data_logger is not None:
+            self._raw_data_logger.add_stage_marker(name)
+
+    def task_picker(self, tasks):
+        """
+        :param tasks: dict, task name -> task (a function or a TaskSet class), the names used by the stage weights
+        :return: locust.TaskSet class that runs the tasks one at a time, picking each by the weights of the current
+                 stage
+        """
+        self._task_names.update(tasks)
+        staged_load = self
+        names = list(tasks)
+        task_list = list(tasks.values())
+
+        class StageWeightedTaskSet(locust.TaskSet):
+            tasks = task_list
+
+            def get_next_task(self):
+                return self.tasks[names.index(staged_load.pick_task_name(names))]
+
+        return StageWeightedTaskSet
+
+    def pick_task_name(self, names):
+        weights = self._current_weights
+        if not weights:
+            return random.choice(names)
+        weighted = [name for name in names if weights.get(name, 0) > 0]
+        return random.choices(weighted, [weights[name] for name in weighted])[0]
+
+
+class StagedLoadShape(locust.LoadTestShape):
+    """
+    Locust load shape that runs the stages of a StagedLoad. Subclass it in the locustfile and set staged_load.
+    """
+
+    staged_load: StagedLoad = None
+
+    def tick(self):
+        current = self.staged_load.stage_at(self.get_run_time())
+        if current is None:
+            return None
+        position, stage = current
+        if position != self.staged_load.current:
+            self.staged_load.start_stage(self.runner.environment, position)
+        return stage.users, stage.spawn_rate
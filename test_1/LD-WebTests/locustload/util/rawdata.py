@@ -0,0 +1,177 @@
+"""
+Reading and writing of the Locust raw data ("*_all_data.csv") files.
+
+The raw data is written while the test runs: rows are kept in a small buffer of tuples and appended to the CSV file in
+chunks of at most flush_rows rows or fsync_interval seconds, so memory use doesn't grow with the length of the run and
+a crash loses at most one chunk, even when the load is low. The CSV file can be rotated after a given number of rows;
+the parts are named
+
+    <prefix>_all_data.csv, <prefix>_all_data.csv.1, <prefix>_all_data.csv.2, ...
+
+in chronological order. Use iter_rows() to read all parts back as one stream of CSV dict rows.
+
+Optionally, the same rows are also written to a gzip-compressed columnar file (<prefix>_all_data.columnar.jsonl.gz).
+Each line of that file holds one chunk as a JSON object of column name -> list of values, with the action names
+dictionary-encoded, which is a lot smaller than the CSV for long runs.
+"""
+import csv
+import gzip
+import json
+import os
+import time
+
+TIMESTAMP = "timestamp"
+NAME = "name"
+HTTP_METHOD = "http_method"
+RESPONSE_TIME = "response_time"
+SUCCESS = "success"
+LOCUST_USER_ID = 'locust_user_id'
+START = 'start'
+END = 'end'
+# Start delay (ms) of the open-loop arrival of a timed action, see locustload.util.arrival; empty for closed-loop runs
+# and HTTP requests, and missing from the files of older runs
+SCHEDULE_DELAY = 'schedule_delay'
+ALL_FIELDS = [TIMESTAMP, NAME, HTTP_METHOD, RESPONSE_TIME, SUCCESS, LOCUST_USER_ID, START, END, SCHEDULE_DELAY]
+
+# HTTP_METHOD of the rows that mark the start of a load shape stage (NAME), see locustload.util.loadshape
+STAGE_MARKER = "stage"
+
+COLUMNAR_SUFFIX = ".columnar.jsonl.gz"
+
+
+class RawDataWriter:
+    """
+    Streams raw data rows to the CSV file (and optionally to the columnar file) in buffered chunks.
+
+    Rows are tuples in the order of ALL_FIELDS.
+    """
+
+    def __init__(self, csv_path, flush_rows=1000, fsync_interval=10, rotate_rows=0, columnar=False, fields=ALL_FIELDS):
+        """
+        :param csv_path: path of the (first) CSV file
+        :param flush_rows: number of buffered rows that triggers a write to disk
+        :param fsync_interval: seconds between fsync calls, 0 to fsync on every flush. The buffered rows are also
+                               written at least this often, however few there are
+        :param rotate_rows: number of rows after which a new CSV part is started, 0 to never rotate
+        :param columnar: also write the compressed columnar file
+        :param fields: CSV header, ALL_FIELDS by default
+        """
+        self.csv_path = csv_path
+        self.flush_rows = flush_rows
+        self.fsync_interval = fsync_interval
+        self.rotate_rows = rotate_rows
+        self.fields = fields
+        self._buffer = []
+        self._part = 0
+        self._rows_in_part = 0
+        self._last_fsync = time.monotonic()
+        self._csv_file = None
+        self._csv_writer = None
+        # Parts left over from a previous run would otherwise be read back as part of this one
+        for stale_path in raw_data_files(csv_path)[1:]:
+            os.remove(stale_path)
+        self._open_csv_part()
+        self._columnar_file = gzip.open(columnar_path(csv_path), "wt") if columnar else None
+
+    def add_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows or (self.fsync_interval and
+                                                    time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self.flush()
+
+    def flush(self, fsync=False):
+        """
+        Write the buffered rows and, if the fsync interval has passed (or fsync is True), fsync the files.
+        """
+        if self._buffer:
+            if self._columnar_file is not None:
+                self._write_columnar_chunk(self._buffer)
+            rows = self._buffer
+            while rows:
+                if self.rotate_rows and self._rows_in_part >= self.rotate_rows:
+                    self._part += 1
+                    self._open_csv_part()
+                room = len(rows) if not self.rotate_rows else self.rotate_rows - self._rows_in_part
+                self._csv_writer.writerows(rows[:room])
+                self._rows_in_part += len(rows[:room])
+                rows = rows[room:]
+            self._buffer = []
+            self._csv_file.flush()
+            if self._columnar_file is not None:
+                self._columnar_file.flush()
+
+        if fsync or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._csv_file.fileno())
+            self._last_fsync = time.monotonic()
+
+    def close(self):
+        if self._csv_file is None:
+            return
+        self.flush(fsync=True)
+        self._csv_file.close()
+        self._csv_file = None
+        if self._columnar_file is not None:
+            self._columnar_file.close()
+            self._columnar_file = None
+
+    def _open_csv_part(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = open(csv_part_path(self.csv_path, self._part), "w", newline="")
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(self.fields)
+        self._rows_in_part = 0
+
+    def _write_columnar_chunk(self, rows):
+        name_position = self.fields.index(NAME)
+        names = sorted({row[name_position] for row in rows})
+        name_index = {name: i for i, name in enumerate(names)}
+        chunk = {field: [row[i] for row in rows] for i, field in enumerate(self.fields)}
+        chunk[NAME] = [name_index[row[name_position]] for row in rows]
+        chunk["_names"] = names
+        self._columnar_file.write(json.dumps(chunk, separators=(",", ":")))
+        self._columnar_file.write("\n")
+
+
+def csv_part_path(csv_path, part):
+    return csv_path if part == 0 else "{}.{}".format(csv_path, part)
+
+
+def columnar_path(csv_path):
+    base = csv_path[:-len(".csv")] if csv_path.endswith(".csv") else csv_path
+    return base + COLUMNAR_SUFFIX
+
+
+def raw_data_files(csv_path):
+    """
+    :return: paths of all the rotated parts of the given raw data CSV file, in chronological order
+    """
+    paths = [csv_path]
+    part = 1
+    while os.path.exists(csv_part_path(csv_path, part)):
+        paths.append(csv_part_path(csv_path, part))
+        part += 1
+    return paths
+
+
+def iter_rows(csv_path):
+    """
+    Iterate over the rows of a raw data CSV file and all of its rotated parts, as csv.DictReader rows.
+    """
+    for path in raw_data_files(csv_path):
+        with open(path, "r", newline="") as input_file:
+            yield from csv.DictReader(input_file)
+
+
+def iter_columnar_rows(path):
+    """
+    Iterate over the rows of a columnar raw data file, as dicts of field -> value.
+    """
+    with gzip.open(path, "rt") as input_file:
+        for line in input_file:
+            chunk = json.loads(line)
+            names = chunk.pop("_names")
+            chunk[NAME] = [names[i] for i in chunk[NAME]]
+            fields = list(chunk.keys())
+            for values in zip(*(chunk[field] for field in fields)):
+                yield dict(zip(fields, values))
@@ -0,0 +1,131 @@
+"""
+Client-side saturation monitor: is the load generator, rather than LiveDesign, the bottleneck?
+
+A background greenlet samples the health of the Locust process every --saturation_interval seconds and writes the
+samples to "<prefix>_saturation.csv" (one file per worker in distributed runs, named like the worker raw data files),
+next to the raw data and with the same time base:
+
+- loop_lag_ms: how late the monitor greenlet woke up. While other greenlets hog the gevent loop (CPU bound work,
+  blocking calls), every other greenlet is late too, and the response times measured in the meantime include the lag
+- cpu_percent, rss_mb: CPU use and resident memory of the process; one Locust process can't use more than one core
+- sockets: open inet connections of the process
+- greenlets: greenlets of the runner (users, and Locust's own); users: running users
+- open_actions: timed actions in progress
+
+A sample with a loop lag above --max_loop_lag while timed actions are in progress is a violation: the timings of those
+actions are inflated by the client. At the end of the run the monitor warns about violations, with the actions they
+overlapped, and with --saturation_fail makes the run fail.
+"""
+import collections
+import csv
+import time
+
+import gevent
+import locust
+import psutil
+from locust import runners as locust_runners
+
+from locustload.util import distributed
+from locustload.util import timed
+
+FIELDS = ["timestamp", "loop_lag_ms", "cpu_percent", "rss_mb", "sockets", "greenlets", "users", "open_actions"]
+
+
+class SaturationMonitor:
+    """
+    Samples the health of the load generator while the test runs, see the module documentation.
+
+    One instance of this monitor is created in each locustfile.
+    """
+
+    def __init__(self):
+        self._greenlet = None
+        self._output_file = None
+        self._writer = None
+        self._violations = 0
+        self._max_lag = 0.0
+        self._violated_actions = collections.Counter()
+        locust.events.init_command_line_parser.add_listener(self._add_arguments)
+        locust.events.init.add_listener(self._start)
+        locust.events.quitting.add_listener(self._stop)
+
+    @staticmethod
+    def _add_arguments(parser, **kwargs):
+        parser.add_argument("--saturation_interval",
+                            type=float,
+                            env_var="LOCUST_SATURATION_INTERVAL",
+                            default=1,
+                            help="Seconds between samples of the load generator's health, 0 to turn the monitor off")
+        parser.add_argument("--max_loop_lag",
+                            type=float,
+                            env_var="LOCUST_MAX_LOOP_LAG",
+                            default=100,
+                            help="Event loop lag (ms) above which the timings of the timed actions in progress are "
+                            "suspect")
+        parser.add_argument("--saturation_fail",
+                            action="store_true",
+                            env_var="LOCUST_SATURATION_FAIL",
+                            default=False,
+                            help="Fail the run when the loop lag went above --max_loop_lag during timed actions, "
+                            "instead of only warning")
+
+    def _start(self, environment, runner=None, **kwargs):
+        runner = runner or environment.runner
+        options = environment.parsed_options
+        # The master of a distributed run doesn't run users
+        if options is None or not options.saturation_interval or isinstance(runner, locust_runners.MasterRunner):
+            return
+        prefix = getattr(options, "raw_data_prefix", None) or options.csv_prefix
+        if prefix is not None:
+            csv_path = prefix + "_saturation.csv"
+            if isinstance(runner, locust_runners.WorkerRunner):
+                csv_path = distributed.worker_csv_path(csv_path, runner.client_id)
+            self._output_file = open(csv_path, "w", newline="")
+            self._writer = csv.writer(self._output_file)
+            self._writer.writerow(FIELDS)
+        self._greenlet = gevent.spawn(self._sample, runner, options.saturation_interval, options.max_loop_lag / 1000)
+
+    def _sample(self, runner, interval, max_lag):
+        process = psutil.Process()
+        process.cpu_percent()  # The first call only starts the measurement
+        while True:
+            before = time.monotonic()
+            gevent.sleep(interval)
+            lag = max(0.0, time.monotonic() - before - interval)
+            open_actions = timed.open_action_names()
+
+            if lag > max_lag and open_actions:
+                self._violations += 1
+                self._violated_actions.update(open_actions)
+                self._max_lag = max(self._max_lag, lag)
+                print("(!) EVENT LOOP LAG {:.0f} ms DURING {} TIMED ACTIONS".format(lag * 1000, len(open_actions)))
+
+            if self._writer is not None:
+                self._writer.writerow([
+                    time.time(),
+                    round(lag * 1000, 3),
+                    process.cpu_percent(),
+                    round(process.memory_info().rss / 2**20, 1),
+                    len(process.connections("inet")),
+                    len(runner.greenlet) + len(runner.user_greenlets),
+                    runner.user_count,
+                    len(open_actions),
+                ])
+                self._output_file.flush()
+
+    def _stop(self, environment, **kwargs):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+        if self._output_file is not None:
+            self._output_file.close()
+            self._output_file = None
+        if not self._violations:
+            return
+        actions = ", ".join("{} ({})".format(name, count) for name, count in self._violated_actions.most_common(5))
+        print("(!) THE LOAD GENERATOR WAS SATURATED: event loop lag above {:.0f} ms during timed actions in {} samples "
+              "(max {:.0f} ms); the timings of these actions include client delays: {}".format(
+                  environment.parsed_options.max_loop_lag, self._violations, self._max_lag * 1000, actions))
+        if environment.parsed_options.saturation_fail:
+            print("Failing the run (--saturation_fail)")
+            environment.process_exit_code = 1
@@ -1,6 +1,10 @@
+import collections
+import contextlib
 import time
 import sys
+import weakref
 
+import gevent
 from locust.exception import CatchResponseError
 from requests.exceptions import RequestException, HTTPError
 from json import JSONDecodeError
@@ -21,6 +25,21 @@ exception_list = (AssertionError, RequestException, HTTPError, CatchResponseErro
 time_at_startup = time.time()  # seconds since epoch, not guaranteed to be monotonic
 perf_counter_at_startup = time.perf_counter()  # precise monotonic clock, but its reference point is undefined
 
+# Timed actions in progress in this process, by name (all users)
+_open_actions = collections.Counter()
+
+# Stacks of the timed actions in progress, by greenlet (outermost action first)
+_greenlet_action_stacks = weakref.WeakKeyDictionary()
+
+# Totals of the finished timed actions, by name, see action_breakdown()
+_action_breakdown = {}
+
+# Number of timed actions that were in progress when the polling() blocks in progress started, by greenlet
+_greenlet_polling_depths = weakref.WeakKeyDictionary()
+
+# Requests sent within timed actions with this prefix (e.g. "[poll/results-metadata]") poll for a condition
+POLL_ACTION_PREFIX = "[poll"
+
 
 class TimedAction:
     """
@@ -73,15 +92,30 @@ class TimedAction:
         self.has_parent_action = has_parent_action
 
     def __enter__(self):
+        # Breakdown of the elapsed time, see record_request() and waiting()
+        self.request_time = 0.0  # seconds, in requests other than polls
+        self.poll_request_time = 0.0  # seconds, in requests within [poll ...] actions
+        self.wait_time = 0.0  # seconds, in sleeps and waits for events
+        self.requests = 0
+        self.poll_requests = 0
+        self.request_bytes = 0
+        _action_stack().append(self)
+        _open_actions[self.name] += 1
+        self.schedule_delay = getattr(self.locust_user, "_schedule_delay", None)
         self.start_perf_counter = time.perf_counter()
         return self.name
 
     def __exit__(self, exc_type, exc_value, traceback):
+        _action_stack().pop()
+        _open_actions[self.name] -= 1
+        if not _open_actions[self.name]:
+            del _open_actions[self.name]
         if exc_value is not None:
             print("(!) TIMED ACTION", self.name, "IS INTERRUPTED BY", repr(exc_value), file=sys.stderr)
 
         end_perf_counter = time.perf_counter()
         duration = end_perf_counter - self.start_perf_counter
+        _record_breakdown(self, duration)
         start_time_since_epoch = (time_at_startup - perf_counter_at_startup) + self.start_perf_counter
         end_time_since_epoch = (time_at_startup - perf_counter_at_startup) + end_perf_counter
 
@@ -95,6 +129,8 @@ class TimedAction:
                     "locust_user_id": id(self.locust_user),
                     "start": start_time_since_epoch,  # seconds
                     "end": end_time_since_epoch,  # seconds
+                    # Delay of the open-loop arrival the action started in, see locustload.util.arrival
+                    "schedule_delay": "" if self.schedule_delay is None else self.schedule_delay * 1000,  # ms
                 }
             },
             "exception": None,
@@ -123,3 +159,159 @@ class TimedAction:
             raise PropagateError(request_meta["exception"])
         else:
             return True  # Suppress handled exceptions if the timed action is a root
+
+
+def current_action_name(locust_user):
+    """
+    :return: name of the innermost timed action the user is running (in the current greenlet), or None outside of
+             timed actions
+    """
+    stack = _action_stack()
+    return stack[-1].name if stack else None
+
+
+def current_action_stack():
+    """
+    :return: tuple of the names of the timed actions in progress in the current greenlet, outermost first; see
+             current_actions()
+    """
+    return tuple(action.name for action in current_actions())
+
+
+def current_actions():
+    """
+    :return: list of the TimedAction in progress in the current greenlet, outermost first. A greenlet without timed
+             actions of its own, e.g. a ThreadPoolExecutor worker thread under gevent's monkey patching, is in the
+             actions of the greenlet that spawned it.
+    """
+    for current in _greenlet_lineage():
+        stack = _greenlet_action_stacks.get(current)
+        if stack:
+            return stack
+    return []
+
+
+def record_request(response_time, response_length):
+    """
+    Attribute a request to the timed actions in progress in the current greenlet, see action_breakdown().
+
+    :param response_time: ms
+    :param response_length: bytes
+    """
+    actions = current_actions()
+    # The actions around a polling() block, or around a [poll ...] action, are polling
+    polling_depth = _polling_depth()
+    for position, action in enumerate(actions):
+        if action.name.startswith(POLL_ACTION_PREFIX):
+            polling_depth = max(polling_depth, position + 1)
+    for position, action in enumerate(actions):
+        if position < polling_depth:
+            action.poll_request_time += response_time / 1000
+            action.poll_requests += 1
+        else:
+            action.request_time += response_time / 1000
+            action.requests += 1
+        action.request_bytes += response_length or 0
+
+
+@contextlib.contextmanager
+def polling():
+    """
+    Count the requests sent in the block (e.g. the reads of a wait for a condition) as polling of the timed actions in
+    progress, see action_breakdown(). Timed actions started within the block count their own requests as usual.
+    """
+    current = gevent.getcurrent()
+    depths = _greenlet_polling_depths.setdefault(current, [])
+    depths.append(len(current_actions()))
+    try:
+        yield
+    finally:
+        depths.pop()
+
+
+@contextlib.contextmanager
+def waiting():
+    """
+    Attribute the time spent in the block (a sleep between polls, a wait for an event) to the timed actions in progress
+    in the current greenlet as wait time, see action_breakdown().
+    """
+    actions = list(current_actions())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for action in actions:
+            action.wait_time += elapsed
+
+
+def sleep(seconds):
+    """
+    time.sleep() that counts as wait time of the timed actions in progress, see waiting().
+    """
+    with waiting():
+        time.sleep(seconds)
+
+
+def open_action_names():
+    """
+    :return: list of the names of the timed actions in progress in this process, over all users (a name is repeated
+             for each action in progress with that name)
+    """
+    return list(_open_actions.elements())
+
+
+def set_schedule_delay(locust_user, delay):
+    """
+    Record the start delay of the open-loop arrival the user is starting, for the timed actions that follow.
+
+    :param delay: seconds between the intended and the actual start of the task, None for a closed-loop task
+    """
+    locust_user._schedule_delay = delay
+
+
+def action_breakdown():
+    """
+    :return: dict, action name -> dict of the totals over the finished timed actions with that name: count, duration,
+             request_time, poll_request_time, wait_time (seconds), requests, poll_requests and request_bytes
+    """
+    return _action_breakdown
+
+
+def _record_breakdown(action, duration):
+    totals = _action_breakdown.setdefault(action.name, collections.Counter())
+    totals["count"] += 1
+    totals["duration"] += duration
+    totals["request_time"] += action.request_time
+    totals["poll_request_time"] += action.poll_request_time
+    totals["wait_time"] += action.wait_time
+    totals["requests"] += action.requests
+    totals["poll_requests"] += action.poll_requests
+    totals["request_bytes"] += action.request_bytes
+
+
+def _greenlet_lineage():
+    # The current greenlet, then the greenlets that spawned it
+    current = gevent.getcurrent()
+    while current is not None:
+        yield current
+        spawning_greenlet = getattr(current, "spawning_greenlet", None)
+        current = spawning_greenlet() if spawning_greenlet is not None else None
+
+
+def _polling_depth():
+    for current in _greenlet_lineage():
+        depths = _greenlet_polling_depths.get(current)
+        if depths:
+            return depths[-1]
+    return 0
+
+
+def _action_stack():
+    # The stacks are per greenlet rather than per user, so that requests can be attributed from the greenlet they are
+    # sent in, see current_actions()
+    current = gevent.getcurrent()
+    stack = _greenlet_action_stacks.get(current)
+    if stack is None:
+        stack = _greenlet_action_stacks[current] = []
+    return stack
@@ -0,0 +1,514 @@
+"""
+Renders a timeline of all timed actions recorded by a Locust test run.
+Requires "*_all_data.csv" file as its input, which is produced by Locust (when executed with make).
+
+Usage:
+
+    $ python -m locustload.util.timeline input.csv output.svg [--page_seconds 600] [--px_per_second 15]
+    $ python -m locustload.util.timeline input.csv output.html
+
+The output format is picked by the extension of the output file:
+- SVG output is split into pages of --page_seconds each: output.svg, output.page2.svg, output.page3.svg, ...
+  Actions narrower than --min_width_px are merged with their neighbours into grey "N actions" buckets, so the size of
+  a page is bounded by its pixel width rather than by the number of actions.
+- HTML output is a self-contained viewer that draws the timeline on a canvas. It supports zooming (mouse wheel) and
+  panning (drag), and merges actions into buckets for every zoom level as it draws, so it stays responsive with
+  millions of actions.
+
+Each Locust user gets one lane per nesting depth of its timed actions, children below their parents.
+"""
+import argparse
+import bisect
+import html
+import json
+import math
+import typing
+
+from locustload.util import rawdata
+
+PX_PER_SECOND = 15
+PX_VERTICAL = 15
+PAGE_SECONDS = 600
+MIN_WIDTH_PX = 2
+
+# Approximate width of a monospace character, relative to the font size
+_CHAR_WIDTH = 0.6
+
+
+class Lane(typing.NamedTuple):
+    """
+    The timed actions of one Locust user at one nesting depth, sorted by start time. Actions that overlap without
+    being nested can share a lane, so the end times are not necessarily sorted; max_ends, the latest end time so far,
+    is.
+    """
+    locust_user_id: int
+    depth: int
+    names: list
+    starts: list  # seconds since epoch
+    ends: list  # seconds since epoch
+    successes: list
+    max_ends: list  # seconds since epoch, max(ends[:i + 1]) at index i
+
+
+class Timeline(typing.NamedTuple):
+    start: float  # seconds since epoch
+    end: float  # seconds since epoch
+    lanes: list  # Lane objects, with None between the lanes of two users
+
+
+class Box(typing.NamedTuple):
+    """
+    A single action, or a bucket of several actions that are too narrow to be drawn on their own
+    """
+    name: str
+    start: float
+    end: float
+    count: int
+    failures: int
+
+
+def load_timeline(input_csv_filename):
+    """
+    Read the timed actions from the raw data (including its rotated parts) and lay them out in lanes.
+
+    Only the actions are kept in memory, as tuples with interned names. The nesting depth is computed with a single
+    pass over the actions of each user, using a stack of the open ancestors.
+    """
+    names = {}
+    actions = {}
+    for row in rawdata.iter_rows(input_csv_filename):
+        if row['http_method'] != 'action':
+            continue
+        name = names.setdefault(row['name'], row['name'])
+        actions.setdefault(int(row['locust_user_id']), []).append(
+            (float(row['start']), float(row['end']), name, row['success'] == 'True'))
+
+    start = math.inf
+    end = -math.inf
+    lanes = []
+    for locust_user_id in sorted(actions):
+        # Sort by starting time ascending; if equal, sort by the event duration (end-start) descending
+        user_actions = sorted(actions.pop(locust_user_id), key=lambda a: (a[0], -a[1]))
+
+        # Assuming all recorded times are monotonic and child actions are correctly nested within their parents:
+        # parent start <= child start <= child end <= parent end
+        user_lanes = []
+        ancestor_ends = []
+        for action_start, action_end, name, success in user_actions:
+            while ancestor_ends and ancestor_ends[-1] < action_end:
+                ancestor_ends.pop()
+            depth = len(ancestor_ends)
+            ancestor_ends.append(action_end)
+            if depth == len(user_lanes):
+                user_lanes.append(Lane(locust_user_id, depth, [], [], [], [], []))
+            lane = user_lanes[depth]
+            lane.names.append(name)
+            lane.starts.append(action_start)
+            lane.ends.append(action_end)
+            lane.successes.append(success)
+            lane.max_ends.append(max(lane.max_ends[-1], action_end) if lane.max_ends else action_end)
+            start = min(start, action_start)
+            end = max(end, action_end)
+
+        lanes.extend(user_lanes)
+        lanes.append(None)
+
+    return Timeline(start, end, lanes)
+
+
+def boxes(lane, window_start, window_end, px_per_second, min_width_px=MIN_WIDTH_PX):
+    """
+    Yield the boxes to draw for the actions of a lane that overlap the given time window.
+
+    Actions narrower than min_width_px are merged into buckets with the narrow actions that follow them within
+    min_width_px.
+    """
+    min_width = min_width_px / px_per_second
+    bucket = None
+    for i in range(bisect.bisect_left(lane.max_ends, window_start), len(lane.starts)):
+        start = lane.starts[i]
+        if start > window_end:
+            break
+        end = lane.ends[i]
+        if end < window_start:
+            continue
+        failures = 0 if lane.successes[i] else 1
+        if end - start >= min_width:
+            if bucket is not None:
+                yield bucket
+                bucket = None
+            yield Box(lane.names[i], start, end, 1, failures)
+        elif bucket is not None and start - bucket.end < min_width:
+            bucket = bucket._replace(end=max(bucket.end, end),
+                                     count=bucket.count + 1,
+                                     failures=bucket.failures + failures)
+        else:
+            if bucket is not None:
+                yield bucket
+            bucket = Box(lane.names[i], start, end, 1, failures)
+    if bucket is not None:
+        yield bucket
+
+
+def human_time(seconds):
+    if seconds >= 10:
+        return f'{round(seconds)} s'
+    else:
+        return f'{round(seconds*1000)} ms'
+
+
+def describe(box):
+    if box.count == 1:
+        return f'{box.name}, {human_time(box.end - box.start)}'
+    failures = f', {box.failures} failed' if box.failures else ''
+    return f'{box.count} actions{failures}, {human_time(box.end - box.start)}'
+
+
+def svg_page_filename(output_svg_filename, page):
+    if page == 1:
+        return output_svg_filename
+    base = output_svg_filename[:-len('.svg')] if output_svg_filename.endswith('.svg') else output_svg_filename
+    return f'{base}.page{page}.svg'
+
+
+def generate_svg(input_csv_filename,
+                 output_svg_filename,
+                 page_seconds=PAGE_SECONDS,
+                 px_per_second=PX_PER_SECOND,
+                 min_width_px=MIN_WIDTH_PX):
+    """
+    Write the timeline as SVG pages of page_seconds each.
+
+    :return: list of the written file names
+    """
+    timeline = load_timeline(input_csv_filename)
+    if not math.isfinite(timeline.start):
+        timeline = Timeline(0, 0, [])
+    number_of_pages = max(1, math.ceil((timeline.end - timeline.start) / page_seconds))
+    filenames = []
+    for page in range(1, number_of_pages + 1):
+        page_start = timeline.start + (page - 1) * page_seconds
+        page_end = min(timeline.end, page_start + page_seconds)
+        filename = svg_page_filename(output_svg_filename, page)
+        with open(filename, 'w', encoding='utf-8') as output_file:
+            _write_svg_page(output_file, timeline, page_start, page_end, px_per_second, min_width_px,
+                            f'Page {page}/{number_of_pages}')
+        filenames.append(filename)
+    return filenames
+
+
+def _write_svg_page(output_file, timeline, page_start, page_end, px_per_second, min_width_px, page_label):
+    px_vertical = PX_VERTICAL
+    font_px = px_vertical * 0.8
+    image_width = (page_end - page_start) * px_per_second
+    image_height = (len(timeline.lanes) + 1) * px_vertical
+
+    print(
+        '<svg version="1.1" '
+        f'width="{ image_width }" height="{ image_height }" '
+        'xmlns="http://www.w3.org/2000/svg">'
+        '<style>'
+        f'text.info {{ font-family: monospace; cursor: default; font-size: {font_px}px }}'
+        '</style>'
+        f'<text x="0" y="{px_vertical*0.75}" class="info" fill="#666">{page_label}, '
+        f'{human_time(page_start - timeline.start)} - {human_time(page_end - timeline.start)}</text>',
+        file=output_file)
+
+    for lane_index, lane in enumerate(timeline.lanes):
+        if lane is None:
+            continue
+        y0 = (lane_index + 1) * px_vertical
+        for parity, box in enumerate(boxes(lane, page_start, page_end, px_per_second, min_width_px)):
+            x0 = (max(box.start, page_start) - page_start) * px_per_second
+            w = max((min(box.end, page_end) - max(box.start, page_start)) * px_per_second, 1)
+            print(_svg_box(box, parity, x0, y0, w, px_vertical, font_px), file=output_file)
+
+    print('</svg>', file=output_file)
+
+
+def _svg_box(box, parity, x0, y0, w, h, font_px):
+    if box.count > 1:
+        fill_color = '#999' if not box.failures else '#f80'
+        stroke_color = '#777' if not box.failures else '#a40'
+    elif parity % 2 == 0:
+        fill_color = '#bbb' if not box.failures else '#f80'
+        stroke_color = '#888' if not box.failures else '#a40'
+    else:
+        fill_color = '#ccc' if not box.failures else '#ffa000'
+        stroke_color = '#999' if not box.failures else '#a50'
+
+    text_color = '#666' if not box.failures else '#a40'
+
+    message = html.escape(describe(box))
+    svg = (f'<rect x="{x0:.1f}" width="{w:.1f}" y="{y0}" height="{h}" '
+           f'stroke="{stroke_color}" stroke-width="1px" fill="{fill_color}">'
+           f'<title>{message}</title>'
+           '</rect>')
+
+    # Text that doesn't fit is truncated instead of clipped, so that no clipPath is needed per box
+    max_chars = int(w / (font_px * _CHAR_WIDTH))
+    if box.count == 1 and max_chars >= 4:
+        text = describe(box)
+        if len(text) > max_chars:
+            text = text[:max_chars - 1] + '…'
+        svg += f'<text x="{x0:.1f}" y="{y0+h*0.75}" class="info" fill="{text_color}">{html.escape(text)}</text>'
+    return svg
+
+
+def generate_html(input_csv_filename, output_html_filename):
+    """
+    Write the timeline as a self-contained HTML canvas viewer.
+
+    The actions are embedded as compact columns per lane: start offsets and durations in milliseconds, indexes into a
+    table of action names and the indexes of the failed actions.
+    """
+    timeline = load_timeline(input_csv_filename)
+    if not math.isfinite(timeline.start):
+        timeline = Timeline(0, 0, [])
+    names = {}
+    with open(output_html_filename, 'w', encoding='utf-8') as output_file:
+        output_file.write(_HTML_HEAD)
+        output_file.write('const DATA = {"lanes": [')
+        for lane_index, lane in enumerate(timeline.lanes):
+            if lane_index > 0:
+                output_file.write(',\n')
+            if lane is None:
+                output_file.write('null')
+                continue
+            lane_data = {
+                'user': lane.locust_user_id,
+                'depth': lane.depth,
+                's': [round((start - timeline.start) * 1000) for start in lane.starts],
+                'd': [round((end - start) * 1000) for start, end in zip(lane.starts, lane.ends)],
+                'n': [names.setdefault(name, len(names)) for name in lane.names],
+                'f': [i for i, success in enumerate(lane.successes) if not success],
+            }
+            output_file.write(_to_script_json(lane_data))
+        output_file.write('],\n"names": ')
+        output_file.write(_to_script_json(list(names)))
+        output_file.write(',\n"duration": ')
+        output_file.write(str(round((timeline.end - timeline.start) * 1000)))
+        output_file.write('};\n')
+        output_file.write(_HTML_TAIL)
+
+
+def _to_script_json(value):
+    # Keep "</script>" in action names from closing the script element
+    return json.dumps(value, separators=(',', ':')).replace('</', '<\\/')
+
+
+_HTML_HEAD = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Locust timeline</title>
+<style>
+  body { margin: 0; font-family: monospace; overflow: hidden; }
+  #bar { padding: 4px 8px; background: #eee; font-size: 12px; }
+  #tip { position: fixed; pointer-events: none; background: #ffe; border: 1px solid #999; padding: 2px 4px;
+         font-size: 12px; white-space: pre; display: none; }
+  canvas { display: block; cursor: grab; }
+</style>
+</head>
+<body>
+<div id="bar">Wheel: zoom, shift+wheel: scroll, drag: pan, double click: reset. <span id="range"></span></div>
+<canvas id="timeline"></canvas>
+<div id="tip"></div>
+<script>
+'''
+
+_HTML_TAIL = '''
+const LANE_PX = 15;
+const MIN_WIDTH_PX = 2;
+const canvas = document.getElementById('timeline');
+const context = canvas.getContext('2d');
+const tip = document.getElementById('tip');
+const range = document.getElementById('range');
+const bar = document.getElementById('bar');
+for (const lane of DATA.lanes) {
+  if (!lane) continue;
+  lane.failed = new Set(lane.f);
+  // Latest end time so far, sorted even when actions of the lane overlap, see firstVisible()
+  lane.m = [];
+  for (let i = 0; i < lane.s.length; i++) lane.m.push(Math.max(i > 0 ? lane.m[i - 1] : 0, lane.s[i] + lane.d[i]));
+}
+let view = {start: 0, end: Math.max(DATA.duration, 1), top: 0};
+
+function humanTime(ms) {
+  return ms >= 10000 ? Math.round(ms / 1000) + ' s' : Math.round(ms) + ' ms';
+}
+
+function scale() {
+  return canvas.width / (view.end - view.start);
+}
+
+// Index of the first action of the lane such that no action before it ends at or after time t
+function firstVisible(lane, t) {
+  let low = 0;
+  let high = lane.s.length;
+  while (low < high) {
+    const middle = (low + high) >> 1;
+    if (lane.m[middle] < t) low = middle + 1; else high = middle;
+  }
+  return low;
+}
+
+// Call back with the boxes of the visible actions of a lane, merging the ones narrower than MIN_WIDTH_PX
+function visibleBoxes(lane, callback) {
+  const minWidth = MIN_WIDTH_PX / scale();
+  let bucket = null;
+  for (let i = firstVisible(lane, view.start); i < lane.s.length && lane.s[i] <= view.end; i++) {
+    const start = lane.s[i];
+    const end = start + lane.d[i];
+    if (end < view.start) continue;
+    const failures = lane.failed.has(i) ? 1 : 0;
+    if (end - start >= minWidth) {
+      if (bucket) callback(bucket);
+      bucket = null;
+      callback({name: DATA.names[lane.n[i]], start: start, end: end, count: 1, failures: failures});
+    } else if (bucket && start - bucket.end < minWidth) {
+      bucket.end = Math.max(bucket.end, end);
+      bucket.count += 1;
+      bucket.failures += failures;
+    } else {
+      if (bucket) callback(bucket);
+      bucket = {name: DATA.names[lane.n[i]], start: start, end: end, count: 1, failures: failures};
+    }
+  }
+  if (bucket) callback(bucket);
+}
+
+function describe(box) {
+  if (box.count === 1) return box.name + ', ' + humanTime(box.end - box.start);
+  return box.count + ' actions' + (box.failures ? ', ' + box.failures + ' failed' : '') + ', ' +
+      humanTime(box.end - box.start);
+}
+
+function draw() {
+  const pxPerMs = scale();
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  context.font = (LANE_PX * 0.8) + 'px monospace';
+  context.textBaseline = 'middle';
+  const first = Math.max(0, Math.floor(view.top / LANE_PX));
+  const last = Math.min(DATA.lanes.length, first + Math.ceil(canvas.height / LANE_PX) + 1);
+  for (let laneIndex = first; laneIndex < last; laneIndex++) {
+    const lane = DATA.lanes[laneIndex];
+    if (!lane) continue;
+    const y = laneIndex * LANE_PX - view.top;
+    let parity = 0;
+    visibleBoxes(lane, box => {
+      const x = (box.start - view.start) * pxPerMs;
+      const width = Math.max(1, (box.end - box.start) * pxPerMs);
+      if (box.count > 1) {
+        context.fillStyle = box.failures ? '#f80' : '#999';
+      } else if (parity++ % 2 === 0) {
+        context.fillStyle = box.failures ? '#f80' : '#bbb';
+      } else {
+        context.fillStyle = box.failures ? '#ffa000' : '#ccc';
+      }
+      context.fillRect(x, y, width, LANE_PX - 1);
+      if (box.count === 1 && width > 30) {
+        context.save();
+        context.beginPath();
+        context.rect(x, y, width, LANE_PX);
+        context.clip();
+        context.fillStyle = box.failures ? '#a40' : '#444';
+        context.fillText(describe(box), Math.max(x, 0) + 2, y + LANE_PX / 2);
+        context.restore();
+      }
+    });
+  }
+  range.textContent = humanTime(view.start) + ' - ' + humanTime(view.end);
+}
+
+function resize() {
+  canvas.width = window.innerWidth;
+  canvas.height = window.innerHeight - bar.offsetHeight;
+  draw();
+}
+
+function clampTop(top) {
+  return Math.max(0, Math.min(top, DATA.lanes.length * LANE_PX - canvas.height / 2));
+}
+
+canvas.addEventListener('wheel', event => {
+  event.preventDefault();
+  if (event.shiftKey) {
+    view.top = clampTop(view.top + event.deltaY);
+  } else {
+    const t = view.start + event.offsetX / scale();
+    const span = Math.max(1, (view.end - view.start) * Math.exp(event.deltaY * 0.002));
+    view.start = t - event.offsetX / canvas.width * span;
+    view.end = view.start + span;
+  }
+  draw();
+}, {passive: false});
+
+let drag = null;
+canvas.addEventListener('mousedown', event => {
+  drag = {x: event.clientX, y: event.clientY, start: view.start, end: view.end, top: view.top};
+});
+window.addEventListener('mouseup', () => { drag = null; });
+window.addEventListener('mousemove', event => {
+  if (drag) {
+    const shift = (event.clientX - drag.x) / scale();
+    view.start = drag.start - shift;
+    view.end = drag.end - shift;
+    view.top = clampTop(drag.top - (event.clientY - drag.y));
+    tip.style.display = 'none';
+    draw();
+    return;
+  }
+  if (event.target !== canvas) {
+    tip.style.display = 'none';
+    return;
+  }
+  const lane = DATA.lanes[Math.floor((event.offsetY + view.top) / LANE_PX)];
+  let found = null;
+  if (lane) {
+    const pxPerMs = scale();
+    visibleBoxes(lane, box => {
+      const x = (box.start - view.start) * pxPerMs;
+      if (event.offsetX >= x && event.offsetX <= x + Math.max(1, (box.end - box.start) * pxPerMs)) found = box;
+    });
+  }
+  if (!found) {
+    tip.style.display = 'none';
+    return;
+  }
+  tip.textContent = describe(found) + '\\nuser ' + lane.user + ', depth ' + lane.depth + ', at ' +
+      humanTime(found.start);
+  tip.style.left = (event.clientX + 12) + 'px';
+  tip.style.top = (event.clientY + 12) + 'px';
+  tip.style.display = 'block';
+});
+canvas.addEventListener('dblclick', () => {
+  view = {start: 0, end: Math.max(DATA.duration, 1), top: 0};
+  draw();
+});
+window.addEventListener('resize', resize);
+resize();
+</script>
+</body>
+</html>
+'''
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the timed actions of a Locust run as SVG pages or HTML")
+    parser.add_argument("input_csv_filename")
+    parser.add_argument("output_filename", help="*.html for the canvas viewer, SVG otherwise")
+    parser.add_argument("--page_seconds", type=float, default=PAGE_SECONDS, help="Seconds of the run per SVG page")
+    parser.add_argument("--px_per_second", type=float, default=PX_PER_SECOND, help="Horizontal scale of SVG pages")
+    parser.add_argument("--min_width_px",
+                        type=float,
+                        default=MIN_WIDTH_PX,
+                        help="Actions narrower than this are merged into buckets on SVG pages")
+    args = parser.parse_args()
+    if args.output_filename.endswith('.html'):
+        generate_html(args.input_csv_filename, args.output_filename)
+    else:
+        generate_svg(args.input_csv_filename,
+                     args.output_filename,
+                     page_seconds=args.page_seconds,
+                     px_per_second=args.px_per_second,
+                     min_width_px=args.min_width_px)
@@ -1,5 +1,3 @@
-import requests
-
 import pytest
 
 from helpers.extraction import paths
@@ -7,8 +5,7 @@ from ldclient.__experimental.experimental_client import ExperimentalLDClient
 from ldclient.enums import GenericEntityEntityType, GenericEntityImportDataType
 from ldclient.requests import ImportEntityAlias
 from library.api.exceptions import LiveDesignAPIException
-from library.api.ldclient import get_api_client
-from library.api.urls import LDCLIENT_HOST
+from library.api.client_pool import CLIENT_POOL, get_pooled_api_client
 
 
 @pytest.fixture(scope="function")
@@ -22,7 +19,7 @@ def ld_api_client(request):
         test_username = getattr(request.module, 'test_username', 'demo')
         test_password = getattr(request.module, 'test_password', 'demo')
 
-    return get_api_client(username=test_username, password=test_password)
+    return get_pooled_api_client(username=test_username, password=test_password)
 
 
 @pytest.fixture(scope="function")
@@ -30,24 +27,29 @@ def experimental_ldclient(request):
     test_username = getattr(request.module, 'test_username', 'demo')
     test_password = getattr(request.module, 'test_password', 'demo')
 
-    try:
-        # Note: Any wrong input for either LDCLIENT_HOST or username or password throws HTTPError.
-        client = ExperimentalLDClient(host=LDCLIENT_HOST,
-                                      username=test_username,
-                                      password=test_password,
-                                      compatibility_mode=(8, 10))
-    except requests.exceptions.HTTPError as e:
-        raise SystemExit(e)
-    try:
-        ping_return = client.ping()
-        if ping_return:
-            return client
-        else:
-            print("Experimental ldclient ping returned False. It may not be able to hit the about path. Please "
-                  "check...")
-            exit(1)
-    except RuntimeError as e:
-        raise SystemExit(e)
+    return get_pooled_api_client(username=test_username, password=test_password, client_class=ExperimentalLDClient)
+
+
+def pytest_sessionfinish(session):
+    # Hand this worker's pool counters over to the xdist controller, see pytest_testnodedown below
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['ldclient_pool_stats'] = CLIENT_POOL.stats()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    worker_stats = getattr(node, 'workeroutput', {}).get('ldclient_pool_stats')
+    if worker_stats:
+        node.config._ldclient_pool_worker_stats = getattr(node.config, '_ldclient_pool_worker_stats', [])
+        node.config._ldclient_pool_worker_stats.append(worker_stats)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    all_stats = getattr(config, '_ldclient_pool_worker_stats', None) or [CLIENT_POOL.stats()]
+    logins = sum(stats['logins'] for stats in all_stats)
+    logins_saved = sum(stats['logins_saved'] for stats in all_stats)
+    if logins or logins_saved:
+        terminalreporter.write_line("LDClient pool: {} logins performed, {} logins saved".format(logins, logins_saved))
 
 
 @pytest.fixture(scope="function")
@@ -5,6 +5,7 @@ import pandas as pd
 import pytest
 
 from helpers.api.actions.livereport import export_live_report
+from helpers.api.extraction.exported_table import ExportedTable
 from tests.conftest import get_api_client
 
 from .testing_data import highlighted_substructure_image_detail_list, scaffold_image_detail_list, \
@@ -318,6 +319,11 @@ def test_exported_rows_partial_live_report(username, password):
     df = pd.read_excel(exported_live_report)
     assert df.shape[0] == len(entity_ids)
 
+    # ExportedTable reads the same records from the export
+    table = ExportedTable.from_xls(exported_live_report)
+    assert len(table) == df.shape[0]
+    assert sorted(table.column('ID')) == sorted(entity_ids)
+
 
 @pytest.mark.parametrize("username, password", [('demo', 'demo'), ('userB', 'userB')])
 def test_export_of_smiles_string_image_generation_enabled(username, password):
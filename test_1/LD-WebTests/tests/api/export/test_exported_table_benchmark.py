@@ -0,0 +1,95 @@
+"""
+Compares the parse-once ExportedTable with parsing the whole export again for every column, on synthetic 10K-row
+exports. Doesn't need a LiveDesign server, but takes several seconds, hence the slow marker.
+"""
+import csv
+import io
+import re
+import time
+
+import pytest
+
+from helpers.api.extraction.exported_table import ExportedTable
+from helpers.api.verification.file_contents import verify_csv_contents, verify_sdf_contents
+
+ROW_COUNT = 10000
+ASSAY_COLUMN_NAMES = ['Assay {} [uM]'.format(i) for i in range(16)]
+COLUMN_NAMES = ['ID', 'Compound Structure', 'Rationale', 'Lot Scientist'] + ASSAY_COLUMN_NAMES
+
+
+def _cell(row, column):
+    if column == 0:
+        return 'V{:06d}'.format(row)
+    if column == 3:
+        return 'LiveDesign\ndemo'
+    # Leave some cells empty, they are omitted in SDF exports
+    return '' if (row + column) % 7 == 0 else '{}.{}'.format(row, column)
+
+
+def _csv_export():
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(COLUMN_NAMES)
+    for row in range(ROW_COUNT):
+        writer.writerow([_cell(row, column) for column in range(len(COLUMN_NAMES))])
+    return output.getvalue().encode('utf-8')
+
+
+def _sdf_export():
+    records = []
+    for row in range(ROW_COUNT):
+        lines = ['V{:06d}'.format(row), '  LiveDesign', '', '  0  0  0  0  0  0            999 V2000', 'M  END']
+        for name in COLUMN_NAMES[:1] + COLUMN_NAMES[2:]:
+            value = _cell(row, COLUMN_NAMES.index(name))
+            if value:
+                lines.extend(['>  <{}>  '.format(name), value, ''])
+        lines.append('$$$$')
+        records.append('\n'.join(lines))
+    return ('\n'.join(records) + '\n').encode('utf-8')
+
+
+def _csv_column_per_parse(csv_bytes, column_name):
+    # How the verification helpers read a column before ExportedTable
+    return [row[column_name] for row in csv.DictReader(csv_bytes.decode('utf-8').splitlines())]
+
+
+def _sdf_column_per_regex(sdf_bytes, column_name):
+    regexp = r"(?<=<{}>  \n)(.*?)(?=>|\$\$\$\$)".format(re.escape(column_name))
+    return [value.rstrip() for value in re.findall(regexp, sdf_bytes.decode('utf-8'), re.S)]
+
+
+@pytest.mark.slow
+def test_exported_table_csv_benchmark():
+    csv_bytes = _csv_export()
+
+    start = time.perf_counter()
+    per_parse = {name: _csv_column_per_parse(csv_bytes, name) for name in COLUMN_NAMES}
+    per_parse_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verify_csv_contents(csv_bytes, per_parse, inexact_match_columns=[])
+    table_duration = time.perf_counter() - start
+
+    print('CSV, {} rows: parse per column {:.2f} s, parse once and verify {:.2f} s'.format(
+        ROW_COUNT, per_parse_duration, table_duration))
+    assert len(ExportedTable.from_csv(csv_bytes)) == ROW_COUNT
+
+
+@pytest.mark.slow
+def test_exported_table_sdf_benchmark():
+    sdf_bytes = _sdf_export()
+    sdf_columns = COLUMN_NAMES[:1] + COLUMN_NAMES[2:]
+
+    start = time.perf_counter()
+    per_regex = {name: _sdf_column_per_regex(sdf_bytes, name) for name in sdf_columns}
+    per_regex_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verify_sdf_contents(sdf_columns, per_regex, sdf_bytes)
+    table_duration = time.perf_counter() - start
+
+    print('SDF, {} records: regex per column {:.2f} s, parse once and verify {:.2f} s'.format(
+        ROW_COUNT, per_regex_duration, table_duration))
+    table = ExportedTable.from_sdf(sdf_bytes)
+    assert len(table) == ROW_COUNT
+    assert table.record('V000123')['Lot Scientist'] == 'LiveDesign\ndemo'
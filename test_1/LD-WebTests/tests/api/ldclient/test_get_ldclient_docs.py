@@ -1,11 +1,11 @@
 import pytest
 from urllib.parse import urljoin
-from library.url_endpoints import HOST
+from library import url_endpoints
 import requests
 
 
 def test_get_ldclient_docs(ld_api_client):
-    url = urljoin(HOST, "/livedesign/ldclient")
+    url = urljoin(url_endpoints.HOST, "/livedesign/ldclient")
     resp = requests.get(url)
     assert resp.status_code == 200, '\n'.join([
         "Could not get the statically served ldclient documentation at /livedesign/ldclient",
@@ -6,7 +6,7 @@ import logging
 import os
 import unittest
 
-from library.api.urls import LDCLIENT_HOST
+from library.api import urls
 from ldclient.__experimental.experimental_client import ExperimentalLDClient
 from ldclient.__experimental.experimental_models import QueryCondition
 from ldclient.models import (FreeformColumn, LiveReport, Observation, Rationale)
@@ -28,7 +28,7 @@ class ExperimentalLDClientServiceTests(unittest.TestCase):
         password = 'demo'
         # This corresponds to the JS Testing project in Jenkins starter data
         cls.active_project = os.getenv('EXPERIMENTAL_LDCLIENT_TEST_PROJECT', '4')
-        cls.ldclient = ExperimentalLDClient(LDCLIENT_HOST, user, password, compatibility_mode=(8, 10))
+        cls.ldclient = ExperimentalLDClient(urls.LDCLIENT_HOST, user, password, compatibility_mode=(8, 10))
         cls.rationale = Rationale(description="WSClientIntegrationTest", user_name=None)
 
     def tearDown(self):
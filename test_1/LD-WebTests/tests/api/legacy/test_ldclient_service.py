@@ -12,7 +12,7 @@ it more maintainable and extendable.
 """
 import pytest
 
-from library.api.urls import LDCLIENT_HOST
+from library.api import urls
 import hashlib
 import json
 import logging
@@ -71,7 +71,7 @@ class LDClientServiceTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         cls.active_project = os.getenv('LDCLIENT_TEST_PROJECT', '4')
-        cls.ldclient = LDClient(LDCLIENT_HOST, "demo", "demo", compatibility_mode=(8, 10))
+        cls.ldclient = LDClient(urls.LDCLIENT_HOST, "demo", "demo", compatibility_mode=(8, 10))
         cls.rationale = Rationale(description="WSClientIntegrationTest", user_name=None)
 
     def tearDown(self):
@@ -0,0 +1,37 @@
+from functools import partial
+
+from helpers.api.actions.row import add_rows_to_live_report_in_chunks, get_live_report_rows, \
+    remove_rows_from_live_report_in_chunks
+from library.api.ldclient import get_api_client
+
+live_report_to_duplicate = {'livereport_name': 'Import Data', 'livereport_id': '878'}
+test_type = 'api'
+
+
+def test_remove_and_add_rows_in_chunks(ld_api_client, duplicate_live_report):
+    """
+    API test for the bulk row helpers, with small chunks so that the LR needs several concurrent requests, each thread
+    with its own client
+    1. Remove all rows in chunks and verify
+    2. Add them back in chunks and verify
+    :param ld_api_client: Fixture that returns ldclient object for "demo:demo"
+    """
+    rows = get_live_report_rows(ld_api_client, duplicate_live_report.id)
+    assert len(rows) > 2, "Expected more than 2 rows in the LR, got {}".format(rows)
+
+    responses = remove_rows_from_live_report_in_chunks(ld_api_client,
+                                                       duplicate_live_report.id,
+                                                       rows,
+                                                       chunk_size=2,
+                                                       max_concurrent_chunks=3,
+                                                       client_factory=partial(get_api_client, 'demo', 'demo'))
+    assert len(responses) == (len(rows) + 1) // 2
+    assert get_live_report_rows(ld_api_client, duplicate_live_report.id) == []
+
+    add_rows_to_live_report_in_chunks(ld_api_client,
+                                      duplicate_live_report.id,
+                                      rows,
+                                      chunk_size=2,
+                                      max_concurrent_chunks=3,
+                                      client_factory=partial(get_api_client, 'demo', 'demo'))
+    assert sorted(get_live_report_rows(ld_api_client, duplicate_live_report.id)) == sorted(rows)
@@ -3,6 +3,7 @@ import pytest
 from helpers.api.actions.project import get_folders_in_project
 
 
+@pytest.mark.exclusive
 @pytest.mark.serial
 def test_list_folders(ld_api_client):
     """
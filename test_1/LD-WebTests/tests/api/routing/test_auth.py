@@ -4,7 +4,7 @@ from urllib.parse import urljoin
 import pytest
 import requests
 
-from library.url_endpoints import HOST, LOGIN_URL
+from library import url_endpoints
 from library.utils import is_k8s
 
 
@@ -13,7 +13,7 @@ from library.utils import is_k8s
     requests.auth.HTTPBasicAuth("demo", "badpassword"),
 ])
 def test_api_401_page(auth):
-    url = urljoin(HOST, "/livedesign/api/about")
+    url = urljoin(url_endpoints.HOST, "/livedesign/api/about")
     resp = requests.get(url, auth=auth)
     assert resp.status_code == 401, '\n'.join([
         "accessing an API endpoint with invalid auth did not result in a 401",
@@ -52,6 +52,7 @@ def get_auth_locked_paths():
 
 @pytest.mark.parametrize("path", get_auth_locked_paths())
 def test_auth_redirect(path):
-    url = urljoin(HOST, path)
+    url = urljoin(url_endpoints.HOST, path)
     resp = requests.get(url)
-    assert resp.url.startswith(LOGIN_URL), "accessing auth-locked route without auth should redirect to login page"
+    assert resp.url.startswith(url_endpoints.LOGIN_URL), \
+        "accessing auth-locked route without auth should redirect to login page"
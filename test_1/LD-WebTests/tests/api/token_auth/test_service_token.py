@@ -6,7 +6,7 @@ from tempfile import NamedTemporaryFile
 
 import pytest
 from ldclient import LDClient
-from library.url_endpoints import HOST
+from library import url_endpoints
 from requests.exceptions import HTTPError
 
 # GOOD_TOKEN has expiration set to 2200-01-01, so it should not expire very soon.
@@ -77,5 +77,5 @@ def get_ldclient(token):
     """
     initialize api
     """
-    ldclient_host = "{}livedesign/api/".format(HOST)
+    ldclient_host = "{}livedesign/api/".format(url_endpoints.HOST)
     return LDClient(host=ldclient_host, token=token, compatibility_mode=(8, 10))
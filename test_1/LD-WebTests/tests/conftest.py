@@ -1,11 +1,11 @@
 import pytest
 
 from library import utils, dom
-from library.api.urls import LDCLIENT_HOST
-from library.url_endpoints import HOST
+from library.api import urls
 from ldclient import LDClient, models
 from ldclient.models import LiveReport
 from library.api.exceptions import LiveDesignAPIException
+from library.api.live_report_pool import CopyKey, LiveReportCopyPool
 import requests
 
 from library.utils import make_unique_name
@@ -13,7 +13,7 @@ from library.utils import make_unique_name
 
 @pytest.fixture(scope="session")
 def ld_client():
-    return LDClient(host=LDCLIENT_HOST, username="demo", password="demo", compatibility_mode=(8, 10))
+    return LDClient(host=urls.LDCLIENT_HOST, username="demo", password="demo", compatibility_mode=(8, 10))
 
 
 @pytest.fixture(scope="module")
@@ -105,6 +105,8 @@ def duplicate_live_report(request, ld_api_client):
         def test_one(selenium, duplicate_live_report_via_client, open_livereport):
             duplicate_lr_name = duplicate_live_report_via_client
 
+    The copies are made in the background ahead of the tests that need them (see library.api.live_report_pool) and
+    deleted at the end of the session.
 
     :param request: request object with test metadata (from pytest fixture)
     :param ld_api_client: fixture that returns the LDClient object
@@ -130,41 +132,130 @@ def duplicate_live_report(request, ld_api_client):
         raise dom.LiveDesignWebException('Keys "livereport_name" and "livereport_id" for the dictionary '
                                          '"live_report_to_duplicate" must be defined.')
 
+    # set duplicate Live Report name (the new Live Report name)
+    new_report_name = getattr(request.module, 'test_report_name', request.node.name)
+
+    key = _live_report_copy_key(request.node)
+    if key is not None:
+        # Take a copy made in the background (see pytest_runtest_protocol below), it is deleted at the end of the session
+        duplicate_livereport_object = _get_live_report_copy_pool().checkout(key, new_report_name or
+                                                                            report_to_duplicate_name)
+    else:
+        duplicate_livereport_object = _copy_live_report(request, ld_api_client, report_to_duplicate_alias,
+                                                        report_to_duplicate_project_id, new_report_name or
+                                                        report_to_duplicate_name)
+
+    # Setting the "test_livereport" variable to the duplicated LR name. This could be used by open_livereport fixture
+    # to open this LR
+    request.module.test_livereport = duplicate_livereport_object.title
+    test_type = getattr(request.module, 'test_type', 'selenium')
+
+    if test_type == 'selenium':
+        return duplicate_livereport_object.title
+    return duplicate_livereport_object
+
+
+def _copy_live_report(request, ld_api_client, template_id, project_id, new_report_name):
+    """
+    Duplicate the LiveReport right away with the given client, and delete the copy after the test
+    """
     # Getting the attributes in case a subset of the LR is to be duplicated. Default is None which means all the
     # compounds and columns would be copied
     entity_ids_to_copy = getattr(request.module, 'entity_ids_subset', None)
     column_ids_to_copy = getattr(request.module, 'column_ids_subset', None)
 
-    # set duplicate Live Report name (the new Live Report name)
-    new_report_name = getattr(request.module, 'test_report_name', request.node.name)
-    duplicate_report_new_name = make_unique_name(new_report_name if new_report_name else report_to_duplicate_name)
-
     # Set params by creating LiveReport model for duplicate LR. Just providing the LR name and project ID for now.
-    livereport_params = LiveReport(title=duplicate_report_new_name, project_id=report_to_duplicate_project_id)
+    livereport_params = LiveReport(title=make_unique_name(new_report_name), project_id=project_id)
 
     # Duplicate Live Report
     try:
-        duplicate_livereport_object = ld_api_client.copy_live_report(template_id=report_to_duplicate_alias,
+        duplicate_livereport_object = ld_api_client.copy_live_report(template_id=template_id,
                                                                      live_report=livereport_params,
                                                                      entity_ids=entity_ids_to_copy,
                                                                      projections=column_ids_to_copy)
     except Exception as e:
         raise LiveDesignAPIException(e)
 
-    # Setting the "test_livereport" variable to the duplicated LR name. This could be used by open_livereport fixture
-    # to open this LR
-    request.module.test_livereport = duplicate_livereport_object.title
-    test_type = getattr(request.module, 'test_type', 'selenium')
-
     def finalizer():
         ld_api_client.delete_live_report(duplicate_livereport_object.id)
 
     request.addfinalizer(finalizer)
-    if test_type == 'selenium':
-        return duplicate_report_new_name
     return duplicate_livereport_object
 
 
+# Pool of LiveReport copies for duplicate_live_report, created when first needed and closed at the end of the session
+_live_report_copy_pool = None
+
+
+def _get_live_report_copy_pool():
+    global _live_report_copy_pool
+    if _live_report_copy_pool is None:
+        _live_report_copy_pool = LiveReportCopyPool(get_api_client)
+    return _live_report_copy_pool
+
+
+def _live_report_copy_key(item):
+    """
+    :return: CopyKey of the LiveReport that duplicate_live_report copies for the test, or None if the test doesn't use
+             the fixture or logs in ld_api_client with parametrized credentials, in which case the fixture copies the
+             LiveReport itself
+    """
+    if 'duplicate_live_report' not in getattr(item, 'fixturenames', ()):
+        return None
+    callspec = getattr(item, 'callspec', None)
+    if callspec is not None and 'ld_api_client' in callspec.params:
+        return None
+    report_to_duplicate = getattr(item.module, 'live_report_to_duplicate', None)
+    if not isinstance(report_to_duplicate, dict) or 'livereport_id' not in report_to_duplicate:
+        return None
+    return CopyKey(username=getattr(item.module, 'test_username', 'demo'),
+                   password=getattr(item.module, 'test_password', 'demo'),
+                   project_id=getattr(item.module, 'test_project_id', '4'),
+                   template_id=report_to_duplicate['livereport_id'],
+                   entity_ids=getattr(item.module, 'entity_ids_subset', None),
+                   column_ids=getattr(item.module, 'column_ids_subset', None))
+
+
+def pytest_runtest_protocol(item, nextitem):
+    """
+    Have the LiveReport copies of this test and the next one made in the background, the latter while this test runs
+    """
+    keys = [key for key in (_live_report_copy_key(item), nextitem and _live_report_copy_key(nextitem)) if key]
+    for key in set(keys):
+        _get_live_report_copy_pool().prefetch(key, count=keys.count(key))
+
+
+def pytest_sessionfinish(session):
+    # Delete the LiveReport copies of all tests at once
+    if _live_report_copy_pool is not None:
+        _live_report_copy_pool.close()
+        # Hand this worker's pool counters over to the xdist controller, see pytest_testnodedown below
+        if hasattr(session.config, 'workeroutput'):
+            session.config.workeroutput['live_report_copy_pool_stats'] = _live_report_copy_pool.stats()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    worker_stats = getattr(node, 'workeroutput', {}).get('live_report_copy_pool_stats')
+    if worker_stats:
+        if not hasattr(node.config, '_live_report_copy_pool_worker_stats'):
+            node.config._live_report_copy_pool_worker_stats = []
+        node.config._live_report_copy_pool_worker_stats.append(worker_stats)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    all_stats = getattr(config, '_live_report_copy_pool_worker_stats', None)
+    if not all_stats:
+        all_stats = [_live_report_copy_pool.stats()] if _live_report_copy_pool is not None else []
+    copies = sum(stats['copies'] for stats in all_stats)
+    if copies:
+        terminalreporter.write_line(
+            "LiveReport copy pool: {} copies made, {} ready at checkout, {} waited for, {} unused".format(
+                copies, sum(stats['copies_ready'] for stats in all_stats),
+                sum(stats['copies_waited_for'] for stats in all_stats),
+                sum(stats['copies_unused'] for stats in all_stats)))
+
+
 def get_api_client(username=None, password=None):
     """
     Get the ldclient for specified username and password
@@ -174,11 +265,11 @@ def get_api_client(username=None, password=None):
     """
     try:
         # Note: Any wrong input for either LDCLIENT_HOST or username or password throws HTTPError.
-        client = LDClient(host=LDCLIENT_HOST, username=username, password=password, compatibility_mode=(8, 10))
+        client = LDClient(host=urls.LDCLIENT_HOST, username=username, password=password, compatibility_mode=(8, 10))
     except requests.exceptions.HTTPError as e:
         raise LiveDesignAPIException(
             "Unable to get LDClient object for Host:{}, username:{} and password:{}, Getting Error:{}".format(
-                LDCLIENT_HOST, username, password, e),
+                urls.LDCLIENT_HOST, username, password, e),
             error=e)
     try:
         ping_return = client.ping()
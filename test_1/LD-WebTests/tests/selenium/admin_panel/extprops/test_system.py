@@ -16,7 +16,7 @@ from helpers.change.live_report_picker import create_and_open_live_report
 from helpers.change.project import open_project
 from helpers.extraction import paths
 from library.legacy_admin_panel import AdminSeleniumWebDriverTestCase
-from library.url_endpoints import HOST
+from library import url_endpoints
 from tests.selenium.admin_panel.extprops.utils import (
     find_grid_cells,
     model_found_in_tree,
@@ -51,7 +51,7 @@ class ExtpropSeleniumSystemTest(ExtpropSeleniumMixin, AdminSeleniumWebDriverTest
 
     def navigate_livereport(self, lrid):
         """ Navigates to an existing live report by live report id """
-        self.selenium.get('{}livedesign/#/projects/4/livereports/{}'.format(HOST, lrid))
+        self.selenium.get('{}livedesign/#/projects/4/livereports/{}'.format(url_endpoints.HOST, lrid))
         self.wait_until_visible('[class="tab tab-default tab-active"]')
 
     def add_compound(self, id):
@@ -27,6 +27,8 @@ This will modify the open_project fixture to log into LiveDesign as 'userA' and
 To validate whether 'Project A' was opened, an assert statement in the test module was also added to confirm that the
 value returned by the yield statement (in the open_project fixture) matched the test_project_name variable defined.
 """
+from os.path import basename, dirname
+
 import allure
 import pytest
 from helpers.change import project
@@ -36,8 +38,71 @@ from ldclient import LDClient
 
 from helpers.selection.live_report_tab import TAB_ACTIVE, TAB_DOWNARROW, TAB_NAMED_
 from library import dom, wait
-from library.authentication import login
-from library.api.urls import LDCLIENT_HOST
+from library.authentication import fast_login, login
+from library.browser_pool import BROWSER_POOL
+from library.api import urls
+
+
+@pytest.fixture(scope='session')
+def browser_pool():
+    """
+    Pool of drivers reused by the tests marked with `reuse_browser`, see library.browser_pool
+    """
+    yield BROWSER_POOL
+    BROWSER_POOL.clear()
+
+
+@pytest.fixture
+def selenium(request, browser_pool):
+    """
+    Overrides the pytest-selenium fixture: tests marked with `reuse_browser` get a pooled driver whose session is reset
+    after the test, every other test gets a new driver from the pytest-selenium `driver` fixture.
+
+    Only mark tests that don't need a new browser profile and don't use capabilities markers, since pooled drivers are
+    launched with the capabilities of the test that first needed them.
+
+    :param request: request object with test metadata (from pytest fixture)
+    :param browser_pool: fixture with the worker's browser pool
+    """
+    if not request.node.get_closest_marker('reuse_browser'):
+        yield request.getfixturevalue('driver')
+        return
+
+    def launch_driver():
+        driver_class = request.getfixturevalue('driver_class')
+        return driver_class(**request.getfixturevalue('driver_kwargs'))
+
+    driver = browser_pool.checkout(launch_driver)
+    # pytest-selenium gathers the url, screenshot and logs of failed tests from the node's _driver
+    request.node._driver = driver
+    yield driver
+    test_failed = any(
+        getattr(request.node, 'rep_' + when, None) is not None and getattr(request.node, 'rep_' + when).failed
+        for when in ('setup', 'call'))
+    browser_pool.checkin(driver, reusable=not test_failed)
+
+
+def pytest_sessionfinish(session):
+    # Hand this worker's pool counters over to the xdist controller, see pytest_testnodedown below
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['browser_pool_stats'] = BROWSER_POOL.stats()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    worker_stats = getattr(node, 'workeroutput', {}).get('browser_pool_stats')
+    if worker_stats:
+        node.config._browser_pool_worker_stats = getattr(node.config, '_browser_pool_worker_stats', [])
+        node.config._browser_pool_worker_stats.append(worker_stats)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    all_stats = getattr(config, '_browser_pool_worker_stats', None) or [BROWSER_POOL.stats()]
+    launches_saved = sum(stats['launches_saved'] for stats in all_stats)
+    if launches_saved:
+        terminalreporter.write_line("Browser pool: {} browsers launched, {} launches saved, {} discarded".format(
+            sum(stats['launches'] for stats in all_stats), launches_saved,
+            sum(stats['discarded'] for stats in all_stats)))
 
 
 @pytest.fixture(scope='function')
@@ -102,6 +167,9 @@ def login_to_livedesign(request, selenium):
         test_username = 'userA'
         test_password = 'userA'
 
+    Logs in with session cookies obtained over the REST API (see library.authentication.fast_login), except for the
+    tests of the login page itself and when --ui_login is given.
+
     :param request: request object with test metadata (from pytest fixture)
     :param selenium: webdriver (from pytest-selenium fixture)
     """
@@ -114,7 +182,10 @@ def login_to_livedesign(request, selenium):
         test_username = getattr(request.module, 'test_username', 'demo')
         test_password = getattr(request.module, 'test_password', 'demo')
 
-    login(selenium, test_username, test_password)
+    if request.config.getoption('--ui_login') or basename(dirname(str(request.node.fspath))) == 'login':
+        login(selenium, test_username, test_password)
+    else:
+        fast_login(selenium, test_username, test_password)
     return test_username
 
 
@@ -155,7 +226,10 @@ def customized_server_config(request, selenium):
     if len(properties) == 0:
         return properties
 
-    client = LDClient(host=LDCLIENT_HOST, username=test_username, password=test_password, compatibility_mode=(8, 10))
+    client = LDClient(host=urls.LDCLIENT_HOST,
+                      username=test_username,
+                      password=test_password,
+                      compatibility_mode=(8, 10))
 
     config = client.config()
     original_properties = {
@@ -8,8 +8,7 @@ from helpers.selection.grid import GRID_FOOTER_COPYRIGHT
 from helpers.selection.login import DISCLAIMER
 from helpers.selection.modal import MODAL_DIALOG
 from helpers.selection.project import CHANGE_PROJECT_ICON, PROJECT_COPYRIGHT_NOTICE
-from library import dom, url
-from library.url_endpoints import LOGIN_URL, COPYRIGHT_URL
+from library import dom, url, url_endpoints
 
 COPYRIGHT = 'Copyright notices'
 SCHRODINGER_END_USER_AGREEMENT = 'Schrödinger End-User License Agreement'
@@ -33,7 +32,7 @@ def test_copyright_project(selenium):
     assert links[0].text == SCHRODINGER_END_USER_AGREEMENT
     assert links[0].get_attribute('href') == SCHRODINGER_EULA_URL
     assert links[1].text == COPYRIGHT
-    assert links[1].get_attribute('href') == COPYRIGHT_URL
+    assert links[1].get_attribute('href') == url_endpoints.COPYRIGHT_URL
 
 
 @pytest.mark.usefixtures('open_project')
@@ -55,7 +54,7 @@ def test_login_copyright(selenium):
 
     :param selenium: selenium webdriver
     """
-    url.go_to_url(selenium, LOGIN_URL)
+    url.go_to_url(selenium, url_endpoints.LOGIN_URL)
     login_copyright_notice = dom.get_element(selenium, DISCLAIMER)
     assert login_copyright_notice.text == 'By clicking Log in, you agree to use LiveDesign in accordance with the\n' \
                                           'Schrödinger End-User License Agreement. Copyright notices'
@@ -64,7 +63,7 @@ def test_login_copyright(selenium):
     assert links[0].text == SCHRODINGER_END_USER_AGREEMENT
     assert links[0].get_attribute('href').startswith(SCHRODINGER_EULA_URL)
     assert links[1].text == COPYRIGHT
-    assert links[1].get_attribute('href') == COPYRIGHT_URL
+    assert links[1].get_attribute('href') == url_endpoints.COPYRIGHT_URL
 
 
 def verify_footer_copyright(driver):
@@ -81,6 +80,6 @@ def verify_footer_copyright(driver):
     links = dom.get_elements(footer_copyright_notice, 'a')
     assert len(links) == 2
     assert links[0].text == COPYRIGHT
-    assert links[0].get_attribute('href') == COPYRIGHT_URL
+    assert links[0].get_attribute('href') == url_endpoints.COPYRIGHT_URL
     assert links[1].text == 'EULA'
     assert links[1].get_attribute('href') == SCHRODINGER_EULA_URL
@@ -1,7 +1,7 @@
 import pytest
 
 from helpers.flows.grid import set_custom_alignment
-from helpers.verification.grid import verify_header_has_aligned, verify_svg
+from helpers.verification.grid import verify_header_has_aligned, verify_svgs
 
 live_report_to_duplicate = {'livereport_name': '3 Compounds 2 Poses', 'livereport_id': '883'}
 
@@ -26,8 +26,12 @@ def test_custom_alignment(selenium):
     # Verify that the "Compound Structure" column header changes to "Compound Structure (Aligned)"
     verify_header_has_aligned(selenium)
 
-    # This compound will not be aligned due to lack of pyridine core in the structure.
-    verify_svg(selenium, 'CRA-035000', 'CustomAlignment1.svg')
-    # These two compounds will be aligned due to pyridine core in the structures.
-    verify_svg(selenium, 'CRA-035001', 'CustomAlignment2.svg')
-    verify_svg(selenium, 'CRA-035002', 'CustomAlignment3.svg')
+    verify_svgs(
+        selenium,
+        {
+            # This compound will not be aligned due to lack of pyridine core in the structure.
+            'CRA-035000': 'CustomAlignment1.svg',
+            # These two compounds will be aligned due to pyridine core in the structures.
+            'CRA-035001': 'CustomAlignment2.svg',
+            'CRA-035002': 'CustomAlignment3.svg',
+        })
@@ -2,7 +2,7 @@ import pytest
 
 import requests
 
-from library.url_endpoints import HOST
+from library import url_endpoints
 
 LD_PROPERTIES = {'HIDE_COMPOUND_STRUCTURE_COLUMN': 'true'}
 
@@ -15,7 +15,7 @@ def test_customized_server_config():
     headers = {"content-type": 'application/json'}
 
     # ----- Making sure that the flag is on via requests ----- #
-    r = requests.post("{}livedesign/api/config/search".format(HOST),
+    r = requests.post("{}livedesign/api/config/search".format(url_endpoints.HOST),
                       auth=requests.auth.HTTPBasicAuth('demo', 'demo'),
                       headers=headers,
                       data='{"keys": ["HIDE_COMPOUND_STRUCTURE_COLUMN"]}').json()
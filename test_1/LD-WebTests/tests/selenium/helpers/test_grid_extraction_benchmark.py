@@ -0,0 +1,38 @@
+"""
+Compares the script based grid extraction with the element walking fallback.
+
+NOTE: The LR that is opened has more rows and columns than will fit on the screen, so both extraction paths have to
+scroll the grid in both directions.
+"""
+import time
+
+import pytest
+
+from helpers.change.grid_column_menu import sort_grid_by
+from helpers.change.live_report_picker import open_live_report
+from helpers.extraction.grid import find_column_contents, find_columns_contents
+
+COLUMNS_TO_EXTRACT = ['ID', 'r_glide_XP_Sitemap (undefined)', 'Rationale']
+
+
+@pytest.mark.slow
+@pytest.mark.usefixtures("open_project")
+def test_grid_extraction_benchmark(selenium):
+    open_live_report(selenium, alias=881)
+    sort_grid_by(selenium, 'ID', sort_ascending=True)
+
+    start = time.perf_counter()
+    element_walking_contents = {
+        column_name: find_column_contents(selenium, column_name, use_script=False) for column_name in COLUMNS_TO_EXTRACT
+    }
+    element_walking_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    script_contents = find_columns_contents(selenium, COLUMNS_TO_EXTRACT)
+    script_duration = time.perf_counter() - start
+
+    print('Element walking extraction: {:.2f} s, script extraction: {:.2f} s'.format(
+        element_walking_duration, script_duration))
+    assert script_contents == element_walking_contents, \
+        'Script extraction returned `{}`, element walking returned `{}`'.format(script_contents,
+                                                                                element_walking_contents)
@@ -1,8 +1,8 @@
-import cairosvg
 import pytest
 
 from helpers.extraction import paths
 from helpers.verification.grid import verify_png
+from library.image_comparison import rasterize_svg_file
 
 
 def test_svg_comparison(selenium):
@@ -69,4 +69,4 @@ def test_svg_comparison(selenium):
 
 def _get_png_from_svg(filename):
     full_file_path = paths.get_resource_path(filename)
-    return cairosvg.svg2png(url=full_file_path)
+    return rasterize_svg_file(full_file_path)
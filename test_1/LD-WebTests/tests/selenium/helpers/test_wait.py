@@ -1,9 +1,8 @@
 import pytest
 from selenium.webdriver.common.by import By
 
-from library import wait, url
-from library.dom import LiveDesignWebException
-from library.url_endpoints import LOGIN_URL
+from library import wait, url, url_endpoints
+from library.dom import ElementCriteriaCondition, LiveDesignWebException
 
 
 def test_wait_with_nonexistent_element(selenium):
@@ -23,10 +22,23 @@ def test_wait_with_extant_element(selenium):
 
 
 def test_page_title(selenium):
-    url.go_to_url(selenium, LOGIN_URL)
+    url.go_to_url(selenium, url_endpoints.LOGIN_URL)
     title_from_get_element = selenium.find_element(By.CSS_SELECTOR, 'title') \
         .get_attribute("textContent")
     title_from_driver = selenium.title
     assert title_from_get_element == title_from_driver, \
         "There are two ways of getting the same thing"
     wait.until_page_title_is(selenium, 'Log in to LiveDesign')
+
+
+@pytest.mark.parametrize('locator, text', [((By.CSS_SELECTOR, 'input'), ''), ((By.TAG_NAME, 'button'), 'Log'),
+                                           ((By.XPATH, '//input'), '')])
+def test_batched_criteria_evaluation_matches_element_by_element(selenium, locator, text):
+    url.go_to_url(selenium, url_endpoints.LOGIN_URL)
+    wait.until_page_title_is(selenium, 'Log in to LiveDesign')
+
+    batched_condition = ElementCriteriaCondition(locator, text, return_all_matching=True, batched=True)
+    element_by_element_condition = ElementCriteriaCondition(locator, text, return_all_matching=True, batched=False)
+
+    assert batched_condition(selenium) == element_by_element_condition(selenium), \
+        "Batched and element by element evaluation should match the same elements"
@@ -38,6 +38,7 @@ def reset_default_template(selenium):
     change_project_default_template(selenium, 'Blank')
 
 
+@pytest.mark.exclusive
 @pytest.mark.serial
 @pytest.mark.smoke
 @pytest.mark.usefixtures("open_project")
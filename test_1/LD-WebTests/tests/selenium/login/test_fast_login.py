@@ -0,0 +1,29 @@
+import pytest
+
+from helpers.selection.authentication import USER_NAME_ELEMENT
+from helpers.verification.element import verify_is_visible
+from library import url_endpoints
+from library.authentication import LOGGED_IN_PAGE_TITLE, clear_session_cookies, fast_login
+
+
+@pytest.mark.smoke
+@pytest.mark.reuse_browser
+def test_fast_login(selenium):
+    """
+    Test logging in with the session cookies obtained over the REST API, also after the cached session was dropped
+    :param selenium: Selenium Webdriver
+    """
+    assert fast_login(selenium, 'demo', 'demo'), 'Expected to be logged in without the login page'
+    verify_logged_in_without_login_page(selenium)
+
+    # Without a cached session, a new one must be obtained, still without going through the login page
+    clear_session_cookies('demo', 'demo')
+    selenium.delete_all_cookies()
+    assert fast_login(selenium, 'demo', 'demo'), 'Expected to be logged in again without the login page'
+    verify_logged_in_without_login_page(selenium)
+
+
+def verify_logged_in_without_login_page(driver):
+    assert driver.title.strip() == LOGGED_IN_PAGE_TITLE, 'Unexpected page title: {}'.format(driver.title)
+    assert not driver.current_url.startswith(url_endpoints.LOGIN_URL), 'Ended up on {}'.format(driver.current_url)
+    verify_is_visible(driver, selector=USER_NAME_ELEMENT, selector_text='demo')
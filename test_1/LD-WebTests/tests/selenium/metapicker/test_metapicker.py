@@ -11,6 +11,7 @@ from library.eventually import eventually_equal
 
 
 @pytest.mark.smoke
+@pytest.mark.reuse_browser
 @pytest.mark.usefixtures("open_project")
 def test_metapicker(selenium):
     """
@@ -11,6 +11,7 @@ test_report_is_private = True
 
 
 @pytest.mark.app_defect(reason='SS-42590: Failing due to LRs left behind by test_copy_live_report_role')
+@pytest.mark.exclusive
 @pytest.mark.serial
 @pytest.mark.usefixtures("open_project")
 @pytest.mark.usefixtures("new_live_report")
@@ -4,6 +4,7 @@ from helpers.selection.actions_pane import HELP_LINK
 from library import dom
 
 
+@pytest.mark.reuse_browser
 @pytest.mark.usefixtures('open_project')
 def test_help_link(selenium):
     """
@@ -5,6 +5,7 @@ from helpers.verification.element import verify_is_visible, verify_is_not_visibl
 from library import dom, base
 
 
+@pytest.mark.reuse_browser
 @pytest.mark.usefixtures("login_to_livedesign")
 def test_project_picker_ui(selenium):
     """